@@ -0,0 +1,211 @@
+"""示例API服务的模拟器模式
+
+与 app.py 提供相同的接口和返回结果，但处理时间按可配置的延迟分布生成，并可注入
+错误和超时，用于对执行引擎做并发压测。接口以协程实现，等待期间不占用线程，单个
+进程即可同时保持数千个慢请求。
+
+    python simulator.py --latency lognormal --base 0.5 --sigma 0.6 \\
+        --spike-rate 0.01 --spike-latency 5 --error-rate 0.02 --timeout-rate 0.005 --seed 42
+
+未指定 --base 时各接口使用 app.py 中的处理时间。--config 指定的JSON文件可按接口
+覆盖配置，如 {"default": {"error_rate": 0.01}, "endpoints": {"/fault-repair":
+{"latency": "normal", "base": 2, "stddev": 0.5}}}。
+
+指定 --seed 时，每个接口第 n 个请求的延迟、错误和结果只由种子、接口和 n 决定，
+与其他接口的请求如何交错无关。
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+import uvicorn
+from mock_responses import ENDPOINTS
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'normal', 'lognormal')
+
+# 模拟配置的默认值，base 为空时使用接口的默认处理时间
+DEFAULT_PROFILE = {
+    'latency': 'fixed',       # 延迟分布：fixed、normal、lognormal
+    'base': None,             # fixed 的延迟、normal 的均值、lognormal 的中位数（秒）
+    'stddev': 0.1,            # normal 的标准差（秒）
+    'sigma': 0.5,             # lognormal 的形状参数
+    'spike_rate': 0.0,        # 出现长尾延迟的比例
+    'spike_latency': 5.0,     # 长尾延迟在正常延迟之上额外增加的时间（秒）
+    'scale': 1.0,             # 所有延迟的倍数，压测时可整体缩短
+    'error_rate': 0.0,        # 返回错误的比例
+    'error_status': 500,      # 注入错误的状态码
+    'timeout_rate': 0.0,      # 不响应的比例
+    'timeout_latency': 300.0  # 注入超时时挂起的时间（秒），客户端应先超时
+}
+
+class EndpointProfile:
+    """单个接口的模拟配置"""
+
+    def __init__(self, config, default_latency):
+        self.config = dict(DEFAULT_PROFILE, **config)
+        if self.config['latency'] not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"不支持的延迟分布: {self.config['latency']}")
+        if self.config['base'] is None:
+            self.config['base'] = default_latency
+        for key in ('spike_rate', 'error_rate', 'timeout_rate'):
+            if not 0 <= self.config[key] <= 1:
+                raise ValueError(f"{key} 必须在0到1之间")
+
+    def sample_latency(self, rng):
+        """按延迟分布生成一次处理时间（秒）"""
+        config = self.config
+        base = config['base']
+        if config['latency'] == 'normal':
+            latency = max(0.0, rng.gauss(base, config['stddev']))
+        elif config['latency'] == 'lognormal':
+            latency = rng.lognormvariate(math.log(base), config['sigma']) if base > 0 else 0.0
+        else:
+            latency = base
+        if config['spike_rate'] and rng.random() < config['spike_rate']:
+            latency += config['spike_latency']
+        return latency * config['scale']
+
+    def sample_outcome(self, rng):
+        """决定本次请求正常返回、返回错误还是超时"""
+        draw = rng.random()
+        if draw < self.config['timeout_rate']:
+            return 'timeout'
+        if draw < self.config['timeout_rate'] + self.config['error_rate']:
+            return 'error'
+        return 'ok'
+
+class Simulator:
+    """按接口生成每个请求的延迟和结果，并统计请求情况"""
+
+    def __init__(self, default_config=None, endpoint_configs=None, seed=None):
+        self.seed = seed
+        self.profiles = {}
+        for path, (_, default_latency) in ENDPOINTS.items():
+            config = dict(default_config or {}, **(endpoint_configs or {}).get(path, {}))
+            self.profiles[path] = EndpointProfile(config, default_latency)
+        self._counters = {path: 0 for path in ENDPOINTS}
+        self._stats = {
+            path: {'requests': 0, 'errors': 0, 'timeouts': 0, 'in_flight': 0, 'max_in_flight': 0}
+            for path in ENDPOINTS
+        }
+
+    def next_rng(self, path):
+        """接口下一个请求使用的随机数生成器"""
+        sequence = self._counters[path]
+        self._counters[path] = sequence + 1
+        if self.seed is None:
+            return random.Random()
+        return random.Random(f'{self.seed}:{path}:{sequence}')
+
+    async def handle(self, path, data):
+        """模拟一次请求，返回响应"""
+        profile = self.profiles[path]
+        build_result, _ = ENDPOINTS[path]
+        rng = self.next_rng(path)
+        latency = profile.sample_latency(rng)
+        outcome = profile.sample_outcome(rng)
+
+        stats = self._stats[path]
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+        try:
+            if outcome == 'timeout':
+                stats['timeouts'] += 1
+                await asyncio.sleep(profile.config['timeout_latency'] * profile.config['scale'])
+            else:
+                await asyncio.sleep(latency)
+            if outcome == 'error':
+                stats['errors'] += 1
+                return JSONResponse(
+                    {'error': '模拟的服务错误', 'path': path}, status_code=profile.config['error_status']
+                )
+            # 修复验证的结果本身是随机的，同样使用本次请求的随机数生成器
+            if path == '/repair-verification':
+                return JSONResponse(build_result(data, rng))
+            return JSONResponse(build_result(data))
+        finally:
+            stats['in_flight'] -= 1
+
+    def get_stats(self):
+        return {
+            'seed': self.seed,
+            'endpoints': {
+                path: dict(self._stats[path], profile=self.profiles[path].config) for path in ENDPOINTS
+            }
+        }
+
+def create_app(simulator):
+    """创建模拟器模式的应用"""
+    app = FastAPI(title='Agent设计器示例API服务（模拟器模式）')
+    app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])
+
+    @app.get('/')
+    async def index():
+        return "Agent设计器示例API服务（模拟器模式）"
+
+    @app.get('/_simulator/stats')
+    async def simulator_stats():
+        """各接口的请求统计和模拟配置"""
+        return simulator.get_stats()
+
+    def add_endpoint(path):
+        async def endpoint(request: Request):
+            data = await request.json()
+            return await simulator.handle(path, data)
+        endpoint.__name__ = path.strip('/').replace('-', '_')
+        app.add_api_route(path, endpoint, methods=['POST'])
+
+    for path in ENDPOINTS:
+        add_endpoint(path)
+    return app
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='示例API服务的模拟器模式')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, help='延迟分布')
+    parser.add_argument('--base', type=float, help='fixed 的延迟、normal 的均值、lognormal 的中位数（秒）')
+    parser.add_argument('--stddev', type=float, help='normal 的标准差（秒）')
+    parser.add_argument('--sigma', type=float, help='lognormal 的形状参数')
+    parser.add_argument('--spike-rate', type=float, help='出现长尾延迟的比例')
+    parser.add_argument('--spike-latency', type=float, help='长尾延迟额外增加的时间（秒）')
+    parser.add_argument('--scale', type=float, help='所有延迟的倍数')
+    parser.add_argument('--error-rate', type=float, help='返回错误的比例')
+    parser.add_argument('--error-status', type=int, help='注入错误的状态码')
+    parser.add_argument('--timeout-rate', type=float, help='不响应的比例')
+    parser.add_argument('--timeout-latency', type=float, help='注入超时时挂起的时间（秒）')
+    parser.add_argument('--seed', type=int, help='随机数种子，指定后结果可复现')
+    parser.add_argument('--config', help='按接口覆盖配置的JSON文件')
+    parser.add_argument('--backlog', type=int, default=4096, help='等待接受的连接数上限')
+    return parser.parse_args(argv)
+
+def build_simulator(args):
+    """根据命令行参数和配置文件创建模拟器，命令行参数优先于配置文件的 default"""
+    file_config = {}
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            file_config = json.load(f)
+
+    default_config = dict(file_config.get('default', {}))
+    for key in DEFAULT_PROFILE:
+        value = getattr(args, key, None)
+        if value is not None:
+            default_config[key] = value
+    seed = args.seed if args.seed is not None else file_config.get('seed')
+    return Simulator(default_config, file_config.get('endpoints'), seed)
+
+def main(argv=None):
+    args = parse_args(argv)
+    simulator = build_simulator(args)
+    uvicorn.run(
+        create_app(simulator), host=args.host, port=args.port, backlog=args.backlog,
+        log_level='warning', access_log=False
+    )
+
+if __name__ == '__main__':
+    main()
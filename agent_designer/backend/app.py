@@ -1,10 +1,12 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
-from models import db
+from models import db, upgrade_schema
 from controllers.component_controller import component_bp
 from controllers.workflow_controller import workflow_bp
 from controllers.settings_controller import settings_bp
+from controllers.metrics_controller import metrics_bp
+from services.workflow_service import warm_up_python_lpis
 
 app = Flask(__name__, static_folder='static')
 app.config.from_object(Config)
@@ -15,6 +17,7 @@ db.init_app(app)
 app.register_blueprint(component_bp, url_prefix='/api/components')
 app.register_blueprint(workflow_bp, url_prefix='/api/workflows')
 app.register_blueprint(settings_bp, url_prefix='/api/settings')
+app.register_blueprint(metrics_bp)
 
 @app.route('/')
 def index():
@@ -23,4 +26,6 @@ def index():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        upgrade_schema()
+        warm_up_python_lpis()
     app.run(debug=False)
\ No newline at end of file
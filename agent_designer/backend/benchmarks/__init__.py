@@ -0,0 +1 @@
+# 执行引擎基准测试包初始化文件
@@ -0,0 +1,288 @@
+"""执行引擎基准测试
+
+在内存SQLite数据库中生成合成工作流（线性链、宽扇出、多路分支、深层嵌套Agent），
+使用进程内的回显Python LPI运行，统计运行耗时分位数、每步开销、峰值内存，以及
+get_next_node、执行计划构建和 Workflow 模型方法的单次调用耗时。
+
+在 backend 目录下运行：
+
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json
+
+指定 --baseline 时与基线结果比较，任一指标变慢超过 --threshold 即以退出码 1 结束。
+"""
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from flask import Flask
+from config import Config
+from models import db
+from services.async_engine import execute_workflow_async
+from services.execution_plan import get_execution_plan, invalidate_execution_plan
+from services.workflow_service import execute_workflow, get_next_node
+from benchmarks import synthetic_workflows
+
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_DEPTHS = (1, 5, 20)
+
+# 与基线比较的指标及其噪声下限：变化量低于下限时不视为退化
+COMPARED_METRICS = {
+    'p50_ms': 0.05,
+    'per_step_us': 1.0,
+    'per_call_ns': 50,
+    'peak_alloc_kb': 16
+}
+
+def create_app():
+    """使用内存数据库的最小应用，不注册接口"""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    return app
+
+def percentile(sorted_values, fraction):
+    """最近秩法计算分位数"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def measure_memory(run):
+    """在 tracemalloc 下执行一次，返回 (运行中分配的峰值KB, 运行结束后仍保留的KB)"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = run()
+        peak = tracemalloc.get_traced_memory()[1]
+        del result
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return round((peak - before) / 1024, 1), round((after - before) / 1024, 1)
+
+def measure_run(workflow, run, options):
+    """测量一次运行的冷启动耗时、多次运行的耗时分布和内存"""
+    invalidate_execution_plan(workflow.id)
+    started = time.perf_counter()
+    result = run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    steps = len(result['steps'])
+
+    timings = []
+    deadline = time.perf_counter() + options.max_seconds
+    while len(timings) < options.repeat and (len(timings) < 3 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    p50 = percentile(timings, 0.5)
+    metrics = {
+        'nodes': len(workflow.nodes_obj),
+        'steps': steps,
+        'runs': len(timings),
+        'cold_ms': round(cold_ms, 3),
+        'min_ms': round(timings[0], 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'p50_ms': round(p50, 3),
+        'p90_ms': round(percentile(timings, 0.9), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'per_step_us': round(p50 * 1000 / steps, 3)
+    }
+    if options.memory:
+        metrics['peak_alloc_kb'], metrics['retained_kb'] = measure_memory(run)
+    return metrics
+
+def measure_calls(call, calls_per_round, rounds=5):
+    """多轮执行 call，按最快一轮计算单次调用耗时（纳秒）"""
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        call()
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return {'calls': calls_per_round, 'per_call_ns': round(best / calls_per_round, 1)}
+
+def sync_runner(workflow, input_data, mode):
+    return lambda: execute_workflow(workflow.id, input_data, mode=mode)
+
+def async_runner(workflow, input_data):
+    return lambda: asyncio.run(execute_workflow_async(workflow.id, input_data))
+
+def run_workflow_benchmarks(lpi, options, results):
+    """整次运行的基准测试"""
+    for size in options.sizes:
+        chain = synthetic_workflows.linear_chain(lpi, size)
+        record(results, f'run.linear.sequential[{size}]', options,
+               lambda: measure_run(chain, sync_runner(chain, {'n': 1}, 'sequential'), options))
+        record(results, f'run.linear.async[{size}]', options,
+               lambda: measure_run(chain, async_runner(chain, {'n': 1}), options))
+        record(results, f'run.linear.dag[{size}]', options,
+               lambda: measure_run(chain, sync_runner(chain, {'n': 1}, 'dag'), options))
+
+        if size >= 4:
+            wide = synthetic_workflows.fan_out(lpi, size)
+            record(results, f'run.fan_out.dag[{size}]', options,
+                   lambda: measure_run(wide, sync_runner(wide, {'n': 1}, 'dag'), options))
+
+            branches, route_input = synthetic_workflows.router(lpi, size)
+            record(results, f'run.router.sequential[{size}]', options,
+                   lambda: measure_run(branches, sync_runner(branches, route_input, 'sequential'), options))
+
+    for depth in options.depths:
+        nested = synthetic_workflows.nested_agents(lpi, depth)
+        record(results, f'run.nested_agents.sequential[{depth}]', options,
+               lambda: measure_run(nested, sync_runner(nested, {'n': 1}, 'sequential'), options))
+        record(results, f'run.nested_agents.async[{depth}]', options,
+               lambda: measure_run(nested, async_runner(nested, {'n': 1}), options))
+
+def run_micro_benchmarks(lpi, options, results):
+    """引擎内部函数和模型方法的基准测试"""
+    for size in options.sizes:
+        chain = synthetic_workflows.linear_chain(lpi, size)
+        plan = get_execution_plan(chain)
+        data = {'n': 1}
+
+        def walk():
+            node = plan.start_node
+            while node is not None:
+                node = get_next_node(plan, node.get('id'), data)
+        record(results, f'get_next_node.linear[{size}]', options, lambda: measure_calls(walk, size))
+
+        def build_plan():
+            invalidate_execution_plan(chain.id)
+            get_execution_plan(chain)
+        record(results, f'plan.build[{size}]', options, lambda: measure_calls(build_plan, 1, rounds=3))
+
+        last_node_id = chain.nodes_obj[-1]['id']
+        model_calls = {
+            'nodes_obj': lambda: chain.nodes_obj,
+            'get_start_node': chain.get_start_node,
+            'get_node_by_id': lambda: chain.get_node_by_id(last_node_id),
+            'to_dict': chain.to_dict
+        }
+        for name, call in model_calls.items():
+            record(results, f'model.{name}[{size}]', options, lambda: measure_calls(call, 1))
+
+        if size >= 4:
+            branches, route_input = synthetic_workflows.router(lpi, size)
+            router_plan = get_execution_plan(branches)
+
+            def route():
+                for _ in range(1000):
+                    get_next_node(router_plan, 'router', route_input)
+            record(results, f'get_next_node.router[{size}]', options, lambda: measure_calls(route, 1000))
+
+def record(results, name, options, measure):
+    """执行一项基准测试并输出结果，--only 过滤掉的项目跳过"""
+    if options.only and not any(pattern in name for pattern in options.only):
+        return
+    metrics = measure()
+    results[name] = metrics
+    print(format_result(name, metrics), flush=True)
+
+def format_result(name, metrics):
+    if 'per_call_ns' in metrics:
+        return f"{name:<42} {metrics['per_call_ns'] / 1000:>12.3f} us/次"
+    line = (
+        f"{name:<42} p50 {metrics['p50_ms']:>10.3f} ms  p90 {metrics['p90_ms']:>10.3f} ms  "
+        f"p99 {metrics['p99_ms']:>10.3f} ms  {metrics['per_step_us']:>8.2f} us/步"
+    )
+    if 'peak_alloc_kb' in metrics:
+        line += f"  峰值 {metrics['peak_alloc_kb']:>10.1f} KB"
+    return line
+
+def compare_with_baseline(results, baseline, threshold):
+    """与基线比较，返回退化的指标列表"""
+    regressions = []
+    for name, metrics in results.items():
+        base_metrics = baseline.get(name)
+        if not base_metrics:
+            continue
+        for metric, min_delta in COMPARED_METRICS.items():
+            if metric not in metrics or metric not in base_metrics:
+                continue
+            current, base = metrics[metric], base_metrics[metric]
+            if current > base * (1 + threshold) and current - base > min_delta:
+                regressions.append({
+                    'benchmark': name,
+                    'metric': metric,
+                    'baseline': base,
+                    'current': current,
+                    'change': round(current / base - 1, 3) if base else None
+                })
+    return regressions
+
+def parse_sizes(text):
+    return tuple(int(part) for part in text.split(',') if part.strip())
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='工作流执行引擎基准测试')
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help='合成工作流的节点数，逗号分隔（如 10,100,1000,10000,100000）')
+    parser.add_argument('--depths', type=parse_sizes, default=DEFAULT_DEPTHS,
+                        help='嵌套Agent的层数，逗号分隔')
+    parser.add_argument('--repeat', type=int, default=20, help='每项运行基准测试的最多运行次数')
+    parser.add_argument('--max-seconds', type=float, default=5.0,
+                        help='每项运行基准测试的时间上限（秒），至少运行3次')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='不统计内存')
+    parser.add_argument('--only', action='append', help='只运行名称包含该字符串的项目，可指定多次')
+    parser.add_argument('--output', help='结果写入的JSON文件')
+    parser.add_argument('--baseline', help='用于比较的基线结果JSON文件')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='相对基线变慢（或内存增长）超过该比例时判定为退化')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    options = parse_args(argv)
+    baseline = None
+    if options.baseline:
+        with open(options.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+
+    app = create_app()
+    results = {}
+    with app.app_context(), tempfile.TemporaryDirectory() as lpi_dir:
+        db.create_all()
+        lpi = synthetic_workflows.create_echo_lpi(lpi_dir)
+        run_workflow_benchmarks(lpi, options, results)
+        run_micro_benchmarks(lpi, options, results)
+
+    report = {
+        'meta': {
+            'time': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'sizes': list(options.sizes),
+            'depths': list(options.depths),
+            'trace_mode': Config.WORKFLOW_TRACE_MODE
+        },
+        'results': results
+    }
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if baseline is None:
+        return 0
+    regressions = compare_with_baseline(results, baseline, options.threshold)
+    for item in regressions:
+        change = f" (+{item['change'] * 100:.1f}%)" if item['change'] is not None else ''
+        print(f"退化: {item['benchmark']} {item['metric']} {item['baseline']} -> {item['current']}{change}",
+              file=sys.stderr)
+    if regressions:
+        print(f"共 {len(regressions)} 项指标相对基线退化超过 {options.threshold * 100:.0f}%", file=sys.stderr)
+        return 1
+    print(f"与基线相比没有超过 {options.threshold * 100:.0f}% 的退化")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
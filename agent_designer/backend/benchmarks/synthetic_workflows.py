@@ -0,0 +1,93 @@
+import os
+from models import db
+from models.component import Component
+from models.workflow import Workflow
+from services.workflow_service import publish_workflow
+
+# 原样返回输入的Python LPI，基准测试只衡量引擎自身的开销
+ECHO_LPI_SOURCE = '''
+def main(data):
+    return data
+'''
+
+def create_echo_lpi(directory):
+    """在 directory 中生成回显LPI模块并创建对应的LPI组件"""
+    path = os.path.join(directory, 'bench_echo_lpi.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(ECHO_LPI_SOURCE)
+
+    component = Component(name='基准测试回显LPI', component_type='lpi')
+    component.content_obj = {'api_type': 'python', 'endpoint': path, 'method': 'main'}
+    db.session.add(component)
+    db.session.commit()
+    return component
+
+def _node(node_id, node_type, **data):
+    return {'id': node_id, 'type': node_type, 'data': dict({'name': node_id}, **data)}
+
+def _edge(source, target, condition=None):
+    edge = {'id': f'{source}-{target}', 'source': source, 'target': target}
+    if condition:
+        edge['data'] = {'condition': condition}
+    return edge
+
+def _save_workflow(name, nodes, edges, agent_id=None):
+    workflow = Workflow(name=name, agent_id=agent_id)
+    workflow.nodes_obj = nodes
+    workflow.edges_obj = edges
+    db.session.add(workflow)
+    db.session.commit()
+    return workflow
+
+def linear_chain(lpi, size):
+    """开始 -> (size - 2) 个LPI节点 -> 结束"""
+    node_ids = ['start'] + [f'lpi_{i}' for i in range(size - 2)] + ['end']
+    nodes = [_node('start', 'start')]
+    nodes.extend(_node(node_id, 'lpi', component_id=lpi.id) for node_id in node_ids[1:-1])
+    nodes.append(_node('end', 'end'))
+    edges = [_edge(source, target) for source, target in zip(node_ids, node_ids[1:])]
+    return _save_workflow(f'线性链-{size}', nodes, edges)
+
+def fan_out(lpi, size):
+    """开始 -> (size - 3) 个并行的LPI节点 -> 汇聚 -> 结束"""
+    branch_ids = [f'lpi_{i}' for i in range(size - 3)]
+    nodes = [_node('start', 'start'), _node('join', 'join'), _node('end', 'end')]
+    nodes.extend(_node(node_id, 'lpi', component_id=lpi.id) for node_id in branch_ids)
+    edges = [_edge('start', node_id) for node_id in branch_ids]
+    edges.extend(_edge(node_id, 'join') for node_id in branch_ids)
+    edges.append(_edge('join', 'end'))
+    return _save_workflow(f'宽扇出-{size}', nodes, edges)
+
+def router(lpi, size):
+    """开始 -> 路由节点 -> (size - 3) 路等值条件分支 -> 结束，命中最后一个分支"""
+    branch_ids = [f'branch_{i}' for i in range(size - 3)]
+    nodes = [_node('start', 'start'), _node('router', 'lpi', component_id=lpi.id), _node('end', 'end')]
+    nodes.extend(_node(node_id, 'lpi', component_id=lpi.id) for node_id in branch_ids)
+    edges = [_edge('start', 'router')]
+    edges.extend(_edge('router', node_id, f"input['route'] == {i}") for i, node_id in enumerate(branch_ids))
+    edges.extend(_edge(node_id, 'end') for node_id in branch_ids)
+    workflow = _save_workflow(f'多路分支-{size}', nodes, edges)
+    return workflow, {'route': len(branch_ids) - 1}
+
+def nested_agents(lpi, depth):
+    """depth 层嵌套的Agent工作流，每层为 开始 -> LPI -> 下一层Agent -> 结束"""
+    inner_agent = None
+    for level in range(depth):
+        agent = Component(name=f'基准测试Agent-{level}', component_type='agent')
+        db.session.add(agent)
+        db.session.commit()
+
+        nodes = [_node('start', 'start'), _node('lpi', 'lpi', component_id=lpi.id), _node('end', 'end')]
+        edges = [_edge('start', 'lpi')]
+        if inner_agent is None:
+            edges.append(_edge('lpi', 'end'))
+        else:
+            nodes.append(_node('agent', 'agent', component_id=inner_agent.id))
+            edges.extend([_edge('lpi', 'agent'), _edge('agent', 'end')])
+        workflow = _save_workflow(f'嵌套Agent-{depth}-{level}', nodes, edges, agent_id=agent.id)
+        publish_workflow(workflow.id)
+        inner_agent = agent
+
+    nodes = [_node('start', 'start'), _node('agent', 'agent', component_id=inner_agent.id), _node('end', 'end')]
+    edges = [_edge('start', 'agent'), _edge('agent', 'end')]
+    return _save_workflow(f'嵌套Agent-{depth}', nodes, edges)
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 class Config:
     # 数据库配置
@@ -12,9 +13,64 @@ class Config:
     # 跨域配置
     CORS_HEADERS = 'Content-Type'
     
+    # 工作流执行配置
+    WORKFLOW_DAG_MAX_WORKERS = 8  # DAG模式下单次运行的最大并发节点数
+    WORKFLOW_BATCH_CONCURRENCY = 4  # 批量执行时默认同时执行的运行数
+    WORKFLOW_BATCH_MAX_CONCURRENCY = 32  # 批量执行时允许请求的最大并发数
+    WORKFLOW_DEFAULT_TIMEOUT = None  # 工作流运行的默认时间预算（秒），None 表示不限时
+    
+    # 执行轨迹配置
+    WORKFLOW_TRACE_MODE = 'full'  # full, summary, spill
+    WORKFLOW_TRACE_MAX_BYTES = 0  # 单次运行保留的载荷上限，0 表示不限制；full 模式只有设置了上限才计算载荷大小
+    WORKFLOW_TRACE_SPILL_THRESHOLD = 64 * 1024  # spill 模式下超过该大小的载荷写入临时文件
+    WORKFLOW_TRACE_SPILL_DIR = os.path.join(tempfile.gettempdir(), 'agent_designer_traces')
+    WORKFLOW_TRACE_BLOB_TTL = 3600  # 溢出文件保留时间（秒）
+    
+    # LPI结果缓存配置
+    LPI_RESULT_CACHE_MAX_ENTRIES = 1024  # 缓存的调用结果数上限，超出时淘汰最久未使用的结果
+    LPI_RESULT_CACHE_DEFAULT_TTL = 300  # LPI未指定 cache_ttl 时的缓存有效期（秒）
+    
+    # LPI进程池配置（content 中 execution 为 process 的Python LPI）
+    LPI_PROCESS_POOL_SIZE = os.cpu_count() or 2  # 工作进程数
+    LPI_PROCESS_DEFAULT_TIMEOUT = 60  # LPI未指定 timeout 时的单次调用超时（秒）
+    LPI_PROCESS_START_METHOD = 'spawn'  # 工作进程启动方式，不继承Web进程的线程和连接
+    LPI_PROCESS_BOOT_TIMEOUT = 60  # 工作进程启动（导入主模块和预加载模块）的超时（秒），不计入调用超时
+    
+    # LPI容错配置（可在LPI的 resilience 字段中按LPI覆盖）
+    LPI_RETRY_BACKOFF_BASE = 0.2  # 重试等待基数（秒），按指数增长并随机抖动
+    LPI_RETRY_BACKOFF_MAX = 5  # 单次重试等待上限（秒）
+    LPI_BREAKER_FAILURE_THRESHOLD = 5  # 连续失败多少次后熔断
+    LPI_BREAKER_RESET_TIMEOUT = 30  # 熔断后多久放行一次探测调用（秒）
+    
+    # LPI并发隔离配置（可在LPI的 bulkhead 字段中按LPI覆盖）
+    LPI_BULKHEAD_MAX_QUEUE = 100  # 达到并发上限后允许排队的调用数
+    LPI_BULKHEAD_QUEUE_TIMEOUT = 10  # 排队等待的超时（秒）
+    LPI_HOST_BULKHEADS = {}  # 按主机限制并发，如 {'127.0.0.1:5001': {'max_in_flight': 20}}
+    
+    # 执行指标配置
+    METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # 耗时直方图的桶上界（秒）
+    
+    # 后台运行配置
+    JOB_MAX_WORKERS = 4  # 同时执行的后台运行数
+    JOB_MAX_QUEUED = 100  # 排队等待的后台运行上限，超出时拒绝提交
+    JOB_MAX_RETAINED_RUNS = 1000  # 保留供查询的运行记录数
+    
     # 文件存储路径
     STORAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storage')
     
+    # 运行检查点配置
+    CHECKPOINT_DIR = os.path.join(STORAGE_DIR, 'checkpoints')  # 每个运行一个追加写入的JSONL文件
+    CHECKPOINT_BATCH_SIZE = 256  # 后台线程每批写入的最大记录数
+    CHECKPOINT_FSYNC = False  # 每批写入后是否同步到磁盘
+    
+    # 链路追踪配置
+    TRACING_ENABLED = False  # 是否记录运行、节点、Agent工作流和LPI调用的span
+    TRACING_SAMPLE_RATE = 1.0  # 记录的顶层运行比例，嵌套的span跟随所属运行
+    TRACING_EXPORTER = 'jsonl'  # span导出方式，见 services/tracing.py 中的 EXPORTERS
+    TRACING_EXPORT_PATH = os.path.join(STORAGE_DIR, 'traces', 'spans.jsonl')  # jsonl 导出的文件
+    TRACING_BATCH_SIZE = 512  # 后台线程每批导出的最大span数
+    TRACING_MAX_QUEUE = 10000  # 等待导出的span上限，超出时丢弃
+    
     # 确保存储目录存在
     @staticmethod
     def init_app(app):
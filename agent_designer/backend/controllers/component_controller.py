@@ -10,6 +10,7 @@ from services.component_service import (
 
 #get_component_tree, get_component_detail,
 from services.component_service import ComponentService
+from services.workflow_service import warm_up_python_lpis
 
 
 component_bp = Blueprint('component', __name__, url_prefix='/api/component')
@@ -56,6 +57,11 @@ def update_lpi_component(component_id):
     lpi = update_lpi(component_id, data)
     return jsonify(lpi.get_lpi_details())
 
+@component_bp.route('/lpi/warm-up', methods=['POST'])
+def warm_up_lpi_components():
+    """预加载Python类型LPI模块"""
+    return jsonify(warm_up_python_lpis())
+
 @component_bp.route('/agent', methods=['POST'])
 def create_agent_component():
     data = request.json
@@ -71,13 +77,19 @@ def update_agent_component(component_id):
 @component_bp.route('/common', methods=['POST'])
 def create_common_component_route():
     data = request.json
-    component = create_common_component(data)
+    try:
+        component = create_common_component(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(component.get_common_details()), 201
 
 @component_bp.route('/common/<int:component_id>', methods=['PUT'])
 def update_common_component_route(component_id):
     data = request.json
-    component = update_common_component(component_id, data)
+    try:
+        component = update_common_component(component_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(component.get_common_details())
 
 @component_bp.route('/<int:component_id>', methods=['DELETE'])
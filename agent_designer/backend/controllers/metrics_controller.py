@@ -0,0 +1,9 @@
+from flask import Blueprint, Response
+from services.metrics import registry
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """以 Prometheus 文本格式导出执行指标"""
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -1,10 +1,31 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+import asyncio
+import json
+import uuid
 from models import db
 from models.workflow import Workflow
 from services.workflow_service import (
     get_workflow_detail, create_workflow, update_workflow, 
-    delete_workflow, execute_workflow, test_workflow
+    delete_workflow, execute_workflow, test_workflow, publish_workflow,
+    stream_workflow, resume_workflow, check_dag_eligible, EXECUTION_MODES
 )
+from services.checkpoint_store import load_checkpoint, CheckpointError, checkpoint_writer
+from services.run_context import WorkflowDeadlineExceededError
+from services.async_engine import execute_workflow_async
+from services.execution_plan import get_plan_cache_stats, DagCycleError
+from services.job_service import job_manager, JobRejectedError
+from services.batch_service import execute_workflow_batch, iter_ndjson_inputs
+from services.expression_engine import get_expression_stats
+from services.decision_table import get_decision_table_stats
+from services.transform_engine import get_transform_stats
+from services.lpi_loader import get_lpi_module_stats
+from services.lpi_transport import get_transport_stats
+from services.execution_trace import TRACE_MODES, load_trace_blob
+from services.lpi_result_cache import lpi_result_cache
+from services.lpi_process_pool import lpi_process_pool
+from services.resilience import get_breaker_stats
+from services.bulkhead import get_bulkhead_stats, BulkheadFullError, BulkheadTimeoutError
+from services.tracing import span_processor
 
 workflow_bp = Blueprint('workflow', __name__)
 
@@ -28,13 +49,19 @@ def get_workflow(workflow_id):
 @workflow_bp.route('/', methods=['POST'])
 def create_workflow_route():
     data = request.json
-    workflow = create_workflow(data)
+    try:
+        workflow = create_workflow(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(workflow.to_dict()), 201
 
 @workflow_bp.route('/<int:workflow_id>', methods=['PUT'])
 def update_workflow_route(workflow_id):
     data = request.json
-    workflow = update_workflow(workflow_id, data)
+    try:
+        workflow = update_workflow(workflow_id, data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(workflow.to_dict())
 
 @workflow_bp.route('/<int:workflow_id>', methods=['DELETE'])
@@ -58,31 +85,303 @@ def test_workflow_endpoint(workflow_id):
 @workflow_bp.route('/<int:workflow_id>/execute', methods=['POST'])
 def execute_workflow_endpoint(workflow_id):
     input_data = request.json
+    mode = request.args.get('mode', 'sequential')
+    job = request.args.get('job') in ('1', 'true')
+    # 后台运行由工作线程同步执行，不支持异步模式
+    if mode not in (EXECUTION_MODES if job else EXECUTION_MODES + ('async',)):
+        return jsonify({'error': f"不支持的执行模式: {mode}"}), 400
+    trace_mode = request.args.get('trace')
+    if trace_mode and trace_mode not in TRACE_MODES:
+        return jsonify({'error': f"不支持的轨迹模式: {trace_mode}"}), 400
+    checkpoint = request.args.get('checkpoint') in ('1', 'true')
+    if checkpoint and mode != 'sequential':
+        return jsonify({'error': '只有顺序执行模式支持检查点'}), 400
+    timeout = request.args.get('timeout', type=float)
+    if timeout is not None and timeout <= 0:
+        return jsonify({'error': '运行时间预算必须大于0'}), 400
+    # 存在环的工作流只能按顺序模式执行
+    if mode == 'dag':
+        try:
+            check_dag_eligible(workflow_id)
+        except DagCycleError as e:
+            return jsonify({'error': str(e)}), 400
     
-    try:
-        result = execute_workflow(workflow_id, input_data)
+    # 后台运行：入队后立即返回运行ID
+    if job:
+        try:
+            run = job_manager.submit(
+                current_app._get_current_object(), workflow_id, input_data, mode, trace_mode, checkpoint, timeout
+            )
+        except JobRejectedError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 429
         return jsonify({
+            'success': True,
+            'run_id': run.id,
+            'status': run.status
+        }), 202
+    
+    # 带检查点的运行在此生成运行ID，失败或超时后客户端可据此恢复运行
+    run_id = uuid.uuid4().hex if checkpoint else None
+    
+    def respond(body, status=200):
+        if run_id:
+            body['run_id'] = run_id
+        return jsonify(body), status
+    
+    try:
+        if mode == 'async':
+            result = asyncio.run(execute_workflow_async(
+                workflow_id, input_data, trace_mode=trace_mode, timeout=timeout
+            ))
+        else:
+            result = execute_workflow(
+                workflow_id, input_data, mode=mode, trace_mode=trace_mode, checkpoint=checkpoint,
+                run_id=run_id, timeout=timeout
+            )
+        return respond({
             'success': True,
             'result': result
         })
+    except WorkflowDeadlineExceededError as e:
+        return respond({
+            'success': False,
+            'error': str(e)
+        }, 504)
+    except BulkheadFullError as e:
+        # 本地并发隔离拒绝了调用，客户端可稍后重试
+        return respond({
+            'success': False,
+            'error': str(e)
+        }, 429)
+    except BulkheadTimeoutError as e:
+        return respond({
+            'success': False,
+            'error': str(e)
+        }, 503)
     except Exception as e:
+        return respond({
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+def format_stream_event(event, data, fmt):
+    """将事件编码为 SSE 或 NDJSON 格式"""
+    if fmt == 'ndjson':
+        return json.dumps({'event': event, 'data': data}, ensure_ascii=False, default=str) + '\n'
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@workflow_bp.route('/<int:workflow_id>/execute/stream', methods=['POST'])
+def stream_workflow_endpoint(workflow_id):
+    """流式执行工作流：每个节点完成后立即推送步骤结果"""
+    input_data = request.json
+    mode = request.args.get('mode', 'sequential')
+    if mode not in EXECUTION_MODES:
+        return jsonify({'error': f"不支持的执行模式: {mode}"}), 400
+    fmt = request.args.get('format', 'sse')
+    if fmt not in ('sse', 'ndjson'):
+        return jsonify({'error': f"不支持的流格式: {fmt}"}), 400
+    trace_mode = request.args.get('trace')
+    if trace_mode and trace_mode not in TRACE_MODES:
+        return jsonify({'error': f"不支持的轨迹模式: {trace_mode}"}), 400
+    timeout = request.args.get('timeout', type=float)
+    if timeout is not None and timeout <= 0:
+        return jsonify({'error': '运行时间预算必须大于0'}), 400
+    
+    try:
+        events = stream_workflow(workflow_id, input_data, mode=mode, trace_mode=trace_mode, timeout=timeout)
+    except ValueError as e:
         return jsonify({
             'success': False,
             'error': str(e)
-        }), 500
+        }), 400
+    
+    def generate():
+        try:
+            for event in events:
+                yield format_stream_event(event['event'], event['data'], fmt)
+        except Exception as e:
+            yield format_stream_event('error', {'error': str(e)}, fmt)
+    
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
-@workflow_bp.route('/<int:workflow_id>/publish', methods=['POST'])
-def publish_workflow(workflow_id):
-    workflow = Workflow.query.get_or_404(workflow_id)
-    workflow.status = 'published'
+@workflow_bp.route('/<int:workflow_id>/execute-batch', methods=['POST'])
+def execute_workflow_batch_endpoint(workflow_id):
+    """批量执行工作流
+
+    请求体为输入列表（JSON数组，或 {"inputs": [...]}），或每行一个输入的NDJSON。
+    每个输入完成后立即推送其结果，order=completion 时按完成顺序推送。
+    """
+    mode = request.args.get('mode', 'sequential')
+    if mode not in EXECUTION_MODES:
+        return jsonify({'error': f"不支持的执行模式: {mode}"}), 400
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('sse', 'ndjson'):
+        return jsonify({'error': f"不支持的流格式: {fmt}"}), 400
+    trace_mode = request.args.get('trace')
+    if trace_mode and trace_mode not in TRACE_MODES:
+        return jsonify({'error': f"不支持的轨迹模式: {trace_mode}"}), 400
+    timeout = request.args.get('timeout', type=float)
+    if timeout is not None and timeout <= 0:
+        return jsonify({'error': '运行时间预算必须大于0'}), 400
+    concurrency = request.args.get('concurrency', type=int)
+    ordered = request.args.get('order', 'input') != 'completion'
     
-    # 更新版本号
-    version_parts = workflow.version.split('.')
-    version_parts[-1] = str(int(version_parts[-1]) + 1)
-    workflow.version = '.'.join(version_parts)
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        inputs = iter_ndjson_inputs(request.stream)
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('inputs')
+        if not isinstance(data, list):
+            return jsonify({'error': '请求体必须是输入列表或NDJSON'}), 400
+        inputs = data
+    
+    try:
+        results = execute_workflow_batch(
+            workflow_id, inputs, mode=mode, concurrency=concurrency,
+            ordered=ordered, trace_mode=trace_mode, timeout=timeout
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     
-    db.session.commit()
+    def generate():
+        total = succeeded = 0
+        try:
+            for item in results:
+                total += 1
+                succeeded += item['success']
+                yield format_stream_event('item', item, fmt)
+        except Exception as e:
+            yield format_stream_event('error', {'error': str(e)}, fmt)
+            return
+        yield format_stream_event('end', {
+            'total': total,
+            'succeeded': succeeded,
+            'failed': total - succeeded
+        }, fmt)
     
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'text/event-stream'
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@workflow_bp.route('/<int:workflow_id>/publish', methods=['POST'])
+def publish_workflow_route(workflow_id):
+    try:
+        workflow = publish_workflow(workflow_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify(workflow.to_dict())
 
+@workflow_bp.route('/runs/<run_id>', methods=['GET'])
+def get_run(run_id):
+    """获取后台运行的状态和已完成的步骤"""
+    run = job_manager.get(run_id)
+    if run is None:
+        return jsonify({'error': '未找到运行'}), 404
+    include_steps = request.args.get('steps', 'true') != 'false'
+    return jsonify(run.to_dict(include_steps=include_steps))
+
+@workflow_bp.route('/runs/<run_id>/cancel', methods=['POST'])
+def cancel_run(run_id):
+    """取消后台运行"""
+    run = job_manager.cancel(run_id)
+    if run is None:
+        return jsonify({'error': '未找到运行'}), 404
+    return jsonify(run.to_dict(include_steps=False))
+
+@workflow_bp.route('/runs/<run_id>/checkpoint', methods=['GET'])
+def get_run_checkpoint(run_id):
+    """获取运行检查点的状态"""
+    try:
+        state = load_checkpoint(run_id)
+    except CheckpointError as e:
+        return jsonify({'error': str(e)}), 404
+    steps = state.pop('steps')
+    state['step_count'] = len(steps)
+    state['last_node_id'] = steps[-1]['node_id'] if steps else None
+    return jsonify(state)
+
+@workflow_bp.route('/runs/<run_id>/resume', methods=['POST'])
+def resume_run(run_id):
+    """从检查点恢复中断的运行"""
+    trace_mode = request.args.get('trace')
+    if trace_mode and trace_mode not in TRACE_MODES:
+        return jsonify({'error': f"不支持的轨迹模式: {trace_mode}"}), 400
+    timeout = request.args.get('timeout', type=float)
+    if timeout is not None and timeout <= 0:
+        return jsonify({'error': '运行时间预算必须大于0'}), 400
+    try:
+        result = resume_workflow(run_id, trace_mode=trace_mode, timeout=timeout)
+    except CheckpointError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except WorkflowDeadlineExceededError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 504
+    except BulkheadFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 429
+    except BulkheadTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+    return jsonify({
+        'success': True,
+        'result': result
+    })
+
+@workflow_bp.route('/trace-blobs/<blob_id>', methods=['GET'])
+def get_trace_blob(blob_id):
+    """获取执行轨迹中溢出到磁盘的载荷"""
+    payload = load_trace_blob(blob_id)
+    if payload is None:
+        return jsonify({'error': '未找到载荷'}), 404
+    return jsonify(payload)
+
+@workflow_bp.route('/runs', methods=['GET'])
+def run_stats():
+    """获取后台运行队列统计"""
+    return jsonify(job_manager.get_stats())
 
+@workflow_bp.route('/engine-stats', methods=['GET'])
+def engine_stats():
+    """获取执行引擎统计"""
+    return jsonify({
+        'plan_cache': get_plan_cache_stats(),
+        'expressions': get_expression_stats(),
+        'decision_tables': get_decision_table_stats(),
+        'transforms': get_transform_stats(),
+        'transport': get_transport_stats(),
+        'lpi_modules': get_lpi_module_stats(),
+        'lpi_results': lpi_result_cache.get_stats(),
+        'lpi_process_pool': lpi_process_pool.get_stats(),
+        'breakers': get_breaker_stats(),
+        'bulkheads': get_bulkhead_stats(),
+        'jobs': job_manager.get_stats(),
+        'checkpoints': checkpoint_writer.get_stats(),
+        'tracing': span_processor.get_stats()
+    })
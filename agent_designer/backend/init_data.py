@@ -11,7 +11,8 @@ from flask import Flask
 from config import Config
 from models import db
 from models.component import Component
-from models.workflow import Workflow
+from models.workflow import Workflow, AgentPublishedWorkflow
+from services.agent_index import rebuild_agent_pointers
 
 def create_app():
     app = Flask(__name__)
@@ -25,6 +26,7 @@ def init_db(app):
         db.create_all()
         
         # 删除所有表数据
+        db.session.query(AgentPublishedWorkflow).delete()
         db.session.query(Component).delete()
         db.session.query(Workflow).delete()
         db.session.commit()
@@ -428,6 +430,13 @@ def create_scenario_agents(app, expert_agents):
             
         return created_agents
 
+# 重建Agent发布工作流指针表
+def create_agent_pointers(app):
+    with app.app_context():
+        count = rebuild_agent_pointers()
+        db.session.commit()
+        print(f"重建Agent发布工作流指针: {count}个")
+
 def main():
     app = create_app()
     
@@ -447,6 +456,9 @@ def main():
     # 创建场景Agent组件
     scenario_agents = create_scenario_agents(app, expert_agents)
     
+    # 重建Agent发布工作流指针表
+    create_agent_pointers(app)
+    
     print("初始化数据完成")
     print(f"数据库文件路径: {db_path}")
 
@@ -1,3 +1,21 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 
-db = SQLAlchemy() 
\ No newline at end of file
+db = SQLAlchemy()
+
+def upgrade_schema():
+    """为已有的表补充模型中新增的列
+
+    db.create_all 只创建不存在的表，不会修改已有的表。新增的列都允许为空，
+    直接追加即可。
+    """
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                db.session.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+    db.session.commit()
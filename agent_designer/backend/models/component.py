@@ -62,7 +62,13 @@ class Component(db.Model):
             'method': content.get('method', ''),
             'input_params': content.get('input_params', []),
             'output_params': content.get('output_params', []),
-            'examples': content.get('examples', [])
+            'examples': content.get('examples', []),
+            'cacheable': content.get('cacheable', False),  # 结果只由输入决定时可缓存
+            'cache_ttl': content.get('cache_ttl'),  # 缓存有效期（秒），为空时使用默认值
+            'execution': content.get('execution', 'thread'),  # Python LPI的执行方式：thread 或 process
+            'timeout': content.get('timeout'),  # 单次调用超时（秒），为空时使用默认值
+            'resilience': content.get('resilience', {}),  # 重试和熔断策略
+            'bulkhead': content.get('bulkhead', {})  # 并发隔离：max_in_flight、max_queue、queue_timeout、scope
         }
     
     def get_agent_details(self):
@@ -13,6 +13,7 @@ class Workflow(db.Model):
     edges = db.Column(db.Text)  # JSON存储连接
     status = db.Column(db.String(20), default='draft')  # draft, published
     version = db.Column(db.String(20), default='1.0.0')
+    compiled_plan = db.Column(db.LargeBinary)  # 发布时编译的执行计划
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
@@ -49,6 +50,7 @@ class Workflow(db.Model):
             'edges': self.edges_obj,
             'status': self.status,
             'version': self.version,
+            'compiled': self.compiled_plan is not None,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -89,4 +91,16 @@ class Workflow(db.Model):
         for node in self.nodes_obj:
             if node.get('type') == 'end':
                 end_nodes.append(node)
-        return end_nodes 
\ No newline at end of file
+        return end_nodes
+
+class AgentPublishedWorkflow(db.Model):
+    """Agent当前发布工作流的指针，发布时维护"""
+    __tablename__ = 'agent_published_workflows'
+    
+    agent_id = db.Column(db.Integer, db.ForeignKey('components.id'), primary_key=True)
+    workflow_id = db.Column(db.Integer, db.ForeignKey('workflows.id'), nullable=False)
+    version = db.Column(db.String(20))
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f'<AgentPublishedWorkflow {self.agent_id} -> {self.workflow_id}>'
@@ -0,0 +1,94 @@
+import threading
+from models import db
+from models.workflow import Workflow, AgentPublishedWorkflow
+
+# 进程内缓存：agent_id -> (workflow_id, version)，没有已发布工作流时为 None
+_pointer_cache = {}
+_pointer_cache_lock = threading.Lock()
+
+def parse_version(version):
+    """将版本号解析为可比较的元组，按语义版本比较（1.0.10 > 1.0.9）"""
+    parts = []
+    for part in str(version or '').split('.'):
+        # 数字段按数值比较，非数字段排在数字段之前
+        parts.append((1, int(part), '') if part.isdigit() else (0, 0, part))
+    return tuple(parts)
+
+def _latest_published(agent_id):
+    """从已发布的工作流中按语义版本选出最新的一个"""
+    workflows = Workflow.query.filter_by(agent_id=agent_id, status='published').all()
+    if not workflows:
+        return None
+    return max(workflows, key=lambda w: parse_version(w.version))
+
+def refresh_agent_pointer(agent_id):
+    """重新计算Agent当前发布的工作流并更新指针
+
+    在发布、修改或删除工作流时调用。调用方负责提交事务，并在提交后调用
+    invalidate_agent_pointer 使进程内缓存失效。
+    """
+    if not agent_id:
+        return None
+
+    latest = _latest_published(agent_id)
+    pointer = db.session.get(AgentPublishedWorkflow, agent_id)
+    if latest is None:
+        if pointer is not None:
+            db.session.delete(pointer)
+    elif pointer is None:
+        db.session.add(AgentPublishedWorkflow(agent_id=agent_id, workflow_id=latest.id, version=latest.version))
+    else:
+        pointer.workflow_id = latest.id
+        pointer.version = latest.version
+
+    return latest
+
+def rebuild_agent_pointers():
+    """按已发布的工作流重建整个指针表并清空进程内缓存
+
+    用于批量导入或重新初始化工作流数据之后。调用方负责提交事务。
+    """
+    AgentPublishedWorkflow.query.delete()
+    agent_ids = {
+        agent_id for agent_id, in
+        db.session.query(Workflow.agent_id).filter(Workflow.status == 'published', Workflow.agent_id.isnot(None)).distinct()
+    }
+    for agent_id in agent_ids:
+        refresh_agent_pointer(agent_id)
+    with _pointer_cache_lock:
+        _pointer_cache.clear()
+    return len(agent_ids)
+
+def invalidate_agent_pointer(agent_id):
+    """使Agent指针的进程内缓存失效"""
+    with _pointer_cache_lock:
+        _pointer_cache.pop(agent_id, None)
+
+def get_published_workflow_pointers(agent_ids):
+    """批量获取Agent当前发布的工作流，返回 {agent_id: (workflow_id, version) 或 None}
+
+    优先使用进程内缓存，未命中的Agent一次查询指针表；尚未建立指针的Agent
+    （发布于指针表引入之前）退化为按语义版本计算。
+    """
+    result = {}
+    missing = []
+    for agent_id in agent_ids:
+        if agent_id in _pointer_cache:
+            result[agent_id] = _pointer_cache[agent_id]
+        else:
+            missing.append(agent_id)
+    if not missing:
+        return result
+
+    loaded = {}
+    for pointer in AgentPublishedWorkflow.query.filter(AgentPublishedWorkflow.agent_id.in_(missing)).all():
+        loaded[pointer.agent_id] = (pointer.workflow_id, pointer.version)
+    for agent_id in missing:
+        if agent_id not in loaded:
+            latest = _latest_published(agent_id)
+            loaded[agent_id] = (latest.id, latest.version) if latest else None
+
+    with _pointer_cache_lock:
+        _pointer_cache.update(loaded)
+    result.update(loaded)
+    return result
@@ -0,0 +1,276 @@
+import asyncio
+import contextvars
+import inspect
+import json
+from models.workflow import Workflow
+from services import lpi_transport
+from services.execution_snapshot import build_execution_snapshot
+from services.execution_trace import ExecutionTrace
+from services.lpi_result_cache import lpi_result_cache
+from services.metrics import RunTimer, NodeTimer, count_lpi_call
+from services.tracing import node_span
+from services.run_context import RunContext, WorkflowCancelledError, WorkflowDeadlineExceededError
+from services.resilience import (
+    LpiCallError, call_with_resilience_async, lpi_breaker_key, external_breaker_key
+)
+from services.workflow_service import (
+    load_python_lpi_function, call_lpi_in_process, execute_common_node, get_next_node,
+    lpi_resilience_policy, external_resilience_policy, lpi_bulkhead, run_timeout, run_span, agent_span,
+    python_lpi_span
+)
+from services.bulkhead import resolve_bulkhead
+
+# 异步运行检查取消信号的间隔（秒）
+CANCEL_POLL_INTERVAL = 0.05
+
+async def execute_workflow_async(workflow_id, input_data, cancel_event=None, trace_mode=None, timeout=None):
+    """异步执行工作流
+
+    REST类型的LPI和外部调用以非阻塞方式等待；协程类型的Python LPI直接await，
+    普通函数放到线程池中执行，不阻塞事件循环。超过时间预算或被取消时，正在
+    等待的调用立即被中断。
+    """
+    workflow = Workflow.query.get_or_404(workflow_id)
+    trace = ExecutionTrace(trace_mode)
+    context = RunContext(build_execution_snapshot(workflow), cancel_event, run_timeout(timeout))
+
+    # 嵌套Agent工作流复用顶层运行打开的HTTP会话
+    async with lpi_transport.async_session():
+        plan = context.snapshot.root_plan
+        with RunTimer(workflow.id, 'async'), run_span(plan, 'async') as span:
+            result = await run_with_context(run_workflow_plan_async(plan, input_data, context, trace), context)
+        if span.trace_id:
+            result['trace_id'] = span.trace_id
+        return result
+
+async def run_with_context(coro, context):
+    """在运行的时间预算内执行协程，运行被取消或超时时中断协程并抛出相应异常"""
+    task = asyncio.ensure_future(coro)
+
+    async def watch_cancel():
+        while not context.cancelled:
+            await asyncio.sleep(CANCEL_POLL_INTERVAL)
+
+    watcher = asyncio.ensure_future(watch_cancel())
+    try:
+        done, _ = await asyncio.wait(
+            {task, watcher}, timeout=context.remaining(), return_when=asyncio.FIRST_COMPLETED
+        )
+        if task in done:
+            return task.result()
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    context.check()
+    raise WorkflowDeadlineExceededError("工作流运行超时")
+
+async def run_workflow_plan_async(plan, input_data, context, trace=None):
+    """按执行计划异步运行工作流
+
+    trace 为 None 时（嵌套的Agent工作流）不记录执行轨迹，只返回最终结果。
+    """
+    # 获取开始节点
+    start_node = plan.start_node
+    if not start_node:
+        raise ValueError("工作流没有开始节点")
+
+    # 执行结果
+    result = {
+        'workflow_id': plan.workflow_id,
+        'workflow_name': plan.name,
+        'steps': trace.steps if trace else [],
+        'final_result': None
+    }
+
+    # 当前节点和数据
+    current_node = start_node
+    current_data = input_data
+
+    while current_node:
+        context.check()
+
+        # 执行当前节点
+        with NodeTimer(plan, current_node) as timer, node_span(plan, current_node):
+            node_result = await execute_node_async(current_node, current_data, context)
+
+        # 记录步骤
+        if trace:
+            trace.record({
+                'node_id': current_node.get('id'),
+                'node_name': current_node.get('data', {}).get('name', '未命名节点'),
+                'node_type': current_node.get('type'),
+                'input': current_data,
+                'output': node_result,
+                'duration_ms': round(timer.elapsed * 1000, 3)
+            })
+
+        # 更新当前数据
+        current_data = node_result
+
+        # 如果是结束节点，则结束执行
+        if current_node.get('type') == 'end':
+            result['final_result'] = current_data
+            break
+
+        # 获取下一个节点
+        current_node = get_next_node(plan, current_node.get('id'), current_data)
+
+    if trace:
+        result['trace'] = trace.to_dict()
+    return result
+
+async def execute_node_async(node, input_data, context):
+    """异步执行节点"""
+    node_type = node.get('type')
+    node_data = node.get('data', {})
+
+    # 执行LPI节点
+    if node_type == 'lpi':
+        return await execute_lpi_node_async(node_data, input_data, context)
+
+    # 执行Agent节点
+    if node_type == 'agent':
+        plan = context.snapshot.get_agent_plan(node_data.get('component_id'))
+        with agent_span(node_data, plan):
+            result = await run_workflow_plan_async(plan, input_data, context)
+        return result.get('final_result')
+
+    # 执行通用组件节点，只有外部调用需要等待网络
+    if node_type == 'common':
+        common_details = context.snapshot.get_component(node_data.get('component_id'), 'common')
+        config = common_details.get('config', {})
+        if common_details.get('component_subtype') == 'executor' and config.get('executor_type') == 'external':
+            return await execute_external_executor_async(config, input_data, context)
+        return execute_common_node(node_data, input_data, context)
+
+    # 开始、结束、汇聚及未知类型节点直接透传
+    return input_data
+
+async def execute_lpi_node_async(node_data, input_data, context):
+    """异步执行LPI节点，声明可缓存的LPI优先使用缓存的结果"""
+    lpi_details = context.snapshot.get_component(node_data.get('component_id'), 'lpi')
+
+    cache_key = lpi_result_cache.make_key(lpi_details, input_data)
+    if cache_key is not None:
+        hit, result = lpi_result_cache.get(cache_key)
+        if hit:
+            count_lpi_call(lpi_details, 'cache_hit')
+            return result
+
+    bulkhead = lpi_bulkhead(lpi_details)
+
+    # 每次尝试前检查运行是否已取消或超时，调用超时不超过剩余的时间预算
+    async def attempt():
+        context.check()
+        try:
+            result = await call_lpi_async(lpi_details, input_data, context.call_timeout(lpi_details.get('timeout')))
+        except Exception:
+            count_lpi_call(lpi_details, 'error')
+            # 因时间预算耗尽而失败的调用按运行超时报告，不计为下游故障
+            context.check()
+            raise
+        count_lpi_call(lpi_details, 'success')
+        return result
+
+    async def call():
+        if bulkhead is None:
+            return await attempt()
+        return await bulkhead.run_async(attempt, context.call_timeout())
+
+    result = await call_with_resilience_async(
+        lpi_breaker_key(lpi_details.get('id')), lpi_resilience_policy(lpi_details), call, context
+    )
+
+    if cache_key is not None:
+        lpi_result_cache.put(cache_key, result, lpi_details.get('cache_ttl'))
+    return result
+
+async def call_lpi_async(lpi_details, input_data, timeout=None):
+    """异步调用LPI，timeout 为空时使用LPI配置的超时"""
+    api_type = lpi_details.get('api_type')
+    if timeout is None:
+        timeout = lpi_details.get('timeout')
+
+    # REST API
+    if api_type == 'rest':
+        endpoint = lpi_details.get('endpoint')
+        method = lpi_details.get('method', 'POST').lower()
+
+        status_code, text = await lpi_transport.request_async(
+            method, endpoint, input_data, timeout=timeout
+        )
+        if status_code != 200:
+            raise LpiCallError(f"API调用失败: {status_code} - {text}", status_code)
+
+        return json.loads(text)
+
+    # Python API
+    elif api_type == 'python':
+        loop = asyncio.get_running_loop()
+        if lpi_details.get('execution') == 'process':
+            # call_lpi_in_process 自行记录span，在线程池中执行时没有当前span，需要复制上下文
+            return await loop.run_in_executor(
+                None, contextvars.copy_context().run, call_lpi_in_process, lpi_details, input_data, timeout
+            )
+
+        with python_lpi_span(lpi_details):
+            function = load_python_lpi_function(lpi_details)
+            if inspect.iscoroutinefunction(function):
+                return await function(input_data)
+
+            # 阻塞函数放到线程池中执行
+            return await loop.run_in_executor(None, function, input_data)
+
+    else:
+        raise ValueError(f"不支持的API类型: {api_type}")
+
+async def execute_external_executor_async(config, input_data, context):
+    """异步执行外部调用执行器"""
+    url = config.get('url')
+
+    if not url:
+        return input_data
+
+    bulkhead = resolve_bulkhead(f"external:{url}", url, config.get('bulkhead'))
+
+    async def attempt():
+        context.check()
+        try:
+            return await call_external_async(config, input_data, context.call_timeout(config.get('timeout')))
+        except Exception:
+            context.check()
+            raise
+
+    async def call():
+        if bulkhead is None:
+            return await attempt()
+        return await bulkhead.run_async(attempt, context.call_timeout())
+
+    try:
+        return await call_with_resilience_async(
+            external_breaker_key(url), external_resilience_policy(config), call, context
+        )
+    except WorkflowCancelledError:
+        raise
+    except Exception:
+        # 配置为透传时调用失败返回原输入，否则向上抛出错误
+        if config.get('on_error') == 'passthrough':
+            return input_data
+        raise
+
+async def call_external_async(config, input_data, timeout=None):
+    """异步调用外部服务，timeout 为空时使用配置的超时"""
+    url = config.get('url')
+    method = config.get('method', 'POST').lower()
+    if timeout is None:
+        timeout = config.get('timeout')
+    status_code, text = await lpi_transport.request_async(method, url, input_data, timeout=timeout)
+    if status_code != 200:
+        raise LpiCallError(f"外部调用失败: {status_code} - {text}", status_code)
+    return json.loads(text)
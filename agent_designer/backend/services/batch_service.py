@@ -0,0 +1,95 @@
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config import Config
+from models.workflow import Workflow
+from services.execution_snapshot import build_execution_snapshot
+from services.execution_trace import ExecutionTrace
+from services.run_context import RunContext
+from services.workflow_service import run_workflow_plan, run_timeout
+
+class InvalidBatchInput:
+    """无法解析的批量输入项，作为失败项返回而不中断整个批次"""
+
+    def __init__(self, error):
+        self.error = error
+
+def iter_ndjson_inputs(lines):
+    """逐行解析NDJSON输入，空行跳过，无法解析的行产出 InvalidBatchInput"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield InvalidBatchInput(f"输入不是有效的JSON: {e}")
+
+def execute_workflow_batch(workflow_id, inputs, mode='sequential', concurrency=None, ordered=True, trace_mode=None,
+                           timeout=None):
+    """批量执行工作流
+
+    所有输入共享一次加载的执行计划和组件快照，每个输入是一次独立的运行，
+    单个输入失败不影响其他输入。同时执行的运行数不超过 concurrency，输入按需
+    读取，不必一次载入全部输入。
+
+    返回结果生成器：每项为 {'index', 'success', 'result' 或 'error'}。ordered 为
+    True 时按输入顺序产出，否则按完成顺序产出。timeout 为每个输入单独的时间预算。
+    """
+    concurrency = max(1, min(concurrency or Config.WORKFLOW_BATCH_CONCURRENCY, Config.WORKFLOW_BATCH_MAX_CONCURRENCY))
+    # 校验轨迹模式
+    ExecutionTrace(trace_mode, retain=False)
+    workflow = Workflow.query.get_or_404(workflow_id)
+    snapshot = build_execution_snapshot(workflow)
+    plan = snapshot.root_plan
+    if not plan.start_node:
+        raise ValueError("工作流没有开始节点")
+    if mode == 'dag':
+        # 存在环时整个批次不能按DAG模式执行，在读取输入前拒绝
+        plan.get_dag_info()
+
+    # 批次的取消范围只在客户端断开时取消；每个输入在各自的子范围中运行，
+    # 一个输入失败（如DAG节点失败）只取消它自己的运行
+    batch_context = RunContext(snapshot)
+
+    def run_item(index, input_data):
+        if isinstance(input_data, InvalidBatchInput):
+            return {'index': index, 'success': False, 'error': input_data.error}
+        context = batch_context.child(run_timeout(timeout))
+        try:
+            result = run_workflow_plan(plan, input_data, context, mode, trace=ExecutionTrace(trace_mode))
+        except Exception as e:
+            return {'index': index, 'success': False, 'error': str(e)}
+        return {'index': index, 'success': True, 'result': result}
+
+    def results():
+        items = enumerate(inputs)
+        running = deque()
+        exhausted = False
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='workflow-batch')
+        try:
+            while True:
+                while not exhausted and len(running) < concurrency:
+                    item = next(items, None)
+                    if item is None:
+                        exhausted = True
+                        break
+                    running.append(executor.submit(run_item, *item))
+                if not running:
+                    break
+
+                if ordered:
+                    yield running.popleft().result()
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.remove(future)
+                    yield future.result()
+        finally:
+            # 客户端断开时取消尚未开始的运行，正在执行的运行在下一个节点前结束
+            batch_context.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return results()
@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from config import Config
+
+class BulkheadError(Exception):
+    """隔离舱拒绝了调用（本地限流，不代表下游故障）"""
+    pass
+
+class BulkheadFullError(BulkheadError):
+    """等待队列已满"""
+    pass
+
+class BulkheadTimeoutError(BulkheadError):
+    """在等待队列中超时"""
+    pass
+
+class _ThreadWaiter:
+    """同步调用方的等待者"""
+
+    def __init__(self):
+        self.granted = False
+        self._event = threading.Event()
+
+    def grant(self):
+        self.granted = True
+        self._event.set()
+
+    def wait(self, timeout):
+        return self._event.wait(timeout)
+
+class _AsyncWaiter:
+    """异步调用方的等待者，可在其他线程中唤醒"""
+
+    def __init__(self, loop):
+        self.granted = False
+        self._loop = loop
+        self.future = loop.create_future()
+
+    def grant(self):
+        self.granted = True
+        self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+class Bulkhead:
+    """调用隔离舱
+
+    同时进行的调用数不超过 max_in_flight，超出的调用按先来后到排队，队列长度
+    不超过 max_queue；排队超过 queue_timeout 秒的调用以 BulkheadTimeoutError 失败。
+    同步和异步调用方共用同一组名额。
+    """
+
+    def __init__(self, key, max_in_flight, max_queue, queue_timeout):
+        self.key = key
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+        self._stats = {'acquired': 0, 'queued': 0, 'rejected': 0, 'timeouts': 0, 'max_in_flight_seen': 0, 'wait_seconds': 0.0}
+
+    def configure(self, max_in_flight, max_queue, queue_timeout):
+        """更新限额，提高并发上限时立即放行排队的调用"""
+        with self._lock:
+            self.max_in_flight = max_in_flight
+            self.max_queue = max_queue
+            self.queue_timeout = queue_timeout
+            while self._waiters and self.in_flight < self.max_in_flight:
+                self._grant_next()
+
+    def _grant_next(self):
+        """将一个名额交给队首的等待者（调用方持有锁）"""
+        self.in_flight += 1
+        self._note_acquired()
+        self._waiters.popleft().grant()
+
+    def _note_acquired(self):
+        self._stats['acquired'] += 1
+        self._stats['max_in_flight_seen'] = max(self._stats['max_in_flight_seen'], self.in_flight)
+
+    def _try_acquire(self, waiter_factory):
+        """尝试直接获得名额；需要排队时返回等待者（调用方持有锁）"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._note_acquired()
+            return None
+        if len(self._waiters) >= self.max_queue:
+            self._stats['rejected'] += 1
+            raise BulkheadFullError(f"并发调用已达上限且等待队列已满: {self.key}")
+        waiter = waiter_factory()
+        self._waiters.append(waiter)
+        self._stats['queued'] += 1
+        return waiter
+
+    def _abandon(self, waiter, waited):
+        """等待结束但未使用名额：已获得名额则归还，否则退出队列（调用方持有锁）"""
+        self._stats['wait_seconds'] += waited
+        if waiter.granted:
+            self._release_locked()
+        else:
+            self._waiters.remove(waiter)
+
+    def _wait_timeout(self, timeout):
+        """排队等待的时间上限，不超过调用方剩余的时间"""
+        if timeout is None:
+            return self.queue_timeout
+        return min(self.queue_timeout, timeout)
+
+    def acquire(self, timeout=None):
+        """同步获取名额"""
+        with self._lock:
+            waiter = self._try_acquire(_ThreadWaiter)
+        if waiter is None:
+            return
+        started = time.monotonic()
+        waiter.wait(self._wait_timeout(timeout))
+        with self._lock:
+            self._stats['wait_seconds'] += time.monotonic() - started
+            if waiter.granted:
+                return
+            self._waiters.remove(waiter)
+            self._stats['timeouts'] += 1
+        raise BulkheadTimeoutError(f"等待调用名额超时: {self.key}")
+
+    async def acquire_async(self, timeout=None):
+        """异步获取名额"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            waiter = self._try_acquire(lambda: _AsyncWaiter(loop))
+        if waiter is None:
+            return
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self._wait_timeout(timeout))
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._stats['wait_seconds'] += time.monotonic() - started
+                if waiter.granted:
+                    return
+                self._waiters.remove(waiter)
+                self._stats['timeouts'] += 1
+            raise BulkheadTimeoutError(f"等待调用名额超时: {self.key}")
+        except BaseException:
+            # 运行被取消，不再需要名额
+            with self._lock:
+                self._abandon(waiter, time.monotonic() - started)
+            raise
+        with self._lock:
+            self._stats['wait_seconds'] += time.monotonic() - started
+
+    def _release_locked(self):
+        if self._waiters and self.in_flight <= self.max_in_flight:
+            # 名额直接交给队首的等待者
+            self.in_flight -= 1
+            self._grant_next()
+        else:
+            self.in_flight -= 1
+
+    def release(self):
+        """归还名额"""
+        with self._lock:
+            self._release_locked()
+
+    def run(self, func, timeout=None):
+        """占用一个名额执行 func，timeout 限制排队等待的时间"""
+        self.acquire(timeout)
+        try:
+            return func()
+        finally:
+            self.release()
+
+    async def run_async(self, func, timeout=None):
+        """占用一个名额执行协程函数 func，timeout 限制排队等待的时间"""
+        await self.acquire_async(timeout)
+        try:
+            return await func()
+        finally:
+            self.release()
+
+    def to_dict(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                in_flight=self.in_flight,
+                waiting=len(self._waiters),
+                max_in_flight=self.max_in_flight,
+                max_queue=self.max_queue,
+                queue_timeout=self.queue_timeout
+            )
+
+# 进程内共享的隔离舱：key -> Bulkhead
+_bulkheads = {}
+_bulkheads_lock = threading.Lock()
+
+def get_bulkhead(key, options):
+    """获取隔离舱，限额随配置更新"""
+    max_in_flight = int(options.get('max_in_flight') or 0)
+    if max_in_flight <= 0:
+        return None
+    max_queue = int(options.get('max_queue', Config.LPI_BULKHEAD_MAX_QUEUE))
+    queue_timeout = float(options.get('queue_timeout', Config.LPI_BULKHEAD_QUEUE_TIMEOUT))
+    with _bulkheads_lock:
+        bulkhead = _bulkheads.get(key)
+        if bulkhead is None:
+            bulkhead = _bulkheads[key] = Bulkhead(key, max_in_flight, max_queue, queue_timeout)
+            return bulkhead
+    if (bulkhead.max_in_flight, bulkhead.max_queue, bulkhead.queue_timeout) != (max_in_flight, max_queue, queue_timeout):
+        bulkhead.configure(max_in_flight, max_queue, queue_timeout)
+    return bulkhead
+
+def resolve_bulkhead(owner_key, url, options):
+    """确定调用使用的隔离舱
+
+    options 为LPI或外部调用配置中的 bulkhead 字段，scope 为 host 时按主机共享，
+    否则由该LPI独占。按主机共享时以 Config.LPI_HOST_BULKHEADS 中该主机的配置为
+    基础，options 中给出的限额覆盖对应的项。没有任何限额时返回 None，不限制并发。
+    """
+    host = urlsplit(url).netloc if url else None
+    if options and options.get('scope') != 'host':
+        return get_bulkhead(owner_key, options)
+    if host:
+        host_options = dict(Config.LPI_HOST_BULKHEADS.get(host) or {}, **(options or {}))
+        if host_options:
+            return get_bulkhead(f"host:{host}", host_options)
+    return None
+
+def get_bulkhead_stats():
+    """获取所有隔离舱的状态"""
+    with _bulkheads_lock:
+        bulkheads = list(_bulkheads.values())
+    return {bulkhead.key: bulkhead.to_dict() for bulkhead in bulkheads}
@@ -0,0 +1,195 @@
+import contextlib
+import json
+import os
+import queue
+import re
+import threading
+import uuid
+from datetime import datetime
+from config import Config
+
+_RUN_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+class CheckpointError(ValueError):
+    """检查点不存在或无法用于恢复运行"""
+    pass
+
+def _checkpoint_path(run_id):
+    if not _RUN_ID_PATTERN.match(run_id or ''):
+        raise CheckpointError(f"无效的运行ID: {run_id}")
+    return os.path.join(Config.CHECKPOINT_DIR, run_id + '.jsonl')
+
+class CheckpointWriter:
+    """检查点的后台写入线程
+
+    记录先进入内存队列，由写入线程批量追加到各运行的检查点文件，步骤执行不等待
+    磁盘写入。进程异常退出时最多丢失最后一批尚未写入的记录，恢复时这些步骤会
+    重新执行。
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'records': 0, 'batches': 0, 'errors': 0}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    os.makedirs(Config.CHECKPOINT_DIR, exist_ok=True)
+                    self._thread = threading.Thread(target=self._run, name='checkpoint-writer', daemon=True)
+                    self._thread.start()
+
+    def append(self, run_id, record):
+        """追加一条记录"""
+        self._ensure_started()
+        self._queue.put((run_id, json.dumps(record, ensure_ascii=False, default=str)))
+
+    def flush(self):
+        """等待已提交的记录全部写入"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception:
+                self._stats['errors'] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        """按运行分组追加记录"""
+        lines = {}
+        for run_id, line in batch:
+            lines.setdefault(run_id, []).append(line)
+        for run_id, run_lines in lines.items():
+            with open(_checkpoint_path(run_id), 'a', encoding='utf-8') as f:
+                f.write('\n'.join(run_lines) + '\n')
+                f.flush()
+                if Config.CHECKPOINT_FSYNC:
+                    os.fsync(f.fileno())
+        self._stats['records'] += len(batch)
+        self._stats['batches'] += 1
+
+    def get_stats(self):
+        return dict(self._stats, pending=self._queue.qsize())
+
+checkpoint_writer = CheckpointWriter(Config.CHECKPOINT_BATCH_SIZE)
+
+# 当前进程中正在执行（写入检查点）的运行
+_active_runs = set()
+_active_lock = threading.Lock()
+
+class RunCheckpoint:
+    """一次运行的检查点记录器"""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        _checkpoint_path(self.run_id)
+
+    @contextlib.contextmanager
+    def claim(self):
+        """标记运行正在执行，防止同一运行被并发恢复"""
+        with _active_lock:
+            if self.run_id in _active_runs:
+                raise CheckpointError(f"运行正在执行中: {self.run_id}")
+            _active_runs.add(self.run_id)
+        try:
+            yield self
+        finally:
+            with _active_lock:
+                _active_runs.discard(self.run_id)
+
+    def start(self, plan, input_data, mode):
+        checkpoint_writer.append(self.run_id, {
+            'type': 'start',
+            'workflow_id': plan.workflow_id,
+            'workflow_version': plan.version,
+            'workflow_updated_at': plan.updated_at.isoformat() if plan.updated_at else None,
+            'mode': mode,
+            'input': input_data,
+            'time': datetime.now().isoformat()
+        })
+
+    def resume(self, step_count):
+        # 进程异常退出时最后一行可能不完整，先补齐换行，避免与新记录连在一起
+        checkpoint_writer.flush()
+        with open(_checkpoint_path(self.run_id), 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        checkpoint_writer.append(self.run_id, {
+            'type': 'resume',
+            'step_count': step_count,
+            'time': datetime.now().isoformat()
+        })
+
+    def record_step(self, step):
+        """记录已完成的步骤（输入即上一步的输出，不重复保存）"""
+        checkpoint_writer.append(self.run_id, {
+            'type': 'step',
+            'node_id': step['node_id'],
+            'node_name': step['node_name'],
+            'node_type': step['node_type'],
+            'output': step['output'],
+            'duration_ms': step.get('duration_ms')
+        })
+
+    def finish(self, status, final_result=None, error=None):
+        """记录运行结束并等待检查点写入完成"""
+        checkpoint_writer.append(self.run_id, {
+            'type': 'end',
+            'status': status,
+            'final_result': final_result,
+            'error': error,
+            'time': datetime.now().isoformat()
+        })
+        checkpoint_writer.flush()
+
+def load_checkpoint(run_id):
+    """读取运行的检查点
+
+    返回 {'run_id', 'workflow_id', 'workflow_version', 'workflow_updated_at', 'mode',
+    'input', 'steps', 'status', 'final_result', 'error'}；末尾不完整的记录被忽略。
+    """
+    path = _checkpoint_path(run_id)
+    checkpoint_writer.flush()
+    if not os.path.exists(path):
+        raise CheckpointError(f"未找到运行的检查点: {run_id}")
+
+    state = {'run_id': run_id, 'steps': [], 'status': 'interrupted', 'final_result': None, 'error': None}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            record_type = record.pop('type', None)
+            if record_type == 'start':
+                state.update(record)
+            elif record_type == 'step':
+                state['steps'].append(record)
+            elif record_type == 'resume':
+                state['status'] = 'interrupted'
+                state['error'] = None
+            elif record_type == 'end':
+                state['status'] = record['status']
+                state['final_result'] = record.get('final_result')
+                state['error'] = record.get('error')
+    if 'workflow_id' not in state:
+        raise CheckpointError(f"检查点不完整: {run_id}")
+    state.pop('time', None)
+    return state
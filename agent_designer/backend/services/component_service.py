@@ -1,5 +1,9 @@
 from models.component import Component
 from models import db
+from services.expression_engine import validate_expression, ExpressionError
+from services.transform_engine import validate_transform_config, PathError
+from services.lpi_result_cache import lpi_result_cache
+from services.resilience import reset_breaker, lpi_breaker_key
 import json
 import os
 from pathlib import Path
@@ -361,7 +365,13 @@ def create_lpi(data):
         'method': data.get('method'),
         'input_params': data.get('input_params', []),
         'output_params': data.get('output_params', []),
-        'examples': data.get('examples', [])
+        'examples': data.get('examples', []),
+        'cacheable': bool(data.get('cacheable', False)),
+        'cache_ttl': data.get('cache_ttl'),
+        'execution': data.get('execution', 'thread'),
+        'timeout': data.get('timeout'),
+        'resilience': data.get('resilience', {}),
+        'bulkhead': data.get('bulkhead', {})
     }
     
     lpi.content_obj = content
@@ -391,11 +401,21 @@ def update_lpi(component_id, data):
     content['input_params'] = data.get('input_params', content.get('input_params', []))
     content['output_params'] = data.get('output_params', content.get('output_params', []))
     content['examples'] = data.get('examples', content.get('examples', []))
+    content['cacheable'] = bool(data.get('cacheable', content.get('cacheable', False)))
+    content['cache_ttl'] = data.get('cache_ttl', content.get('cache_ttl'))
+    content['execution'] = data.get('execution', content.get('execution', 'thread'))
+    content['timeout'] = data.get('timeout', content.get('timeout'))
+    content['resilience'] = data.get('resilience', content.get('resilience', {}))
+    content['bulkhead'] = data.get('bulkhead', content.get('bulkhead', {}))
     
     lpi.content_obj = content
     
     db.session.commit()
     
+    # 组件变化后之前缓存的调用结果和熔断状态不再有效
+    lpi_result_cache.invalidate_component(lpi.id)
+    reset_breaker(lpi_breaker_key(lpi.id))
+    
     return lpi
 
 def create_agent(data):
@@ -446,6 +466,21 @@ def update_agent(component_id, data):
     
     return agent
 
+def validate_common_config(component_subtype, config):
+    """校验通用组件配置中的条件表达式和转换路径"""
+    if component_subtype == 'executor' and config.get('executor_type') == 'transform':
+        try:
+            validate_transform_config(config)
+        except PathError as e:
+            raise ValueError(f"转换配置无效: {e}")
+        return
+    if component_subtype != 'condition' or config.get('condition_type') != 'complex':
+        return
+    try:
+        validate_expression(config.get('expression') or '')
+    except ExpressionError as e:
+        raise ValueError(f"条件表达式无效: {e}")
+
 def create_common_component(data):
     """创建通用组件"""
     component = Component(
@@ -461,6 +496,7 @@ def create_common_component(data):
         'component_subtype': data.get('component_subtype'),  # condition, executor
         'config': data.get('config', {})
     }
+    validate_common_config(content['component_subtype'], content['config'])
     
     component.content_obj = content
     
@@ -485,6 +521,7 @@ def update_common_component(component_id, data):
     content = component.content_obj
     content['component_subtype'] = data.get('component_subtype', content.get('component_subtype'))
     content['config'] = data.get('config', content.get('config', {}))
+    validate_common_config(content['component_subtype'], content['config'])
     
     component.content_obj = content
     
@@ -497,4 +534,6 @@ def delete_component(component_id):
     component = Component.query.get_or_404(component_id)
     db.session.delete(component)
     db.session.commit()
+    if component.component_type == 'lpi':
+        lpi_result_cache.invalidate_component(component_id)
     return True 
\ No newline at end of file
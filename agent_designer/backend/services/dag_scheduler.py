@@ -0,0 +1,171 @@
+import contextvars
+import time
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+def merge_upstream_outputs(node, upstream_outputs):
+    """合并上游节点的输出
+
+    upstream_outputs 为按入边顺序排列的 (源节点ID, 输出) 列表。
+    汇聚节点支持两种合并方式：merge 将字典输出依次合并，collect 按源节点ID收集。
+    """
+    if len(upstream_outputs) == 1:
+        return upstream_outputs[0][1]
+
+    merge_mode = (node.get('data') or {}).get('merge', 'merge')
+    if merge_mode == 'collect':
+        return {source_id: output for source_id, output in upstream_outputs}
+
+    merged = {}
+    for source_id, output in upstream_outputs:
+        if isinstance(output, dict):
+            merged.update(output)
+        else:
+            merged[source_id] = output
+    return merged
+
+def dag_final_result(end_outputs):
+    """计算DAG运行的最终结果
+
+    只有一个结束节点被执行时直接返回其输出，否则按结束节点ID汇总。
+    """
+    if not end_outputs:
+        return None
+    if len(end_outputs) == 1:
+        return end_outputs[0][1]
+    return {node_id: output for node_id, output in end_outputs}
+
+class DagScheduler:
+    """按DAG方式并行执行工作流
+
+    节点的所有入边都确定（执行或跳过）后才就绪；就绪节点按关键路径长度优先
+    提交到有界线程池并发执行。条件不满足的边视为跳过，所有入边都被跳过的节点
+    不执行，其出边同样跳过。
+
+    check 为可选的检查函数，等待节点完成期间定期调用，抛出异常（如运行被取消
+    或超时）时立即结束调度，不等待仍在执行的节点。cancel 为可选的取消函数，
+    节点失败或调度因其他原因中止时调用，通知仍在执行的节点尽快结束；它只应
+    作用于本次调度（如 RunContext.child 派生的子范围），不能设置调用方的取消信号。
+    """
+
+    # 等待节点完成期间调用 check 的间隔（秒）
+    CHECK_INTERVAL = 0.1
+
+    def __init__(self, plan, node_runner, max_workers=8, check=None, cancel=None):
+        self.plan = plan
+        self.node_runner = node_runner
+        self.max_workers = max(1, max_workers)
+        self.check = check
+        self.cancel = cancel
+
+    def run(self, input_data, on_step=None):
+        """执行工作流，返回 (步骤列表, 最终结果)
+
+        on_step 在每个节点完成后以步骤记录为参数调用。
+        """
+        steps = []
+        end_outputs = []
+        for step in self.iter_steps(input_data):
+            steps.append(step)
+            if on_step:
+                on_step(step)
+            if step['node_type'] == 'end':
+                end_outputs.append((step['node_id'], step['output']))
+        return steps, dag_final_result(end_outputs)
+
+    def _run_timed(self, node, data):
+        """执行节点并返回输出和耗时（秒）"""
+        started = time.perf_counter()
+        output = self.node_runner(node, data)
+        return output, time.perf_counter() - started
+
+    def iter_steps(self, input_data):
+        """执行工作流，每个节点完成后立即产出其步骤记录"""
+        plan = self.plan
+        dag_info = plan.get_dag_info()
+        rank = dag_info['rank']
+        pending = dict(dag_info['in_degree'])
+        # 节点ID -> [(源节点ID, 输出)]，只记录被执行的入边
+        taken_inputs = {node_id: [] for node_id in pending}
+
+        ready = []
+        sequence = 0
+
+        def push_ready(node_id, data):
+            nonlocal sequence
+            heapq.heappush(ready, (-rank[node_id], sequence, node_id, data))
+            sequence += 1
+
+        def ordered_inputs(node_id):
+            """按入边顺序排列上游输出，保证合并结果确定"""
+            inputs = taken_inputs.pop(node_id)
+            if len(inputs) > 1:
+                position = {source_id: index for index, source_id in enumerate(plan.in_edges.get(node_id, []))}
+                inputs.sort(key=lambda item: position[item[0]])
+            return inputs
+
+        def resolve_edges(node_id, output):
+            """确定已执行节点出边的执行情况，并更新下游节点的就绪状态"""
+            worklist = [(node_id, output, True)]
+            while worklist:
+                source_id, source_output, executed = worklist.pop()
+                edges = plan.get_outgoing_edges(source_id)
+                decision_table = plan.get_decision_table(source_id) if executed else None
+                taken = decision_table.matching_indexes(edges, source_output) if decision_table else None
+                for index, edge in enumerate(edges):
+                    target_id = edge.edge.get('target')
+                    if target_id not in pending:
+                        continue
+                    if taken is not None:
+                        is_taken = index in taken
+                    else:
+                        is_taken = executed and (not edge.predicate or edge.predicate(source_output))
+                    if is_taken:
+                        taken_inputs[target_id].append((source_id, source_output))
+                    pending[target_id] -= 1
+                    if pending[target_id] > 0:
+                        continue
+                    if taken_inputs[target_id]:
+                        target = plan.get_node(target_id)
+                        push_ready(target_id, merge_upstream_outputs(target, ordered_inputs(target_id)))
+                    else:
+                        # 所有入边都被跳过，节点跳过并继续向下游传播
+                        worklist.append((target_id, None, False))
+
+        push_ready(plan.start_node.get('id'), input_data)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        running = {}
+        interval = self.CHECK_INTERVAL if self.check else None
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_workers:
+                    _, _, node_id, data = heapq.heappop(ready)
+                    node = plan.get_node(node_id)
+                    # 工作线程继承提交时的上下文（如当前的追踪span）
+                    future = executor.submit(contextvars.copy_context().run, self._run_timed, node, data)
+                    running[future] = (node, data)
+
+                done, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+                if self.check:
+                    self.check()
+                for future in done:
+                    node, data = running.pop(future)
+                    output, duration = future.result()
+                    yield {
+                        'node_id': node.get('id'),
+                        'node_name': node.get('data', {}).get('name', '未命名节点'),
+                        'node_type': node.get('type'),
+                        'input': data,
+                        'output': output,
+                        'duration_ms': round(duration * 1000, 3)
+                    }
+                    if node.get('type') != 'end':
+                        resolve_edges(node.get('id'), output)
+        except BaseException:
+            # 先通知取消，再不等待地关闭线程池，仍在执行的节点在下一次检查时自行结束
+            if self.cancel:
+                self.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
@@ -0,0 +1,95 @@
+from services.expression_engine import parse_equality_condition
+
+# 同一字段上至少有多少条等值条件的出边时建立决策表
+DECISION_TABLE_MIN_BRANCHES = 2
+
+# 查表统计：表中出边的条件由查表代替求值，不计入表达式的求值次数
+_table_stats = {'lookups': 0, 'hits': 0}
+
+class DecisionTable:
+    """多路分支的决策表
+
+    同一源节点的出边中，条件为 input[...] == 常量 且作用于同一字段的边按常量
+    建立哈希表，选择出边时查表一次即可；其他出边（条件形式不同、作用于其他
+    字段或没有条件）保留在回退列表中按原顺序求值。结果与逐条求值一致：顺序
+    执行时选择原顺序中第一条满足条件的出边，DAG执行时得到所有满足条件的出边。
+    """
+
+    def __init__(self, path, table, fallback):
+        self.path = path          # 字段的键路径
+        self.table = table        # 常量 -> 条件为该常量的出边下标（升序）
+        self.fallback = fallback  # 不在表中的出边下标，按原顺序排列
+
+    @classmethod
+    def build(cls, plan_edges):
+        """为源节点的出边建立决策表，不适用时返回 None"""
+        groups = {}
+        for index, edge in enumerate(plan_edges):
+            if not edge.condition or edge.predicate.error:
+                continue
+            match = parse_equality_condition(edge.condition)
+            if match is not None:
+                path, value = match
+                groups.setdefault(path, []).append((index, value))
+        if not groups:
+            return None
+
+        path, entries = max(groups.items(), key=lambda item: len(item[1]))
+        if len(entries) < DECISION_TABLE_MIN_BRANCHES:
+            return None
+        table = {}
+        for index, value in entries:
+            table[value] = table.get(value, ()) + (index,)
+        in_table = {index for index, _ in entries}
+        fallback = [index for index in range(len(plan_edges)) if index not in in_table]
+        return cls(path, table, fallback)
+
+    def lookup(self, data):
+        """查表得到等值条件成立的出边下标"""
+        _table_stats['lookups'] += 1
+        try:
+            for key in self.path:
+                data = data[key]
+            indexes = self.table.get(data, ())
+        except Exception:
+            # 字段不存在或值不可哈希时，等值条件都不成立
+            return ()
+        if indexes:
+            _table_stats['hits'] += 1
+        return indexes
+
+    def select(self, plan_edges, data):
+        """选择第一条满足条件的出边，返回其目标节点"""
+        indexes = self.lookup(data)
+        matched = indexes[0] if indexes else None
+        for index in self.fallback:
+            if matched is not None and index > matched:
+                break
+            edge = plan_edges[index]
+            if not edge.condition or edge.predicate(data):
+                return edge.target
+        if matched is None:
+            return None
+        return plan_edges[matched].target
+
+    def matching_indexes(self, plan_edges, data):
+        """所有满足条件的出边下标"""
+        matched = set(self.lookup(data))
+        for index in self.fallback:
+            edge = plan_edges[index]
+            if not edge.condition or edge.predicate(data):
+                matched.add(index)
+        return matched
+
+    def to_spec(self):
+        """序列化为可 marshal 的结构"""
+        return (self.path, self.table, self.fallback)
+
+    @classmethod
+    def from_spec(cls, spec):
+        path, table, fallback = spec
+        return cls(tuple(path), table, list(fallback))
+
+def get_decision_table_stats():
+    """获取决策表查表统计"""
+    return dict(_table_stats, misses=_table_stats['lookups'] - _table_stats['hits'])
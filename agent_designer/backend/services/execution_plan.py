@@ -0,0 +1,365 @@
+import marshal
+import sys
+import threading
+from collections import Counter, namedtuple
+from services.expression_engine import get_compiled_expression
+from services.decision_table import DecisionTable
+
+# 预解析的出边：目标节点、条件表达式、编译后的条件、原始边
+PlanEdge = namedtuple('PlanEdge', ['target', 'condition', 'predicate', 'edge'])
+
+# 发布时编译结果的格式版本，结构变化时递增，旧格式的结果在运行时被忽略
+COMPILED_PLAN_FORMAT = 2
+
+class DagCycleError(ValueError):
+    """工作流存在环，不能按DAG模式执行（顺序模式支持循环）"""
+    pass
+
+class ExecutionPlan:
+    """编译后的工作流执行计划
+
+    节点按ID建立哈希索引，出边按源节点建立邻接表，开始/结束节点预先解析，
+    执行时每一步的调度开销只与当前节点的出度相关。
+    """
+
+    def __init__(self, workflow_id, name, version, nodes, edges, updated_at=None):
+        self.workflow_id = workflow_id
+        self.name = name
+        self.version = version
+        self.updated_at = updated_at
+        self._source = (nodes, edges)
+
+        # 节点索引（与 Workflow.get_node_by_id 一致，重复ID取第一个）
+        self.nodes = {}
+        for node in nodes:
+            self.nodes.setdefault(node.get('id'), node)
+
+        # 出边/入边邻接表，保持边的原始顺序
+        self.out_edges = {}
+        self.in_edges = {}
+        for edge in edges:
+            edge_data = edge.get('data') or {}
+            condition = edge_data.get('condition')
+            plan_edge = PlanEdge(
+                target=self.nodes.get(edge.get('target')),
+                condition=condition,
+                predicate=get_compiled_expression(condition) if condition else None,
+                edge=edge
+            )
+            self.out_edges.setdefault(edge.get('source'), []).append(plan_edge)
+            self.in_edges.setdefault(edge.get('target'), []).append(edge.get('source'))
+
+        # 多路分支的决策表：源节点ID -> DecisionTable
+        self.decision_tables = {}
+        for source_id, plan_edges in self.out_edges.items():
+            if len(plan_edges) > 1:
+                table = DecisionTable.build(plan_edges)
+                if table is not None:
+                    self.decision_tables[source_id] = table
+
+        self._dag_info = None
+        self.precompiled = False
+
+        self.start_node = None
+        self.end_nodes = []
+        for node in nodes:
+            if node.get('type') == 'start' and self.start_node is None:
+                self.start_node = node
+            elif node.get('type') == 'end':
+                self.end_nodes.append(node)
+
+    @classmethod
+    def from_workflow(cls, workflow):
+        """从工作流模型编译执行计划，已发布的工作流直接加载发布时的编译结果"""
+        if workflow.compiled_plan:
+            plan = load_compiled_plan(workflow)
+            if plan is not None:
+                return plan
+        return cls(
+            workflow.id,
+            workflow.name,
+            workflow.version,
+            workflow.nodes_obj,
+            workflow.edges_obj,
+            updated_at=workflow.updated_at
+        )
+
+    def __reduce__(self):
+        # 编译后的条件无法序列化，跨进程传递时按原始节点和边重新编译
+        nodes, edges = self._source
+        return (ExecutionPlan, (self.workflow_id, self.name, self.version, nodes, edges, self.updated_at))
+
+    def get_node(self, node_id):
+        """根据ID获取节点"""
+        return self.nodes.get(node_id)
+
+    def get_outgoing_edges(self, node_id):
+        """获取从指定节点出发的所有边"""
+        return self.out_edges.get(node_id, ())
+
+    def get_decision_table(self, node_id):
+        """获取节点出边的决策表，没有时返回 None"""
+        return self.decision_tables.get(node_id)
+
+    def _reachable_node_ids(self):
+        """从开始节点出发可达的节点ID"""
+        start_id = self.start_node.get('id')
+        reachable = {start_id}
+        stack = [start_id]
+        while stack:
+            node_id = stack.pop()
+            for edge in self.get_outgoing_edges(node_id):
+                target_id = edge.edge.get('target')
+                if edge.target is not None and target_id not in reachable:
+                    reachable.add(target_id)
+                    stack.append(target_id)
+        return reachable
+
+    def _topological_order(self, node_ids):
+        """子图内的入度和拓扑序，存在环时拓扑序不包含环上及其下游的节点"""
+        in_degree = {node_id: 0 for node_id in node_ids}
+        for node_id in node_ids:
+            for edge in self.get_outgoing_edges(node_id):
+                target_id = edge.edge.get('target')
+                if target_id in in_degree:
+                    in_degree[target_id] += 1
+
+        remaining = dict(in_degree)
+        order = [node_id for node_id, degree in remaining.items() if degree == 0]
+        index = 0
+        while index < len(order):
+            node_id = order[index]
+            index += 1
+            for edge in self.get_outgoing_edges(node_id):
+                target_id = edge.edge.get('target')
+                if target_id in remaining:
+                    remaining[target_id] -= 1
+                    if remaining[target_id] == 0:
+                        order.append(target_id)
+        return in_degree, order
+
+    def _find_cycle(self, node_ids):
+        """从拓扑排序剩下的节点中找出一个环，按边的方向返回环上的节点ID
+
+        剩下的节点都至少有一个同样剩下的上游节点，沿入边回溯必然回到已经过的节点，
+        从该节点到再次经过它之间的节点构成环。
+        """
+        remaining = set(node_ids)
+        path = []
+        position = {}
+        node_id = node_ids[0]
+        while node_id not in position:
+            position[node_id] = len(path)
+            path.append(node_id)
+            node_id = next(source_id for source_id in self.in_edges.get(node_id, []) if source_id in remaining)
+        # path 中的节点按回溯顺序排列，反转后即为边的方向
+        return [node_id] + path[:position[node_id]:-1]
+
+    def get_dag_info(self):
+        """获取DAG调度所需的可达节点、入度和关键路径长度
+
+        只统计从开始节点可达的子图；子图中存在环时抛出 DagCycleError。
+        """
+        dag_info = self._analyze_dag()
+        cycle = dag_info.get('cycle')
+        if cycle is not None:
+            path = ' -> '.join(str(node_id) for node_id in cycle + cycle[:1])
+            raise DagCycleError(f"工作流存在环，无法按DAG模式执行: {path}")
+        return dag_info
+
+    def get_dag_cycle(self):
+        """从开始节点可达的子图中的一个环（按边的方向排列的节点ID），没有环时返回 None"""
+        return self._analyze_dag().get('cycle')
+
+    def _analyze_dag(self):
+        """计算DAG调度信息，存在环时只记录其中一个环"""
+        if self._dag_info is not None:
+            return self._dag_info
+        if not self.start_node:
+            raise ValueError("工作流没有开始节点")
+
+        in_degree, order = self._topological_order(self._reachable_node_ids())
+        if len(order) != len(in_degree):
+            ordered = set(order)
+            cyclic = [node_id for node_id in self.nodes if node_id in in_degree and node_id not in ordered]
+            self._dag_info = {'cycle': self._find_cycle(cyclic)}
+            return self._dag_info
+
+        # 关键路径长度：节点到终点的最长路径上的节点数
+        rank = {}
+        for node_id in reversed(order):
+            downstream = [
+                rank[edge.edge.get('target')]
+                for edge in self.get_outgoing_edges(node_id)
+                if edge.edge.get('target') in rank
+            ]
+            rank[node_id] = 1 + max(downstream, default=0)
+
+        self._dag_info = {'in_degree': in_degree, 'rank': rank}
+        return self._dag_info
+
+    def validate(self):
+        """校验工作流结构，存在问题时抛出 ValueError 并列出所有问题
+
+        检查开始节点、重复的节点ID、连接不存在节点的边和从开始节点不可达的节点。
+        环不是错误：顺序模式支持循环，存在环的工作流只是不能按DAG模式执行（见
+        get_dag_cycle）。
+        """
+        nodes, edges = self._source
+        problems = []
+
+        duplicates = [str(node_id) for node_id, count in Counter(node.get('id') for node in nodes).items() if count > 1]
+        if duplicates:
+            problems.append(f"节点ID重复: {', '.join(duplicates)}")
+
+        start_count = sum(1 for node in nodes if node.get('type') == 'start')
+        if start_count == 0:
+            problems.append("工作流没有开始节点")
+        elif start_count > 1:
+            problems.append("工作流有多个开始节点")
+
+        for edge in edges:
+            missing = [str(edge.get(key)) for key in ('source', 'target') if edge.get(key) not in self.nodes]
+            if missing:
+                problems.append(f"边 {edge.get('id')} 连接了不存在的节点: {', '.join(missing)}")
+
+        if self.start_node:
+            reachable = self._reachable_node_ids()
+            unreachable = [str(node_id) for node_id in self.nodes if node_id not in reachable]
+            if unreachable:
+                problems.append(f"节点从开始节点不可达: {', '.join(unreachable)}")
+
+        if problems:
+            raise ValueError("工作流校验失败: " + "；".join(problems))
+
+    def to_compiled(self):
+        """序列化为发布时保存的编译结果
+
+        包含节点表、邻接表、决策表、开始/结束节点、DAG调度信息（存在环时为环上的
+        节点）和编译后的条件代码，使用 marshal 序列化；同一节点或边对象只保存一次。
+        """
+        nodes, edges = self._source
+        conditions = {}
+        out_edges = {}
+        for source_id, plan_edges in self.out_edges.items():
+            out_edges[source_id] = [plan_edge.edge for plan_edge in plan_edges]
+            for plan_edge in plan_edges:
+                if plan_edge.predicate is not None and plan_edge.predicate.code is not None:
+                    conditions[plan_edge.condition] = plan_edge.predicate.code
+        return marshal.dumps({
+            'format': COMPILED_PLAN_FORMAT,
+            'python': sys.implementation.cache_tag,
+            'version': self.version,
+            'nodes': nodes,
+            'edges': edges,
+            'node_table': self.nodes,
+            'out_edges': out_edges,
+            'in_edges': self.in_edges,
+            'decision_tables': {source_id: table.to_spec() for source_id, table in self.decision_tables.items()},
+            'start_node': self.start_node.get('id'),
+            'end_nodes': [node.get('id') for node in self.end_nodes],
+            'dag_info': self._analyze_dag(),
+            'conditions': conditions
+        })
+
+    @classmethod
+    def from_compiled(cls, workflow, artifact):
+        """从发布时的编译结果恢复执行计划，不再解析节点和边、不再校验"""
+        plan = cls.__new__(cls)
+        plan.workflow_id = workflow.id
+        plan.name = workflow.name
+        plan.version = workflow.version
+        plan.updated_at = workflow.updated_at
+        plan._source = (artifact['nodes'], artifact['edges'])
+        plan.nodes = artifact['node_table']
+        plan.in_edges = artifact['in_edges']
+        plan._dag_info = artifact['dag_info']
+        plan.precompiled = True
+
+        # 条件代码对象与解释器版本相关，版本不一致时按表达式文本重新编译
+        conditions = artifact['conditions'] if artifact['python'] == sys.implementation.cache_tag else {}
+        plan.out_edges = {}
+        for source_id, edges in artifact['out_edges'].items():
+            plan_edges = []
+            for edge in edges:
+                condition = (edge.get('data') or {}).get('condition')
+                plan_edges.append(PlanEdge(
+                    target=plan.nodes.get(edge.get('target')),
+                    condition=condition,
+                    predicate=get_compiled_expression(condition, conditions.get(condition)) if condition else None,
+                    edge=edge
+                ))
+            plan.out_edges[source_id] = plan_edges
+        plan.decision_tables = {
+            source_id: DecisionTable.from_spec(spec) for source_id, spec in artifact['decision_tables'].items()
+        }
+
+        plan.start_node = plan.nodes[artifact['start_node']]
+        plan.end_nodes = [plan.nodes[node_id] for node_id in artifact['end_nodes']]
+        return plan
+
+    def is_current(self, workflow):
+        """判断执行计划是否与工作流当前版本一致"""
+        return self.version == workflow.version and self.updated_at == workflow.updated_at
+
+def compile_workflow(workflow, version=None):
+    """发布时编译工作流：校验结构并返回序列化的执行计划
+
+    version 为发布后的版本号，默认为工作流当前的版本号。
+    """
+    plan = ExecutionPlan(
+        workflow.id, workflow.name, version or workflow.version, workflow.nodes_obj, workflow.edges_obj,
+        updated_at=workflow.updated_at
+    )
+    plan.validate()
+    return plan.to_compiled()
+
+def load_compiled_plan(workflow):
+    """加载工作流发布时的编译结果，格式或版本不一致时返回 None"""
+    try:
+        artifact = marshal.loads(workflow.compiled_plan)
+    except (ValueError, EOFError, TypeError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get('format') != COMPILED_PLAN_FORMAT:
+        return None
+    if artifact.get('version') != workflow.version:
+        return None
+    return ExecutionPlan.from_compiled(workflow, artifact)
+
+# 执行计划缓存：workflow_id -> ExecutionPlan
+_plan_cache = {}
+_plan_cache_lock = threading.Lock()
+_plan_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'compiled_loads': 0}
+
+def get_execution_plan(workflow):
+    """获取工作流的执行计划，同一 (工作流ID, 版本) 只编译一次"""
+    plan = _plan_cache.get(workflow.id)
+    if plan is not None and plan.is_current(workflow):
+        _plan_cache_stats['hits'] += 1
+        return plan
+
+    plan = ExecutionPlan.from_workflow(workflow)
+    with _plan_cache_lock:
+        _plan_cache[workflow.id] = plan
+        _plan_cache_stats['misses'] += 1
+        if plan.precompiled:
+            _plan_cache_stats['compiled_loads'] += 1
+    return plan
+
+def get_cached_execution_plan(workflow_id, version):
+    """获取已缓存且版本一致的执行计划，未命中时返回None"""
+    plan = _plan_cache.get(workflow_id)
+    if plan is not None and plan.version == version:
+        _plan_cache_stats['hits'] += 1
+        return plan
+    return None
+
+def invalidate_execution_plan(workflow_id):
+    """使工作流的执行计划缓存失效"""
+    with _plan_cache_lock:
+        if _plan_cache.pop(workflow_id, None) is not None:
+            _plan_cache_stats['invalidations'] += 1
+
+def get_plan_cache_stats():
+    """获取执行计划缓存统计"""
+    return dict(_plan_cache_stats, size=len(_plan_cache))
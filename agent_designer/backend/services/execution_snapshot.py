@@ -0,0 +1,175 @@
+from models.component import Component
+from models.workflow import Workflow
+from services.agent_index import get_published_workflow_pointers
+from services.execution_plan import get_execution_plan, get_cached_execution_plan
+
+# 引用组件的节点类型
+COMPONENT_NODE_TYPES = ('lpi', 'agent', 'common')
+
+# 组件类型对应的错误信息：(未指定组件ID, 类型不匹配)
+_COMPONENT_ERRORS = {
+    'lpi': ("LPI节点没有指定组件ID", "指定的组件不是LPI类型"),
+    'agent': ("Agent节点没有指定组件ID", "指定的组件不是Agent类型"),
+    'common': ("通用组件节点没有指定组件ID", "指定的组件不是通用组件类型"),
+}
+
+class FrozenDict(dict):
+    """只读字典，可序列化后跨线程、跨进程传递"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("执行快照是只读的")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+class FrozenList(list):
+    """只读列表，与普通列表比较结果一致"""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("执行快照是只读的")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+def freeze(value):
+    """递归地将字典和列表转换为只读结构"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+def normalize_component_id(component_id):
+    """统一组件ID类型，前端传入的数字字符串按整数处理"""
+    if isinstance(component_id, str) and component_id.isdigit():
+        return int(component_id)
+    return component_id
+
+def _component_details(component):
+    """提取组件执行所需的详情"""
+    if component.component_type == 'lpi':
+        details = component.get_lpi_details()
+    elif component.component_type == 'common':
+        details = component.get_common_details()
+    else:
+        details = {'id': component.id, 'name': component.name}
+    details['component_type'] = component.component_type
+    details['version'] = component.updated_at.isoformat() if component.updated_at else None
+    return freeze(details)
+
+class ExecutionSnapshot:
+    """一次运行所需的只读数据快照
+
+    包含顶层工作流及其递归引用的所有Agent工作流的执行计划，以及所有被引用组件的
+    详情。快照与数据库会话无关，运行过程中不再访问数据库。
+    """
+
+    def __init__(self, root_workflow_id, plans, components, agent_workflows):
+        self.root_workflow_id = root_workflow_id
+        self.plans = plans                      # workflow_id -> ExecutionPlan
+        self.components = components            # component_id -> FrozenDict
+        self.agent_workflows = agent_workflows  # agent_id -> workflow_id，没有已发布工作流时为 None
+
+    @property
+    def root_plan(self):
+        return self.plans[self.root_workflow_id]
+
+    def get_plan(self, workflow_id):
+        """获取工作流的执行计划"""
+        return self.plans[workflow_id]
+
+    def get_component(self, component_id, component_type):
+        """获取指定类型的组件详情"""
+        missing_message, type_message = _COMPONENT_ERRORS[component_type]
+        if not component_id:
+            raise ValueError(missing_message)
+        details = self.components.get(normalize_component_id(component_id))
+        if details is None:
+            raise ValueError(f"组件不存在: {component_id}")
+        if details['component_type'] != component_type:
+            raise ValueError(type_message)
+        return details
+
+    def get_agent_plan(self, component_id):
+        """获取Agent最新发布工作流的执行计划"""
+        self.get_component(component_id, 'agent')
+        workflow_id = self.agent_workflows.get(normalize_component_id(component_id))
+        # 指针指向的工作流已被删除时快照中没有其执行计划，同样视为没有已发布的工作流
+        if workflow_id is None or workflow_id not in self.plans:
+            raise ValueError("Agent没有已发布的工作流")
+        return self.plans[workflow_id]
+
+def _referenced_component_ids(plan):
+    """收集执行计划中引用的组件ID"""
+    component_ids = set()
+    for node in plan.nodes.values():
+        if node.get('type') in COMPONENT_NODE_TYPES:
+            component_id = (node.get('data') or {}).get('component_id')
+            if component_id:
+                component_ids.add(normalize_component_id(component_id))
+    return component_ids
+
+def _load_agent_plans(pointers):
+    """获取Agent当前发布工作流的执行计划，缓存未命中的工作流一次批量查询"""
+    plans = {}
+    missing_ids = []
+    for pointer in pointers:
+        workflow_id, version = pointer
+        plan = get_cached_execution_plan(workflow_id, version)
+        if plan is not None:
+            plans[workflow_id] = plan
+        else:
+            missing_ids.append(workflow_id)
+    if missing_ids:
+        for workflow in Workflow.query.filter(Workflow.id.in_(missing_ids)).all():
+            plans[workflow.id] = get_execution_plan(workflow)
+    return plans
+
+def build_execution_snapshot(workflow):
+    """构建运行快照：逐层批量加载工作流递归引用的组件和Agent工作流"""
+    plans = {workflow.id: get_execution_plan(workflow)}
+    components = {}
+    agent_workflows = {}
+    requested_ids = set()
+    frontier = [plans[workflow.id]]
+
+    while frontier:
+        # 本层所有执行计划引用、且尚未加载的组件，一次 IN 查询加载
+        component_ids = set()
+        for plan in frontier:
+            component_ids |= _referenced_component_ids(plan)
+        component_ids -= requested_ids
+        requested_ids |= component_ids
+        frontier = []
+        if not component_ids:
+            break
+
+        agent_ids = []
+        for component in Component.query.filter(Component.id.in_(component_ids)).all():
+            components[component.id] = _component_details(component)
+            if component.component_type == 'agent':
+                agent_ids.append(component.id)
+        if not agent_ids:
+            break
+
+        # 本层引用的Agent当前发布的工作流（指针和执行计划都有进程内缓存）
+        pointers = get_published_workflow_pointers(agent_ids)
+        new_pointers = []
+        for agent_id in agent_ids:
+            pointer = pointers.get(agent_id)
+            agent_workflows[agent_id] = pointer[0] if pointer else None
+            if pointer is not None and pointer[0] not in plans:
+                new_pointers.append(pointer)
+        for workflow_id, plan in _load_agent_plans(new_pointers).items():
+            plans[workflow_id] = plan
+            frontier.append(plan)
+
+    return ExecutionSnapshot(workflow.id, plans, FrozenDict(components), FrozenDict(agent_workflows))
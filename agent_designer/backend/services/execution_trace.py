@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from config import Config
+
+# 执行轨迹的保留模式
+TRACE_MODES = ('full', 'summary', 'spill')
+
+_BLOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}-[0-9a-f]{16}$')
+
+_cleanup_lock = threading.Lock()
+_last_cleanup = 0.0
+
+def encode_payload(value):
+    """将载荷序列化为JSON字节，与响应序列化方式一致"""
+    return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+
+def payload_summary(data):
+    """载荷摘要：序列化后的大小和哈希"""
+    return {'size': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+def _blob_path(blob_id):
+    return os.path.join(Config.WORKFLOW_TRACE_SPILL_DIR, blob_id + '.json')
+
+def load_trace_blob(blob_id):
+    """读取溢出到磁盘的载荷，不存在时返回None"""
+    if not _BLOB_ID_PATTERN.match(blob_id or ''):
+        return None
+    try:
+        with open(_blob_path(blob_id), 'rb') as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+def cleanup_trace_blobs(max_age=None):
+    """删除超过保留时间的溢出文件，返回删除的文件数"""
+    max_age = Config.WORKFLOW_TRACE_BLOB_TTL if max_age is None else max_age
+    spill_dir = Config.WORKFLOW_TRACE_SPILL_DIR
+    if not os.path.isdir(spill_dir):
+        return 0
+    deadline = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(spill_dir):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < deadline:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+def _maybe_cleanup():
+    """距上次清理超过一分钟时清理过期的溢出文件"""
+    global _last_cleanup
+    now = time.monotonic()
+    if now - _last_cleanup < 60:
+        return
+    with _cleanup_lock:
+        if now - _last_cleanup < 60:
+            return
+        _last_cleanup = now
+    cleanup_trace_blobs()
+
+class ExecutionTrace:
+    """一次运行的执行轨迹
+
+    mode 决定步骤中输入输出的保留方式：
+      full    保留完整载荷；设置了 max_bytes 时累计大小超过上限后，之后的步骤
+              只保留摘要，未设置时不序列化载荷
+      summary 只保留载荷大小、哈希和节点耗时
+      spill   超过 spill_threshold 的载荷写入临时文件，步骤中只保留文件ID；
+              累计大小超过 max_bytes 后所有载荷都写入文件
+    retain 为 False 时只转换步骤而不保留（流式执行），也不计入内存上限。
+
+    步骤的输入就是上游步骤的输出（同一对象），保留的大小只按输出累计，运行的
+    初始输入（第一个步骤的输入）单独计入一次。
+    """
+
+    def __init__(self, mode=None, max_bytes=None, spill_threshold=None, retain=True):
+        mode = mode or Config.WORKFLOW_TRACE_MODE
+        if mode not in TRACE_MODES:
+            raise ValueError(f"不支持的轨迹模式: {mode}")
+        self.mode = mode
+        self.max_bytes = Config.WORKFLOW_TRACE_MAX_BYTES if max_bytes is None else max_bytes
+        self.spill_threshold = Config.WORKFLOW_TRACE_SPILL_THRESHOLD if spill_threshold is None else spill_threshold
+        self.retain = retain
+        self.steps = []
+        self.step_count = 0
+        self.retained_bytes = 0
+        self.degraded = False
+        self.spilled_blobs = 0
+        self._trace_id = uuid.uuid4().hex
+        self._blob_ids = {}  # sha256 -> blob_id，相同载荷只写一次
+        self._last_encoded = (None, None)  # 上一步的输出即下一步的输入，避免重复序列化
+
+    def record(self, step):
+        """记录一个步骤，返回按保留模式转换后的步骤"""
+        self.step_count += 1
+        # 完整模式且不限制内存时无需序列化载荷
+        if self.mode == 'full' and not (self.retain and self.max_bytes):
+            recorded = step
+        else:
+            recorded = dict(step)
+            recorded['input'] = self._convert(step['input'], counted=self.step_count == 1)
+            recorded['output'] = self._convert(step['output'])
+        if self.retain:
+            self.steps.append(recorded)
+        return recorded
+
+    def _encode(self, value):
+        last_value, last_data = self._last_encoded
+        if last_value is value and last_data is not None:
+            return last_data
+        data = encode_payload(value)
+        self._last_encoded = (value, data)
+        return data
+
+    def _convert(self, value, counted=True):
+        """按保留模式转换载荷，counted 为 False 时载荷已作为上游输出计入大小"""
+        if not counted and self.mode == 'full' and not self.degraded:
+            # 完整保留的输入与上游输出共享内存，无需序列化
+            return value
+        data = self._encode(value)
+        size = len(data)
+        added = size if counted else 0
+        over_limit = self.retain and self.max_bytes and self.retained_bytes + added > self.max_bytes
+
+        if self.mode == 'full' and counted and not over_limit:
+            self.retained_bytes += size
+            return value
+        if self.mode == 'spill' and (size > self.spill_threshold or over_limit):
+            return self._spill(data)
+        if self.mode == 'spill':
+            self.retained_bytes += added
+            return value
+
+        if self.mode == 'full':
+            self.degraded = True
+        return dict(payload_summary(data), truncated=True)
+
+    def _spill(self, data):
+        """将载荷写入溢出文件"""
+        summary = payload_summary(data)
+        blob_id = self._blob_ids.get(summary['sha256'])
+        if blob_id is None:
+            if not self.spilled_blobs:
+                os.makedirs(Config.WORKFLOW_TRACE_SPILL_DIR, exist_ok=True)
+                _maybe_cleanup()
+            blob_id = f"{self._trace_id}-{summary['sha256'][:16]}"
+            with open(_blob_path(blob_id), 'wb') as f:
+                f.write(data)
+            self._blob_ids[summary['sha256']] = blob_id
+            self.spilled_blobs += 1
+        return dict(summary, blob_id=blob_id)
+
+    def to_dict(self):
+        """轨迹统计"""
+        return {
+            'mode': self.mode,
+            'step_count': self.step_count,
+            'retained_bytes': self.retained_bytes,
+            'max_bytes': self.max_bytes,
+            'degraded': self.degraded,
+            'spilled_blobs': self.spilled_blobs
+        }
@@ -0,0 +1,179 @@
+import ast
+import threading
+
+class ExpressionError(ValueError):
+    """表达式编译错误"""
+    pass
+
+# 表达式中允许调用的内置函数
+SAFE_FUNCTIONS = {
+    'len': len,
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+    'abs': abs,
+    'min': min,
+    'max': max,
+    'any': any,
+    'all': all,
+    'round': round,
+}
+
+# 表达式中允许调用的对象方法
+SAFE_METHODS = {
+    'get', 'keys', 'values', 'items',
+    'lower', 'upper', 'strip', 'startswith', 'endswith', 'split', 'count'
+}
+
+# 表达式中允许出现的变量名
+ALLOWED_NAMES = {'input'} | set(SAFE_FUNCTIONS)
+
+# 语法节点白名单
+ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE,
+    ast.In, ast.NotIn, ast.Is, ast.IsNot, ast.IfExp,
+    ast.Constant, ast.Name, ast.Load, ast.Subscript, ast.Slice, ast.Attribute, ast.Call,
+    ast.List, ast.Tuple, ast.Set, ast.Dict,
+)
+
+_EVAL_GLOBALS = dict(SAFE_FUNCTIONS, __builtins__={})
+
+def _validate(tree):
+    """校验语法树只包含白名单内的节点"""
+    # 属性只能作为方法调用，不能单独取值
+    called_funcs = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ExpressionError(f"表达式中不允许使用: {type(node).__name__}")
+        if isinstance(node, ast.Name) and node.id not in ALLOWED_NAMES:
+            raise ExpressionError(f"表达式中不允许使用变量: {node.id}")
+        if isinstance(node, ast.Attribute):
+            if node.attr not in SAFE_METHODS or id(node) not in called_funcs:
+                raise ExpressionError(f"表达式中不允许访问属性: {node.attr}")
+        if isinstance(node, ast.Call):
+            if node.keywords:
+                raise ExpressionError("表达式中不允许使用关键字参数")
+            if not isinstance(node.func, (ast.Name, ast.Attribute)):
+                raise ExpressionError("表达式中只允许调用内置函数或对象方法")
+
+class CompiledExpression:
+    """编译后的条件表达式
+
+    code 为发布时已校验并编译的代码对象，提供时不再解析和校验表达式。
+    """
+
+    def __init__(self, expression, code=None):
+        self.expression = expression
+        self.error = None
+        self.evaluations = 0
+        self.failures = 0
+        self.last_failure = None
+        self._code = code
+        if code is not None:
+            return
+        try:
+            tree = ast.parse(expression.strip(), mode='eval')
+            _validate(tree)
+            self._code = compile(tree, '<expression>', 'eval')
+        except ExpressionError as e:
+            self.error = str(e)
+        except SyntaxError as e:
+            self.error = f"表达式语法错误: {e.msg}"
+
+    @property
+    def code(self):
+        """编译后的代码对象，编译失败时为 None"""
+        return self._code
+
+    def __call__(self, input_data):
+        """对输入数据求值，求值失败时返回False"""
+        self.evaluations += 1
+        if self._code is None:
+            self.failures += 1
+            return False
+        try:
+            return eval(self._code, _EVAL_GLOBALS, {'input': input_data})
+        except Exception as e:
+            self.failures += 1
+            self.last_failure = f"{type(e).__name__}: {e}"
+            return False
+
+# 编译缓存：表达式文本 -> CompiledExpression
+_expression_cache = {}
+_expression_cache_lock = threading.Lock()
+
+def get_compiled_expression(expression, code=None):
+    """获取编译后的表达式，同一表达式文本只编译一次
+
+    code 为发布时编译的代码对象，缓存未命中时直接使用。
+    """
+    compiled = _expression_cache.get(expression)
+    if compiled is None:
+        with _expression_cache_lock:
+            compiled = _expression_cache.get(expression)
+            if compiled is None:
+                compiled = CompiledExpression(expression, code)
+                _expression_cache[expression] = compiled
+    return compiled
+
+def validate_expression(expression):
+    """校验表达式，编译失败时抛出 ExpressionError"""
+    compiled = get_compiled_expression(expression)
+    if compiled.error:
+        raise ExpressionError(compiled.error)
+    return compiled
+
+def parse_equality_condition(expression):
+    """识别 input['a']['b'] == 常量 形式的条件（常量也可以写在左边）
+
+    返回 (键路径, 常量)，其他形式的条件返回 None。
+    """
+    try:
+        tree = ast.parse(expression.strip(), mode='eval')
+    except SyntaxError:
+        return None
+    node = tree.body
+    if not (isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.Eq)):
+        return None
+    subject, value = node.left, node.comparators[0]
+    if isinstance(subject, ast.Constant):
+        subject, value = value, subject
+    if not isinstance(value, ast.Constant):
+        return None
+
+    path = []
+    while isinstance(subject, ast.Subscript):
+        if not isinstance(subject.slice, ast.Constant):
+            return None
+        path.append(subject.slice.value)
+        subject = subject.value
+    if not (isinstance(subject, ast.Name) and subject.id == 'input' and path):
+        return None
+    return tuple(reversed(path)), value.value
+
+def evaluate_expression(expression, input_data):
+    """对表达式求值"""
+    return get_compiled_expression(expression)(input_data)
+
+def get_expression_stats(limit=50):
+    """获取表达式编译与求值统计"""
+    compiled_list = list(_expression_cache.values())
+    compiled_list.sort(key=lambda c: c.evaluations, reverse=True)
+    return {
+        'compiled': len(compiled_list),
+        'compile_errors': sum(1 for c in compiled_list if c.error),
+        'evaluations': sum(c.evaluations for c in compiled_list),
+        'failures': sum(c.failures for c in compiled_list),
+        'expressions': [
+            {
+                'expression': c.expression,
+                'evaluations': c.evaluations,
+                'failures': c.failures,
+                'error': c.error or c.last_failure
+            }
+            for c in compiled_list[:limit]
+        ]
+    }
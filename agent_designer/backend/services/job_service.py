@@ -0,0 +1,172 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from config import Config
+from services.run_context import WorkflowCancelledError, WorkflowDeadlineExceededError
+from services.workflow_service import execute_workflow
+
+class JobRejectedError(Exception):
+    """排队的运行数已达上限，拒绝新的运行"""
+    pass
+
+class WorkflowRun:
+    """后台执行的一次工作流运行"""
+
+    def __init__(self, workflow_id, input_data, mode, trace_mode=None, checkpoint=False, timeout=None):
+        self.id = uuid.uuid4().hex
+        self.workflow_id = workflow_id
+        self.input_data = input_data
+        self.mode = mode
+        self.trace_mode = trace_mode
+        self.checkpoint = checkpoint
+        self.timeout = timeout
+        self.status = 'queued'  # queued, running, succeeded, failed, cancelled
+        self.steps = []
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed', 'cancelled')
+
+    def to_dict(self, include_steps=True):
+        data = {
+            'run_id': self.id,
+            'workflow_id': self.workflow_id,
+            'mode': self.mode,
+            'status': self.status,
+            'step_count': len(self.steps),
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+        if include_steps:
+            data['steps'] = list(self.steps)
+        return data
+
+class JobManager:
+    """工作流后台运行管理器
+
+    运行提交后进入有界队列，由固定大小的线程池执行；排队数超过上限时拒绝提交。
+    已结束的运行保留最近的 max_retained 条供查询。
+    """
+
+    def __init__(self, max_workers, max_queued, max_retained):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_retained = max_retained
+        self._executor = None
+        self._runs = OrderedDict()
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._stats = {'submitted': 0, 'rejected': 0, 'succeeded': 0, 'failed': 0, 'cancelled': 0}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='workflow-run')
+        return self._executor
+
+    def submit(self, app, workflow_id, input_data, mode='sequential', trace_mode=None, checkpoint=False, timeout=None):
+        """提交一次运行，返回 WorkflowRun；checkpoint 为 True 时以运行ID保存检查点
+
+        timeout 为运行开始执行后的时间预算（秒），不包括排队时间。
+        """
+        run = WorkflowRun(workflow_id, input_data, mode, trace_mode, checkpoint, timeout)
+        with self._lock:
+            if self._queued >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise JobRejectedError(f"排队的运行数已达上限: {self.max_queued}")
+            self._queued += 1
+            self._stats['submitted'] += 1
+            self._runs[run.id] = run
+            self._evict()
+            run.future = self._get_executor().submit(self._execute, app, run)
+        return run
+
+    def _execute(self, app, run):
+        """在工作线程中执行运行"""
+        with self._lock:
+            self._queued -= 1
+            if run.cancel_event.is_set():
+                self._finish(run, 'cancelled')
+                return
+            self._running += 1
+            run.status = 'running'
+            run.started_at = datetime.now()
+
+        status = 'failed'
+        try:
+            with app.app_context():
+                result = execute_workflow(
+                    run.workflow_id, run.input_data, mode=run.mode,
+                    on_step=run.steps.append, cancel_event=run.cancel_event,
+                    trace_mode=run.trace_mode, checkpoint=run.checkpoint, run_id=run.id,
+                    timeout=run.timeout
+                )
+            run.result = result.get('final_result')
+            status = 'succeeded'
+        except WorkflowDeadlineExceededError as e:
+            run.error = str(e)
+        except WorkflowCancelledError:
+            status = 'cancelled'
+        except Exception as e:
+            run.error = str(e)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._finish(run, status)
+
+    def _finish(self, run, status):
+        """标记运行结束（调用方持有锁）"""
+        run.status = status
+        run.finished_at = datetime.now()
+        run.input_data = None
+        self._stats[status] += 1
+
+    def _evict(self):
+        """淘汰最早结束的运行记录（调用方持有锁）"""
+        overflow = len(self._runs) - self.max_retained
+        if overflow <= 0:
+            return
+        for run_id in [run_id for run_id, run in self._runs.items() if run.finished][:overflow]:
+            del self._runs[run_id]
+
+    def get(self, run_id):
+        """获取运行记录，不存在时返回None"""
+        return self._runs.get(run_id)
+
+    def cancel(self, run_id):
+        """取消运行：排队中的运行直接取消，执行中的运行在下一个节点开始前结束"""
+        run = self._runs.get(run_id)
+        if run is None:
+            return None
+        run.cancel_event.set()
+        with self._lock:
+            if run.status == 'queued' and run.future is not None and run.future.cancel():
+                self._queued -= 1
+                self._finish(run, 'cancelled')
+        return run
+
+    def get_stats(self):
+        """获取队列统计"""
+        with self._lock:
+            return dict(
+                self._stats,
+                queue_depth=self._queued,
+                running=self._running,
+                max_workers=self.max_workers,
+                max_queued=self.max_queued,
+                retained_runs=len(self._runs)
+            )
+
+job_manager = JobManager(Config.JOB_MAX_WORKERS, Config.JOB_MAX_QUEUED, Config.JOB_MAX_RETAINED_RUNS)
@@ -0,0 +1,107 @@
+import hashlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 两次检查模块文件是否变化的最小间隔（秒）
+CHECK_INTERVAL = 1.0
+
+class LoadedModule:
+    """已加载的LPI模块"""
+
+    def __init__(self, path, module_name, module, mtime_ns, size, digest):
+        self.path = path
+        self.module_name = module_name
+        self.module = module
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.checked_at = time.monotonic()
+        self.functions = {}
+
+_modules = {}
+_path_locks = {}
+_locks_lock = threading.Lock()
+_loader_stats = {'loads': 0, 'reloads': 0, 'hits': 0}
+
+def _get_path_lock(path):
+    """获取单个模块路径的加载锁"""
+    with _locks_lock:
+        lock = _path_locks.get(path)
+        if lock is None:
+            lock = _path_locks[path] = threading.Lock()
+        return lock
+
+def _module_name(path):
+    """为模块生成独立的名称，避免同名文件在 sys.modules 中互相覆盖"""
+    digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+    return f"lpi_{Path(path).stem}_{digest}"
+
+def _import_module(path, stat, digest):
+    """从文件导入模块"""
+    module_name = _module_name(path)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ValueError(f"无法加载Python模块: {path}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    return LoadedModule(path, module_name, module, stat.st_mtime_ns, stat.st_size, digest)
+
+def _file_digest(path):
+    """计算模块文件内容的摘要"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def load_lpi_module(module_path):
+    """加载LPI模块，同一文件只导入一次，文件内容变化时重新加载"""
+    path = os.path.abspath(module_path)
+    entry = _modules.get(path)
+    now = time.monotonic()
+    if entry is not None and now - entry.checked_at < CHECK_INTERVAL:
+        _loader_stats['hits'] += 1
+        return entry
+
+    with _get_path_lock(path):
+        entry = _modules.get(path)
+        stat = os.stat(path)
+        if entry is not None and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            entry.checked_at = now
+            _loader_stats['hits'] += 1
+            return entry
+
+        # 文件时间或大小变化时再比较内容摘要，内容未变则不重新导入
+        digest = _file_digest(path)
+        if entry is not None and entry.digest == digest:
+            entry.mtime_ns, entry.size, entry.checked_at = stat.st_mtime_ns, stat.st_size, now
+            _loader_stats['hits'] += 1
+            return entry
+
+        new_entry = _import_module(path, stat, digest)
+        _loader_stats['reloads' if entry is not None else 'loads'] += 1
+        _modules[path] = new_entry
+        return new_entry
+
+def load_lpi_function(module_path, function_name='main'):
+    """获取LPI模块中的入口函数"""
+    entry = load_lpi_module(module_path)
+    function = entry.functions.get(function_name)
+    if function is None:
+        if not hasattr(entry.module, function_name):
+            raise ValueError(f"Python模块中没有找到函数: {function_name}")
+        function = entry.functions[function_name] = getattr(entry.module, function_name)
+    return function
+
+def get_lpi_module_stats():
+    """获取LPI模块缓存统计"""
+    return dict(_loader_stats, modules=[
+        {'path': entry.path, 'module_name': entry.module_name, 'digest': entry.digest}
+        for entry in list(_modules.values())
+    ])
@@ -0,0 +1,272 @@
+import asyncio
+import atexit
+import inspect
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+from config import Config
+from services.lpi_loader import load_lpi_module, load_lpi_function
+
+# 进程间传递参数和结果使用的序列化协议（协议5支持大缓冲区的带外传输）
+PICKLE_PROTOCOL = 5
+
+class LpiProcessError(Exception):
+    """进程池中的LPI调用失败"""
+    pass
+
+class LpiTimeoutError(LpiProcessError):
+    """进程池中的LPI调用超时，执行该调用的工作进程已被终止"""
+    pass
+
+class LpiFunctionError(LpiProcessError):
+    """LPI函数本身抛出了异常（工作进程正常）"""
+    pass
+
+def _worker_main(conn, preload_paths):
+    """工作进程主循环：预先导入模块并通知就绪，之后逐个处理调用请求"""
+    for path in preload_paths:
+        try:
+            load_lpi_module(path)
+        except Exception:
+            pass
+    conn.send_bytes(pickle.dumps((True, 'ready'), protocol=PICKLE_PROTOCOL))
+
+    while True:
+        try:
+            message = pickle.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        command = message[0]
+        try:
+            if command == 'call':
+                _, module_path, function_name, input_data = message
+                result = load_lpi_function(module_path, function_name)(input_data)
+                if inspect.isawaitable(result):
+                    result = asyncio.run(result)
+                reply = (True, result)
+            elif command == 'load':
+                for path in message[1]:
+                    load_lpi_module(path)
+                reply = (True, None)
+            else:
+                reply = (False, f"未知的命令: {command}")
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        try:
+            payload = pickle.dumps(reply, protocol=PICKLE_PROTOCOL)
+        except Exception as e:
+            payload = pickle.dumps((False, f"LPI结果无法序列化: {e}"), protocol=PICKLE_PROTOCOL)
+        conn.send_bytes(payload)
+
+class LpiWorker:
+    """进程池中的一个工作进程"""
+
+    def __init__(self, mp_context, preload_paths):
+        parent_conn, child_conn = mp_context.Pipe()
+        self.conn = parent_conn
+        self.process = mp_context.Process(
+            target=_worker_main, args=(child_conn, list(preload_paths)),
+            name='lpi-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # 已在该进程中导入的模块
+        self.loaded_paths = set(preload_paths)
+        self.ready = False
+
+    def wait_ready(self, timeout):
+        """等待工作进程启动完成，超时返回 False，进程异常退出时抛出 EOFError 或 OSError"""
+        if self.ready:
+            return True
+        if not self.conn.poll(timeout):
+            return False
+        pickle.loads(self.conn.recv_bytes())
+        self.ready = True
+        return True
+
+    def request(self, message, timeout):
+        """发送请求并等待回复，超时返回 None"""
+        self.conn.send_bytes(pickle.dumps(message, protocol=PICKLE_PROTOCOL))
+        if not self.conn.poll(timeout):
+            return None
+        return pickle.loads(self.conn.recv_bytes())
+
+    def kill(self):
+        """终止工作进程"""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(1)
+        self.conn.close()
+
+class LpiProcessPool:
+    """CPU密集型Python LPI的进程池
+
+    工作进程在首次使用（或预热）时一次性创建，并预先导入已知的LPI模块；调用
+    超时或工作进程异常退出时终止该进程并补充新的进程。
+    """
+
+    def __init__(self, size, default_timeout, start_method, boot_timeout=60):
+        self.size = size
+        self.default_timeout = default_timeout
+        self.start_method = start_method
+        self.boot_timeout = boot_timeout
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._preload_paths = set()
+        self._lock = threading.Lock()
+        self._started = False
+        self._stats = {'calls': 0, 'errors': 0, 'timeouts': 0, 'restarts': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _spawn(self):
+        worker = LpiWorker(multiprocessing.get_context(self.start_method), self._preload_paths)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker):
+        """终止工作进程并补充新的进程"""
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            self._stats['restarts'] += 1
+        self._idle.put(self._spawn())
+
+    def _ensure_ready(self, worker):
+        """等待工作进程启动完成，启动失败或超时时补充新的进程并抛出 LpiProcessError"""
+        try:
+            if worker.wait_ready(self.boot_timeout):
+                return
+        except (EOFError, OSError):
+            pass
+        self._count('errors')
+        self._replace(worker)
+        raise LpiProcessError("LPI工作进程启动失败")
+
+    def start(self):
+        """创建工作进程"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def preload(self, module_paths):
+        """在工作进程中预先导入模块，之后补充的进程启动时同样导入
+
+        每次只取出一个空闲的工作进程导入，不等待正在执行调用的进程，这些进程
+        在首次调用时按需导入。
+        """
+        new_paths = set(module_paths) - self._preload_paths
+        self._preload_paths |= new_paths
+        if not self._started:
+            self.start()
+            return
+        if not new_paths:
+            return
+        for _ in range(self.size):
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                self._ensure_ready(worker)
+            except LpiProcessError:
+                continue
+            missing = self._preload_paths - worker.loaded_paths
+            if missing:
+                try:
+                    reply = worker.request(('load', sorted(missing)), self.default_timeout)
+                except (EOFError, OSError):
+                    self._replace(worker)
+                    continue
+                if reply is None:
+                    self._replace(worker)
+                    continue
+                if reply[0]:
+                    worker.loaded_paths |= missing
+            self._idle.put(worker)
+
+    def call(self, module_path, function_name, input_data, timeout=None):
+        """在工作进程中调用LPI函数，等待空闲进程和执行调用共用 timeout 的时间预算
+
+        新创建或刚补充的工作进程先等待其启动完成，启动耗时不计入 timeout，避免
+        启动较慢时短超时的调用反复超时、反复重建进程。
+        """
+        if timeout is None:
+            timeout = self.default_timeout
+        deadline = time.monotonic() + timeout
+        self.start()
+        try:
+            worker = self._idle.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            self._count('timeouts')
+            raise LpiTimeoutError(f"等待空闲的LPI工作进程超时: {timeout}秒")
+
+        boot_started = time.monotonic()
+        self._ensure_ready(worker)
+        deadline += time.monotonic() - boot_started
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            self._idle.put(worker)
+            self._count('timeouts')
+            raise LpiTimeoutError(f"等待空闲的LPI工作进程超时: {timeout}秒")
+
+        self._count('calls')
+        try:
+            reply = worker.request(('call', module_path, function_name, input_data), remaining)
+        except (EOFError, OSError):
+            self._count('errors')
+            self._replace(worker)
+            raise LpiProcessError("LPI工作进程异常退出")
+        except Exception:
+            # 参数无法序列化，工作进程不受影响
+            self._idle.put(worker)
+            raise
+
+        if reply is None:
+            self._count('timeouts')
+            self._replace(worker)
+            raise LpiTimeoutError(f"LPI调用超时: {timeout}秒")
+
+        worker.loaded_paths.add(module_path)
+        self._idle.put(worker)
+        success, value = reply
+        if not success:
+            self._count('errors')
+            raise LpiFunctionError(value)
+        return value
+
+    def shutdown(self):
+        """终止所有工作进程"""
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+            self._started = False
+        for worker in workers:
+            worker.kill()
+        self._idle = queue.Queue()
+
+    def get_stats(self):
+        """获取进程池统计"""
+        with self._lock:
+            return dict(
+                self._stats,
+                size=self.size,
+                started=self._started,
+                idle=self._idle.qsize(),
+                preloaded_modules=sorted(self._preload_paths)
+            )
+
+lpi_process_pool = LpiProcessPool(
+    Config.LPI_PROCESS_POOL_SIZE, Config.LPI_PROCESS_DEFAULT_TIMEOUT, Config.LPI_PROCESS_START_METHOD,
+    Config.LPI_PROCESS_BOOT_TIMEOUT
+)
+atexit.register(lpi_process_pool.shutdown)
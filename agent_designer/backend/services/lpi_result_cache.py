@@ -0,0 +1,90 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+class LpiResultCache:
+    """幂等LPI的调用结果缓存
+
+    只缓存在 content 中声明 cacheable 的LPI。键为 (组件ID, 组件版本, 输入哈希)，
+    组件更新后版本变化，旧结果不会再被命中；update_lpi 同时显式清除该组件的
+    所有结果。结果以JSON文本保存，每次命中返回新的副本，下游节点修改结果
+    不会影响缓存。
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (过期时间, JSON文本)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0, 'uncacheable': 0}
+
+    def make_key(self, lpi_details, input_data):
+        """计算调用的缓存键，LPI未声明可缓存或输入无法序列化时返回None"""
+        if not lpi_details.get('cacheable'):
+            return None
+        try:
+            canonical = json.dumps(input_data, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        except (TypeError, ValueError):
+            self._count('uncacheable')
+            return None
+        digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        return (lpi_details.get('id'), lpi_details.get('version'), digest)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get(self, key):
+        """查询缓存，返回 (是否命中, 结果)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._stats['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+        return True, json.loads(entry[1])
+
+    def put(self, key, result, ttl=None):
+        """写入调用结果，结果无法序列化为JSON时不缓存"""
+        try:
+            text = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            self._count('uncacheable')
+            return
+        ttl = Config.LPI_RESULT_CACHE_DEFAULT_TTL if ttl is None else float(ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate_component(self, component_id):
+        """清除组件的所有缓存结果"""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == component_id]
+            for key in keys:
+                del self._entries[key]
+            self._stats['invalidations'] += len(keys)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_entries=self.max_entries)
+
+lpi_result_cache = LpiResultCache(Config.LPI_RESULT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,202 @@
+import asyncio
+import contextlib
+import contextvars
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from services.settings_service import load_settings
+from services.tracing import start_span
+
+try:
+    import aiohttp
+except ImportError:  # 未安装aiohttp时，异步调用退化为在线程池中执行同步请求
+    aiohttp = None
+
+# 传输层默认配置，可在设置文件的 lpi_transport 字段中覆盖
+DEFAULT_TRANSPORT_SETTINGS = {
+    'connect_timeout': 5,      # 建立连接超时（秒）
+    'read_timeout': 60,        # 读取响应超时（秒）
+    'pool_connections': 20,    # 缓存的主机连接池数量
+    'pool_maxsize': 20,        # 每个主机连接池的最大连接数
+    'pool_block': False,       # 连接池耗尽时是否等待空闲连接
+}
+
+_transport_lock = threading.Lock()
+_transport_settings = None
+_adapter = None
+_thread_local = threading.local()
+_generation = 0
+
+# 按主机统计：请求数、错误数、当前并发、峰值并发、连接池饱和次数、累计耗时
+_host_stats = {}
+
+# 当前异步运行共享的HTTP会话
+_async_session = contextvars.ContextVar('lpi_async_session', default=None)
+
+def get_transport_settings():
+    """获取传输层配置"""
+    global _transport_settings
+    if _transport_settings is None:
+        settings = dict(DEFAULT_TRANSPORT_SETTINGS)
+        settings.update(load_settings().get('lpi_transport') or {})
+        _transport_settings = settings
+    return _transport_settings
+
+def reset_transport():
+    """关闭现有连接池，下次请求时按最新设置重建"""
+    global _transport_settings, _adapter, _generation
+    with _transport_lock:
+        if _adapter is not None:
+            _adapter.close()
+        _adapter = None
+        _transport_settings = None
+        _generation += 1
+
+def _get_adapter():
+    """获取共享的连接池适配器"""
+    global _adapter
+    if _adapter is None:
+        with _transport_lock:
+            if _adapter is None:
+                settings = get_transport_settings()
+                _adapter = HTTPAdapter(
+                    pool_connections=settings['pool_connections'],
+                    pool_maxsize=settings['pool_maxsize'],
+                    pool_block=settings['pool_block']
+                )
+    return _adapter
+
+def _get_session():
+    """获取当前线程的会话，所有线程共享同一组连接池"""
+    session = getattr(_thread_local, 'session', None)
+    if session is None or _thread_local.generation != _generation:
+        adapter = _get_adapter()
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        _thread_local.session = session
+        _thread_local.generation = _generation
+    return session
+
+def get_timeout(timeout=None):
+    """获取 (连接超时, 读取超时)，timeout 可进一步收紧两者"""
+    settings = get_transport_settings()
+    connect_timeout = settings['connect_timeout']
+    read_timeout = settings['read_timeout']
+    if timeout is not None:
+        # 剩余时间为 0 时 requests 会视为不限时，保留一个极小的正值
+        timeout = max(timeout, 0.001)
+        connect_timeout = min(connect_timeout, timeout) if connect_timeout else timeout
+        read_timeout = min(read_timeout, timeout) if read_timeout else timeout
+    return connect_timeout, read_timeout
+
+@contextlib.contextmanager
+def _track(url):
+    """记录主机维度的并发和耗时统计"""
+    host = urlsplit(url).netloc
+    pool_maxsize = get_transport_settings()['pool_maxsize']
+    with _transport_lock:
+        stats = _host_stats.get(host)
+        if stats is None:
+            stats = _host_stats[host] = {
+                'requests': 0, 'errors': 0, 'in_flight': 0,
+                'max_in_flight': 0, 'saturated': 0, 'total_seconds': 0.0
+            }
+        if stats['in_flight'] >= pool_maxsize:
+            stats['saturated'] += 1
+        stats['requests'] += 1
+        stats['in_flight'] += 1
+        stats['max_in_flight'] = max(stats['max_in_flight'], stats['in_flight'])
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        with _transport_lock:
+            stats['errors'] += 1
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        with _transport_lock:
+            stats['in_flight'] -= 1
+            stats['total_seconds'] += elapsed
+
+def request(method, url, input_data, timeout=None):
+    """通过共享连接池发送请求，GET 以查询参数传递输入，其余方法以JSON请求体传递
+
+    请求记录为当前链路中的span，并通过 traceparent 请求头向下游传递链路。
+    """
+    with start_span('http.request', {'http.method': method.upper(), 'http.url': url}) as span:
+        response = _send(method, url, input_data, timeout, span.headers())
+        span.set_attribute('http.status_code', response.status_code)
+        return response
+
+def _send(method, url, input_data, timeout=None, headers=None):
+    session = _get_session()
+    with _track(url):
+        if method == 'get':
+            return session.get(url, params=input_data, timeout=get_timeout(timeout), headers=headers)
+        return session.post(url, json=input_data, timeout=get_timeout(timeout), headers=headers)
+
+@contextlib.asynccontextmanager
+async def async_session():
+    """为一次异步运行打开共享的HTTP会话，已有会话时直接复用"""
+    if aiohttp is None or _async_session.get() is not None:
+        yield
+        return
+
+    settings = get_transport_settings()
+    connector = aiohttp.TCPConnector(
+        limit=settings['pool_connections'] * settings['pool_maxsize'],
+        limit_per_host=settings['pool_maxsize']
+    )
+    client_timeout = aiohttp.ClientTimeout(
+        sock_connect=settings['connect_timeout'],
+        sock_read=settings['read_timeout']
+    )
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        token = _async_session.set(session)
+        try:
+            yield
+        finally:
+            _async_session.reset(token)
+
+async def request_async(method, url, input_data, timeout=None):
+    """异步发送请求，返回 (状态码, 响应文本)"""
+    with start_span('http.request', {'http.method': method.upper(), 'http.url': url}) as span:
+        status_code, text = await _send_async(method, url, input_data, timeout, span.headers())
+        span.set_attribute('http.status_code', status_code)
+        return status_code, text
+
+async def _send_async(method, url, input_data, timeout=None, headers=None):
+    session = _async_session.get()
+
+    if session is None:
+        def send():
+            response = _send(method, url, input_data, timeout, headers)
+            return response.status_code, response.text
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, send)
+
+    request_kwargs = {'headers': headers}
+    if timeout is not None:
+        request_kwargs['timeout'] = aiohttp.ClientTimeout(total=timeout)
+    if method == 'get':
+        request_context = session.get(url, params=input_data, **request_kwargs)
+    else:
+        request_context = session.post(url, json=input_data, **request_kwargs)
+
+    with _track(url):
+        async with request_context as response:
+            return response.status, await response.text()
+
+def get_transport_stats():
+    """获取传输层统计"""
+    settings = get_transport_settings()
+    with _transport_lock:
+        hosts = {host: dict(stats) for host, stats in _host_stats.items()}
+    for stats in hosts.values():
+        stats['pool_utilization'] = stats['in_flight'] / settings['pool_maxsize'] if settings['pool_maxsize'] else 0
+    return {'settings': dict(settings), 'hosts': hosts}
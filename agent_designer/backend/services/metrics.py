@@ -0,0 +1,240 @@
+import bisect
+import threading
+import time
+import weakref
+from config import Config
+from services.run_context import WorkflowCancelledError, WorkflowDeadlineExceededError
+
+class _Shard:
+    """单个线程的指标数据，只由该线程写入"""
+    __slots__ = ('values', '__weakref__')
+
+    def __init__(self):
+        self.values = {}  # (指标, 标签值) -> 数值，直方图为 [各桶计数..., +Inf桶计数, 总和]
+
+def _merge(totals, values):
+    for key, value in values.items():
+        if isinstance(value, list):
+            total = totals.get(key)
+            if total is None:
+                totals[key] = list(value)
+            else:
+                for index, item in enumerate(value):
+                    total[index] += item
+        else:
+            totals[key] = totals.get(key, 0) + value
+
+class MetricsRegistry:
+    """进程内的指标注册表
+
+    每个线程只写自己的分片，记录指标时不加锁；导出时汇总所有分片。线程结束
+    后其分片合并到已退出线程的汇总中，分片数不随线程创建无限增长。
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+        self._shards = weakref.WeakSet()
+        self._retired = {}
+        self._lock = threading.RLock()
+
+    def values(self):
+        """当前线程的分片"""
+        try:
+            return self._local.shard.values
+        except AttributeError:
+            shard = _Shard()
+            with self._lock:
+                self._shards.add(shard)
+            weakref.finalize(shard, self._retire, shard.values)
+            self._local.shard = shard
+            return shard.values
+
+    def _retire(self, values):
+        with self._lock:
+            _merge(self._retired, values)
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(self, name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(self, name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=None):
+        return self.register(Histogram(self, name, help_text, labelnames, buckets or Config.METRICS_LATENCY_BUCKETS))
+
+    def collect(self):
+        """汇总所有线程的指标"""
+        with self._lock:
+            snapshots = [dict(self._retired)]
+            snapshots.extend(shard.values.copy() for shard in list(self._shards))
+        totals = {}
+        for snapshot in snapshots:
+            _merge(totals, snapshot)
+        return totals
+
+    def render(self):
+        """导出为 Prometheus 文本格式"""
+        samples = {}
+        for (metric, labels), value in self.collect().items():
+            samples.setdefault(metric, []).append((labels, value))
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for labels, value in sorted(samples.get(metric, ()), key=lambda sample: sample[0]):
+                metric.render(labels, value, lines)
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+class Counter:
+    """只增不减的计数器"""
+    type = 'counter'
+
+    def __init__(self, registry, name, help_text, labelnames):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def inc(self, labels=(), amount=1):
+        """增加计数，labels 为按 labelnames 顺序排列的标签值"""
+        values = self.registry.values()
+        key = (self, labels)
+        values[key] = values.get(key, 0) + amount
+
+    def render(self, labels, value, lines):
+        lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+
+class Gauge(Counter):
+    """可增可减的当前值（如正在执行的数量）"""
+    type = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+class Histogram:
+    """按预设的桶统计分布"""
+    type = 'histogram'
+
+    def __init__(self, registry, name, help_text, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, labels, value):
+        values = self.registry.values()
+        key = (self, labels)
+        entry = values.get(key)
+        if entry is None:
+            entry = values[key] = [0] * (len(self.buckets) + 2)
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def render(self, labels, entry, lines):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), entry):
+            cumulative += count
+            le = f'le="{_format_value(float(bound))}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f"{self.name}_sum{label_text} {_format_value(entry[-1])}")
+        lines.append(f"{self.name}_count{label_text} {cumulative}")
+
+registry = MetricsRegistry()
+
+WORKFLOW_RUNS = registry.counter(
+    'agent_designer_workflow_runs_total', '工作流运行次数', ('workflow_id', 'mode', 'status'))
+WORKFLOW_DURATION = registry.histogram(
+    'agent_designer_workflow_duration_seconds', '工作流运行耗时', ('workflow_id', 'mode'))
+WORKFLOWS_IN_FLIGHT = registry.gauge(
+    'agent_designer_workflows_in_flight', '正在执行的工作流运行数', ('mode',))
+NODE_DURATION = registry.histogram(
+    'agent_designer_node_duration_seconds', '节点执行耗时', ('workflow_id', 'node_id', 'node_type'))
+NODE_ERRORS = registry.counter(
+    'agent_designer_node_errors_total', '节点执行失败次数', ('workflow_id', 'node_id', 'node_type'))
+NODES_IN_FLIGHT = registry.gauge(
+    'agent_designer_nodes_in_flight', '正在执行的节点数', ('node_type',))
+COMPONENT_DURATION = registry.histogram(
+    'agent_designer_component_duration_seconds', '组件节点执行耗时', ('component_type', 'component_id'))
+LPI_CALLS = registry.counter(
+    'agent_designer_lpi_calls_total', 'LPI调用次数（每次重试单独计数）', ('component_id', 'outcome'))
+
+def _run_status(exc_type):
+    if exc_type is None:
+        return 'succeeded'
+    if issubclass(exc_type, WorkflowDeadlineExceededError):
+        return 'timeout'
+    if issubclass(exc_type, (WorkflowCancelledError, GeneratorExit)):
+        return 'cancelled'
+    return 'failed'
+
+class RunTimer:
+    """记录一次工作流运行的耗时、结果和并发数"""
+    __slots__ = ('labels', 'mode', 'started')
+
+    def __init__(self, workflow_id, mode):
+        self.labels = (str(workflow_id), mode)
+        self.mode = (mode,)
+
+    def __enter__(self):
+        WORKFLOWS_IN_FLIGHT.inc(self.mode)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        WORKFLOW_DURATION.observe(self.labels, time.perf_counter() - self.started)
+        WORKFLOWS_IN_FLIGHT.dec(self.mode)
+        WORKFLOW_RUNS.inc(self.labels + (_run_status(exc_type),))
+        return False
+
+class NodeTimer:
+    """记录一个节点执行的耗时、错误和并发数，elapsed 为耗时（秒）"""
+    __slots__ = ('node_labels', 'component_labels', 'node_type', 'started', 'elapsed')
+
+    def __init__(self, plan, node):
+        node_type = node.get('type') or ''
+        self.node_type = (node_type,)
+        self.node_labels = (str(plan.workflow_id), str(node.get('id')), node_type)
+        component_id = (node.get('data') or {}).get('component_id')
+        self.component_labels = (node_type, str(component_id)) if component_id else None
+
+    def __enter__(self):
+        NODES_IN_FLIGHT.inc(self.node_type)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self.started
+        NODES_IN_FLIGHT.dec(self.node_type)
+        NODE_DURATION.observe(self.node_labels, self.elapsed)
+        if self.component_labels:
+            COMPONENT_DURATION.observe(self.component_labels, self.elapsed)
+        if exc_type is not None and not issubclass(exc_type, WorkflowCancelledError):
+            NODE_ERRORS.inc(self.node_labels)
+        return False
+
+def count_lpi_call(lpi_details, outcome):
+    """记录一次LPI调用，outcome 为 success、error 或 cache_hit"""
+    LPI_CALLS.inc((str(lpi_details.get('id')), outcome))
@@ -0,0 +1,279 @@
+import asyncio
+import random
+import threading
+import time
+import requests
+from config import Config
+from services.bulkhead import BulkheadError
+from services.lpi_process_pool import LpiProcessError, LpiFunctionError
+from services.run_context import WorkflowCancelledError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# 计为下游故障的异常：传输层错误、超时和工作进程异常退出；LPI函数自身抛出的异常
+# （多为输入有误）与下游是否可用无关，不计入
+DOWNSTREAM_ERRORS = (
+    requests.RequestException, ConnectionError, TimeoutError, asyncio.TimeoutError, LpiProcessError
+) + ((aiohttp.ClientError,) if aiohttp is not None else ())
+
+class LpiCallError(Exception):
+    """LPI或外部服务调用返回了错误响应"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self):
+        # 4xx 表示请求本身有问题，重试不会成功，也不代表下游不可用
+        return self.status_code is None or self.status_code >= 500
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，调用被直接拒绝"""
+    pass
+
+class ResiliencePolicy:
+    """单个LPI或外部调用的容错策略
+
+    content 中的 timeout 为单次调用超时；resilience 字段可配置：
+      retries           失败后的重试次数，只对幂等调用生效
+      backoff_base      重试等待的基数（秒），按指数增长并加入随机抖动
+      backoff_max       单次重试等待的上限（秒）
+      idempotent        调用是否幂等，未指定时可缓存的LPI和GET请求视为幂等
+      failure_threshold 连续失败多少次后熔断
+      reset_timeout     熔断后多久（秒）放行一次探测调用
+    """
+
+    def __init__(self, timeout=None, retries=0, backoff_base=None, backoff_max=None,
+                 idempotent=False, failure_threshold=None, reset_timeout=None):
+        self.timeout = timeout
+        self.retries = max(0, int(retries or 0))
+        self.backoff_base = Config.LPI_RETRY_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.LPI_RETRY_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.idempotent = idempotent
+        self.failure_threshold = failure_threshold or Config.LPI_BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = Config.LPI_BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+
+    @classmethod
+    def from_config(cls, config, default_idempotent=False):
+        """从LPI详情或外部调用配置中读取策略"""
+        options = config.get('resilience') or {}
+        idempotent = options.get('idempotent')
+        return cls(
+            timeout=config.get('timeout'),
+            retries=options.get('retries', 0),
+            backoff_base=options.get('backoff_base'),
+            backoff_max=options.get('backoff_max'),
+            idempotent=default_idempotent if idempotent is None else bool(idempotent),
+            failure_threshold=options.get('failure_threshold'),
+            reset_timeout=options.get('reset_timeout')
+        )
+
+    def backoff(self, attempt):
+        """第 attempt 次重试前的等待时间（全抖动指数退避）"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+class CircuitBreaker:
+    """熔断器
+
+    closed：正常放行，连续失败达到阈值后转为 open；
+    open：直接拒绝调用，经过 reset_timeout 后转为 half_open；
+    half_open：只放行一次探测调用，成功则恢复 closed，失败则重新 open。
+    """
+
+    def __init__(self, key, failure_threshold, reset_timeout):
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self.last_error = None
+
+    def before_call(self):
+        """调用前检查熔断状态，不允许调用时抛出 CircuitOpenError"""
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._probing = False
+            if self.state == 'closed':
+                return
+            if self.state == 'half_open' and not self._probing:
+                self._probing = True
+                return
+            self._stats['rejected'] += 1
+        raise CircuitOpenError(f"调用已熔断: {self.key}")
+
+    def cancel_probe(self):
+        """调用未实际发出，释放半开状态的探测机会"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self.state = 'closed'
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self, error):
+        with self._lock:
+            self._stats['failures'] += 1
+            self.failures += 1
+            self.last_error = str(error)
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self._stats['opened'] += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def to_dict(self):
+        with self._lock:
+            return dict(
+                self._stats,
+                state=self.state,
+                consecutive_failures=self.failures,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                last_error=self.last_error
+            )
+
+def lpi_breaker_key(component_id):
+    """LPI组件的熔断器键"""
+    return f"lpi:{component_id}"
+
+def external_breaker_key(url):
+    """外部调用的熔断器键"""
+    return f"external:{url}"
+
+# 进程内共享的熔断器：key -> CircuitBreaker
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(key, policy):
+    """获取熔断器，阈值随策略更新"""
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = _breakers[key] = CircuitBreaker(key, policy.failure_threshold, policy.reset_timeout)
+    breaker.failure_threshold = policy.failure_threshold
+    breaker.reset_timeout = policy.reset_timeout
+    return breaker
+
+def reset_breaker(key):
+    """移除熔断器（组件配置变化时调用）"""
+    with _breakers_lock:
+        _breakers.pop(key, None)
+
+def get_breaker_stats():
+    """获取所有熔断器的状态"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.key: breaker.to_dict() for breaker in breakers}
+
+def _is_failure(error):
+    """是否计为下游故障"""
+    if isinstance(error, LpiCallError):
+        return error.retryable
+    if isinstance(error, LpiFunctionError):
+        return False
+    return isinstance(error, DOWNSTREAM_ERRORS)
+
+def _record_non_failure(breaker, error):
+    # 4xx 说明下游可用；其他异常（如Python LPI因输入有误抛出）不改变熔断状态
+    if isinstance(error, LpiCallError):
+        breaker.record_success()
+    else:
+        breaker.cancel_probe()
+
+def _backoff_delay(policy, attempt, context):
+    """重试前的等待时间，不超过运行剩余的时间预算"""
+    delay = policy.backoff(attempt)
+    remaining = context.remaining() if context is not None else None
+    return delay if remaining is None else min(delay, remaining)
+
+def call_with_resilience(key, policy, func, context=None):
+    """按策略执行调用：熔断检查、失败重试
+
+    context 为运行上下文时，重试等待不超过剩余的时间预算，等待期间运行被取消或
+    超时则不再重试。
+    """
+    breaker = get_breaker(key, policy)
+    attempt = 0
+    last_error = None
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            # 重试过程中熔断时，返回导致熔断的错误
+            if last_error is not None:
+                raise last_error
+            raise
+        try:
+            result = func()
+        except (BulkheadError, WorkflowCancelledError):
+            # 本地限流拒绝或运行已取消的调用没有到达下游，不影响熔断状态，也不重试
+            breaker.cancel_probe()
+            raise
+        except Exception as e:
+            if not _is_failure(e):
+                _record_non_failure(breaker, e)
+                raise
+            breaker.record_failure(e)
+            if attempt >= policy.retries or not policy.idempotent:
+                raise
+            last_error = e
+            delay = _backoff_delay(policy, attempt, context)
+            if context is None:
+                time.sleep(delay)
+            else:
+                context.wait(delay)
+                context.check()
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
+
+async def call_with_resilience_async(key, policy, func, context=None):
+    """call_with_resilience 的异步版本，func 返回协程"""
+    breaker = get_breaker(key, policy)
+    attempt = 0
+    last_error = None
+    while True:
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            # 重试过程中熔断时，返回导致熔断的错误
+            if last_error is not None:
+                raise last_error
+            raise
+        try:
+            result = await func()
+        except (BulkheadError, WorkflowCancelledError):
+            # 本地限流拒绝或运行已取消的调用没有到达下游，不影响熔断状态，也不重试
+            breaker.cancel_probe()
+            raise
+        except Exception as e:
+            if not _is_failure(e):
+                _record_non_failure(breaker, e)
+                raise
+            breaker.record_failure(e)
+            if attempt >= policy.retries or not policy.idempotent:
+                raise
+            last_error = e
+            await asyncio.sleep(_backoff_delay(policy, attempt, context))
+            if context is not None:
+                context.check()
+            attempt += 1
+            continue
+        breaker.record_success()
+        return result
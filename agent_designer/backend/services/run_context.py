@@ -0,0 +1,79 @@
+import threading
+import time
+
+class WorkflowCancelledError(Exception):
+    """工作流运行已被取消"""
+    pass
+
+class WorkflowDeadlineExceededError(WorkflowCancelledError):
+    """工作流运行超过了截止时间"""
+    pass
+
+class RunContext:
+    """一次工作流运行的上下文
+
+    包含运行所需的只读数据快照、取消信号和截止时间，嵌套的Agent工作流与顶层
+    运行共享同一个上下文，因此共享同一个时间预算。
+
+    child 派生的子范围共享快照和截止时间，但有自己的取消信号：取消子范围不影响
+    上层，上层被取消时子范围同样视为已取消。
+    """
+
+    # 子范围等待期间检查上层是否被取消的间隔（秒）
+    WAIT_INTERVAL = 0.1
+
+    def __init__(self, snapshot, cancel_event=None, timeout=None):
+        self.snapshot = snapshot
+        self.cancel_event = cancel_event or threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.parent = None
+
+    def child(self, timeout=None):
+        """派生子取消范围，timeout 为子范围自己的时间预算，不超过上层的截止时间"""
+        scope = RunContext(self.snapshot, timeout=timeout)
+        if self.deadline is not None and (scope.deadline is None or self.deadline < scope.deadline):
+            scope.deadline = self.deadline
+        scope.parent = self
+        return scope
+
+    def cancel(self):
+        """请求取消运行（子范围只取消自身）"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    def wait(self, timeout):
+        """等待 timeout 秒，运行被取消时提前返回"""
+        if self.parent is None:
+            self.cancel_event.wait(timeout)
+            return
+        deadline = time.monotonic() + timeout
+        while not self.cancelled:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self.cancel_event.wait(min(remaining, self.WAIT_INTERVAL))
+
+    def remaining(self):
+        """剩余的时间预算（秒），没有截止时间时返回 None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def call_timeout(self, timeout=None):
+        """单次调用的超时：调用自身的超时与剩余时间预算中较小的一个"""
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def check(self):
+        """运行已被取消或超过截止时间时抛出异常"""
+        if self.cancelled:
+            raise WorkflowCancelledError("工作流运行已取消")
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise WorkflowDeadlineExceededError("工作流运行超时")
@@ -0,0 +1,285 @@
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from config import Config
+from services.run_context import WorkflowCancelledError
+
+# 当前线程（或协程）中正在执行的span
+_current_span = contextvars.ContextVar('agent_designer_current_span', default=None)
+
+class Span:
+    """执行链路中的一段操作
+
+    同一次顶层运行中的span共享 trace_id，parent_id 指向外层的span。
+    """
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes', 'start_time', 'started',
+                 'duration', 'status', 'error')
+
+    def __init__(self, trace_id, parent_id, name, attributes):
+        self.trace_id = trace_id
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.status = 'ok'
+        self.error = None
+
+    @property
+    def sampled(self):
+        return True
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def headers(self):
+        """向下游传递的 W3C Trace Context 请求头"""
+        return {'traceparent': f"00-{self.trace_id}-{self.span_id}-01"}
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration_ms': round(self.duration * 1000, 3),
+            'status': self.status,
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+class _UnsampledSpan:
+    """未记录的span：追踪关闭或运行未被采样时使用，嵌套的span同样不记录"""
+    __slots__ = ()
+    trace_id = None
+    sampled = False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def headers(self):
+        return None
+
+UNSAMPLED_SPAN = _UnsampledSpan()
+
+class _SpanScope:
+    """span 的作用范围，退出时记录耗时和状态并提交导出"""
+    __slots__ = ('span', 'activate', 'token')
+
+    def __init__(self, span, activate=True):
+        self.span = span
+        self.activate = activate
+        self.token = None
+
+    def __enter__(self):
+        if self.activate:
+            self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.token is not None:
+            _current_span.reset(self.token)
+        span = self.span
+        if span.sampled:
+            finish_span(span, exc_type, exc)
+        return False
+
+class _DisabledScope:
+    """追踪关闭时的空作用范围"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return UNSAMPLED_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_DISABLED_SCOPE = _DisabledScope()
+
+def current_span():
+    """当前的span，不在任何span中时返回 None"""
+    return _current_span.get()
+
+def start_span(name, attributes=None, activate=True):
+    """开始一个span，用作上下文管理器
+
+    在已有span中开始时作为其子span，否则开始一个新的链路（按采样比例决定是否
+    记录）。activate 为 False 时不设为当前span，由调用方通过 use_span 在需要时
+    激活（如跨越 yield 的生成器）。
+    """
+    if not Config.TRACING_ENABLED:
+        return _DISABLED_SCOPE
+    parent = _current_span.get()
+    if parent is None:
+        if random.random() >= Config.TRACING_SAMPLE_RATE:
+            return _SpanScope(UNSAMPLED_SPAN, activate)
+        span = Span('%032x' % random.getrandbits(128), None, name, attributes or {})
+    elif not parent.sampled:
+        return _DISABLED_SCOPE
+    else:
+        span = Span(parent.trace_id, parent.span_id, name, attributes or {})
+    return _SpanScope(span, activate)
+
+class use_span:
+    """在作用范围内将已开始的span设为当前span"""
+    __slots__ = ('span', 'token')
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        return False
+
+def iter_in_span(span, iterable):
+    """迭代生成器，每次取值时将 span 设为当前span
+
+    生成器在 yield 之间会回到调用方执行，不能在整个迭代期间保持当前span。
+    """
+    iterator = iter(iterable)
+    while True:
+        with use_span(span):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def node_span(plan, node):
+    """节点执行的span"""
+    node_type = node.get('type') or ''
+    node_data = node.get('data') or {}
+    return start_span(f"node.{node_type}", {
+        'workflow_id': plan.workflow_id,
+        'node_id': node.get('id'),
+        'node_name': node_data.get('name'),
+        'component_id': node_data.get('component_id')
+    })
+
+def finish_span(span, exc_type=None, exc=None):
+    """结束span并提交导出"""
+    span.duration = time.perf_counter() - span.started
+    if exc_type is not None:
+        if issubclass(exc_type, (WorkflowCancelledError, GeneratorExit)):
+            span.status = 'cancelled'
+        else:
+            span.status = 'error'
+        span.error = str(exc) if exc is not None else exc_type.__name__
+    span_processor.submit(span)
+
+class SpanExporter:
+    """span 导出器接口，export 在后台线程中以一批span的字典列表调用"""
+
+    def export(self, spans):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+class JsonLinesExporter(SpanExporter):
+    """将span以JSON行追加写入本地文件"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, spans):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(span, ensure_ascii=False, default=str) + '\n' for span in spans))
+
+# 导出方式名称 -> 创建导出器的函数，Config.TRACING_EXPORTER 从中选择
+EXPORTERS = {
+    'jsonl': lambda: JsonLinesExporter(Config.TRACING_EXPORT_PATH)
+}
+
+def register_exporter(name, factory):
+    """注册自定义的导出方式"""
+    EXPORTERS[name] = factory
+
+class SpanProcessor:
+    """span 的后台导出线程
+
+    结束的span进入内存队列，由导出线程批量交给导出器，执行线程不等待导出。
+    队列已满时丢弃新的span，导出失败只计数，不影响工作流运行。
+    """
+
+    def __init__(self, batch_size, max_queue):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(max_queue)
+        self._exporter = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {'exported': 0, 'batches': 0, 'dropped': 0, 'errors': 0}
+
+    def set_exporter(self, exporter):
+        """替换导出器，None 表示按配置重新创建"""
+        self.flush()
+        with self._lock:
+            previous, self._exporter = self._exporter, exporter
+        if previous is not None and previous is not exporter:
+            previous.shutdown()
+
+    def _get_exporter(self):
+        if self._exporter is None:
+            with self._lock:
+                if self._exporter is None:
+                    factory = EXPORTERS.get(Config.TRACING_EXPORTER)
+                    if factory is None:
+                        raise ValueError(f"不支持的span导出方式: {Config.TRACING_EXPORTER}")
+                    self._exporter = factory()
+        return self._exporter
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                    self._thread.start()
+
+    def submit(self, span):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self._stats['dropped'] += 1
+
+    def flush(self):
+        """等待已提交的span全部导出"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._get_exporter().export([span.to_dict() for span in batch])
+                self._stats['exported'] += len(batch)
+                self._stats['batches'] += 1
+            except Exception:
+                self._stats['errors'] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def get_stats(self):
+        return dict(self._stats, pending=self._queue.qsize(), enabled=Config.TRACING_ENABLED)
+
+span_processor = SpanProcessor(Config.TRACING_BATCH_SIZE, Config.TRACING_MAX_QUEUE)
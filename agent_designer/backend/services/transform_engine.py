@@ -0,0 +1,215 @@
+import re
+import threading
+from itertools import chain
+
+class PathError(ValueError):
+    """路径语法错误"""
+    pass
+
+# JSONPath 的路径片段：通配符、下标、切片、带引号的键、.key
+_SEGMENT = re.compile(r"""
+    (?P<wildcard>\.\*|\[\*\])
+  | \[(?P<index>-?\d+)\]
+  | \[(?P<slice>-?\d*:-?\d*(?::-?\d*)?)\]
+  | \[(?P<quote>['"])(?P<quoted>(?:\\.|(?!(?P=quote)).)*)(?P=quote)\]
+  | (?P<dot>\.)?(?P<key>[^.\[\]]+)
+""", re.X)
+
+# 取值失败的标记（与值为 None 区分，投影时跳过）
+_MISSING = object()
+
+def is_jsonpath(path):
+    """以 $. 或 $[ 开头的路径按 JSONPath 解析"""
+    return path.startswith(('$.', '$['))
+
+def parse_path(path):
+    """解析路径为步骤列表
+
+    普通路径按点号分隔为键（a.b.c），与原有行为一致，任何字符串都是有效的
+    点号路径。以 $. 或 $[ 开头的路径按 JSONPath 子集解析：.key、['key']、[0]、
+    [-1]、[start:stop:step] 切片、[*] 和 .* 通配符，语法错误时抛出 PathError。
+    通配符和切片之后的步骤对每个元素分别取值，结果投影为列表。
+    """
+    if not is_jsonpath(path):
+        return [('key', key) for key in path.split('.')]
+    text = path[1:]
+    steps = []
+    pos = 0
+    while pos < len(text):
+        match = _SEGMENT.match(text, pos)
+        if match is None or (match.group('key') is not None and not match.group('dot')):
+            raise PathError(f"无效的路径: {path}")
+        if match.group('wildcard'):
+            steps.append(('wildcard', None))
+        elif match.group('index') is not None:
+            steps.append(('index', int(match.group('index'))))
+        elif match.group('slice') is not None:
+            bounds = [int(part) if part else None for part in match.group('slice').split(':')]
+            if len(bounds) == 3 and bounds[2] == 0:
+                raise PathError(f"切片步长不能为0: {path}")
+            steps.append(('slice', slice(*bounds)))
+        elif match.group('quote'):
+            steps.append(('key', re.sub(r'\\(.)', r'\1', match.group('quoted'))))
+        else:
+            steps.append(('key', match.group('key')))
+        pos = match.end()
+    return steps
+
+def _compile_multi(steps):
+    """编译投影部分：返回 值 -> 取到的值的可迭代对象"""
+    if not steps:
+        return lambda value: (value,)
+    kind, arg = steps[0]
+    rest = _compile_multi(steps[1:])
+
+    if kind == 'key':
+        def get_key(value):
+            if isinstance(value, dict) and arg in value:
+                return rest(value[arg])
+            return ()
+        return get_key
+
+    if kind == 'index':
+        def get_index(value):
+            if isinstance(value, list) and -len(value) <= arg < len(value):
+                return rest(value[arg])
+            return ()
+        return get_index
+
+    if kind == 'slice':
+        def get_slice(value):
+            if isinstance(value, list):
+                return chain.from_iterable(map(rest, value[arg]))
+            return ()
+        return get_slice
+
+    def get_all(value):
+        if isinstance(value, dict):
+            return chain.from_iterable(map(rest, value.values()))
+        if isinstance(value, list):
+            return chain.from_iterable(map(rest, value))
+        return ()
+    return get_all
+
+def _compile_single(steps):
+    """编译单值部分：返回 值 -> 取到的值或 _MISSING"""
+    if not steps:
+        return lambda value: value
+    kind, arg = steps[0]
+
+    if kind in ('wildcard', 'slice'):
+        project = _compile_multi(steps)
+        return lambda value: list(project(value))
+
+    # 连续的键直接循环取值，不逐层调用
+    if kind == 'key':
+        keys = []
+        while steps and steps[0][0] == 'key':
+            keys.append(steps[0][1])
+            steps = steps[1:]
+        keys = tuple(keys)
+        rest = _compile_single(steps)
+
+        def get_keys(value):
+            for key in keys:
+                if isinstance(value, dict) and key in value:
+                    value = value[key]
+                else:
+                    return _MISSING
+            return rest(value)
+        return get_keys
+
+    rest = _compile_single(steps[1:])
+
+    def get_index(value):
+        if isinstance(value, list) and -len(value) <= arg < len(value):
+            return rest(value[arg])
+        return _MISSING
+    return get_index
+
+def _compile_keys(keys):
+    """只由键组成的路径（最常见的情况）编译为单个循环"""
+    if len(keys) == 1:
+        key = keys[0]
+
+        def get_key(value):
+            return value.get(key) if isinstance(value, dict) else None
+        return get_key
+
+    def get_keys(value):
+        try:
+            for key in keys:
+                value = value[key]
+        except (KeyError, TypeError, IndexError):
+            # 键不存在或中间值不是字典（键都是字符串，列表和字符串取值时抛出 TypeError）
+            return None
+        return value
+    return get_keys
+
+def compile_path(path):
+    """编译路径为取值函数，路径不存在时取值结果为 None"""
+    steps = parse_path(path)
+    if all(kind == 'key' for kind, _ in steps):
+        return _compile_keys(tuple(key for _, key in steps))
+    getter = _compile_single(steps)
+
+    def get(value):
+        value = getter(value)
+        return None if value is _MISSING else value
+    return get
+
+class CompiledTransform:
+    """编译后的数据转换配置
+
+    map 的每个源路径编译为取值函数，filter 的字段列表转换为元组，执行时不再
+    解析配置。
+    """
+
+    def __init__(self, config):
+        self.transform_type = config.get('transform_type')
+        self.getters = ()
+        self.fields = ()
+        if self.transform_type == 'map':
+            self.getters = tuple(
+                (target_key, compile_path(source_path))
+                for target_key, source_path in (config.get('mapping') or {}).items()
+            )
+        elif self.transform_type == 'filter':
+            self.fields = tuple(config.get('fields') or ())
+
+    def __call__(self, input_data):
+        if self.transform_type == 'map':
+            return {target_key: get(input_data) for target_key, get in self.getters}
+        if self.transform_type == 'filter':
+            return {field: input_data[field] for field in self.fields if field in input_data}
+        return input_data
+
+# 编译缓存：组件ID -> (组件版本, CompiledTransform)，组件更新后版本变化时重新编译
+_transform_cache = {}
+_transform_cache_lock = threading.Lock()
+_transform_stats = {'hits': 0, 'compiles': 0}
+
+def get_compiled_transform(component_details):
+    """获取组件的编译后转换配置，同一组件版本只编译一次"""
+    component_id = component_details.get('id')
+    version = component_details.get('version')
+    cached = _transform_cache.get(component_id)
+    if cached is not None and cached[0] == version:
+        _transform_stats['hits'] += 1
+        return cached[1]
+
+    transform = CompiledTransform(component_details.get('config', {}))
+    with _transform_cache_lock:
+        _transform_cache[component_id] = (version, transform)
+        _transform_stats['compiles'] += 1
+    return transform
+
+def validate_transform_config(config):
+    """校验转换配置中的 JSONPath 路径，路径无效时抛出 PathError"""
+    if config.get('transform_type') == 'map':
+        for source_path in (config.get('mapping') or {}).values():
+            parse_path(source_path)
+
+def get_transform_stats():
+    """获取转换配置编译缓存统计"""
+    return dict(_transform_stats, size=len(_transform_cache))
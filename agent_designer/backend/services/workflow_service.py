@@ -1,17 +1,47 @@
 from models.workflow import Workflow
 from models.component import Component
 from models import db
+from config import Config
+from services import lpi_transport
+from services.agent_index import refresh_agent_pointer, invalidate_agent_pointer
+from services.dag_scheduler import DagScheduler, dag_final_result
+from services.execution_plan import invalidate_execution_plan, compile_workflow, get_execution_plan
+from services.execution_snapshot import build_execution_snapshot
+from services.execution_trace import ExecutionTrace
+from services.checkpoint_store import RunCheckpoint, CheckpointError, load_checkpoint
+from services.run_context import RunContext, WorkflowCancelledError, WorkflowDeadlineExceededError
+from services.lpi_loader import load_lpi_function
+from services.metrics import RunTimer, NodeTimer, count_lpi_call
+from services.tracing import start_span, node_span, iter_in_span
+from services.lpi_result_cache import lpi_result_cache
+from services.lpi_process_pool import lpi_process_pool
+from services.bulkhead import resolve_bulkhead
+from services.resilience import (
+    ResiliencePolicy, LpiCallError, call_with_resilience, lpi_breaker_key, external_breaker_key
+)
+from services.expression_engine import evaluate_expression, validate_expression, ExpressionError
+from services.transform_engine import get_compiled_transform
+import asyncio
+import inspect
 import json
-import requests
-import importlib.util
-import sys
-from pathlib import Path
+import os
 
 def get_workflow_detail(workflow_id):
     """获取工作流详情"""
     workflow = Workflow.query.get_or_404(workflow_id)
     return workflow.to_dict()
 
+def validate_workflow_conditions(edges):
+    """校验工作流中所有边的条件表达式"""
+    for edge in edges:
+        condition = (edge.get('data') or {}).get('condition')
+        if not condition:
+            continue
+        try:
+            validate_expression(condition)
+        except ExpressionError as e:
+            raise ValueError(f"边 {edge.get('id')} 的条件表达式无效: {e}")
+
 def create_workflow(data):
     """创建工作流"""
     workflow = Workflow(
@@ -24,6 +54,7 @@ def create_workflow(data):
     if 'nodes' in data:
         workflow.nodes_obj = data['nodes']
     if 'edges' in data:
+        validate_workflow_conditions(data['edges'])
         workflow.edges_obj = data['edges']
     
     db.session.add(workflow)
@@ -42,13 +73,44 @@ def update_workflow(workflow_id, data):
     if 'nodes' in data:
         workflow.nodes_obj = data['nodes']
     if 'edges' in data:
+        validate_workflow_conditions(data['edges'])
         workflow.edges_obj = data['edges']
+    if 'nodes' in data or 'edges' in data:
+        # 结构变化后发布时的编译结果失效，下次发布时重新编译
+        workflow.compiled_plan = None
     if 'status' in data:
         workflow.status = data['status']
     if 'version' in data:
         workflow.version = data['version']
+    if 'status' in data or 'version' in data:
+        refresh_agent_pointer(workflow.agent_id)
     
     db.session.commit()
+    invalidate_execution_plan(workflow.id)
+    invalidate_agent_pointer(workflow.agent_id)
+    
+    return workflow
+
+def publish_workflow(workflow_id):
+    """发布工作流"""
+    workflow = Workflow.query.get_or_404(workflow_id)
+    validate_workflow_conditions(workflow.edges_obj)
+    
+    # 更新版本号
+    version_parts = workflow.version.split('.')
+    version_parts[-1] = str(int(version_parts[-1]) + 1)
+    version = '.'.join(version_parts)
+    
+    # 校验工作流结构并保存编译后的执行计划，运行时直接加载
+    compiled_plan = compile_workflow(workflow, version)
+    workflow.status = 'published'
+    workflow.version = version
+    workflow.compiled_plan = compiled_plan
+    refresh_agent_pointer(workflow.agent_id)
+    
+    db.session.commit()
+    invalidate_execution_plan(workflow.id)
+    invalidate_agent_pointer(workflow.agent_id)
     
     return workflow
 
@@ -56,60 +118,288 @@ def delete_workflow(workflow_id):
     """删除工作流"""
     workflow = Workflow.query.get_or_404(workflow_id)
     db.session.delete(workflow)
+    db.session.flush()
+    refresh_agent_pointer(workflow.agent_id)
     db.session.commit()
+    invalidate_execution_plan(workflow_id)
+    invalidate_agent_pointer(workflow.agent_id)
     return True
 
-def execute_workflow(workflow_id, input_data):
-    """执行工作流"""
+# 同步执行引擎支持的执行模式（异步执行见 async_engine）
+EXECUTION_MODES = ('sequential', 'dag')
+
+def check_dag_eligible(workflow_id):
+    """工作流存在环、不能按DAG模式执行时抛出 DagCycleError"""
     workflow = Workflow.query.get_or_404(workflow_id)
+    get_execution_plan(workflow).get_dag_info()
+
+def execute_workflow(workflow_id, input_data, mode='sequential', on_step=None, cancel_event=None, trace_mode=None,
+                     checkpoint=False, run_id=None, timeout=None):
+    """执行工作流
+
+    mode 为 sequential 时沿单一路径逐个执行节点；为 dag 时按依赖关系并行执行
+    所有就绪节点。运行开始前一次性加载所需的组件和Agent工作流，运行过程中
+    不再访问数据库。
+
+    on_step 在每个步骤完成后以步骤记录为参数调用；cancel_event 被设置后，
+    运行在下一个节点开始前以 WorkflowCancelledError 结束。trace_mode 指定
+    步骤中输入输出的保留方式（full、summary、spill），默认使用配置项。
+    checkpoint 为 True 时每个步骤完成后保存检查点，运行中断后可通过
+    resume_workflow 从最后一个检查点继续。timeout 为整个运行（包括嵌套的Agent
+    工作流）的时间预算（秒），超出后以 WorkflowDeadlineExceededError 结束。
+    """
+    if checkpoint and mode != 'sequential':
+        raise ValueError("只有顺序执行模式支持检查点")
     
-    # 获取开始节点
-    start_node = workflow.get_start_node()
-    if not start_node:
-        raise ValueError("工作流没有开始节点")
+    workflow = Workflow.query.get_or_404(workflow_id)
+    trace = ExecutionTrace(trace_mode)
+    context = RunContext(build_execution_snapshot(workflow), cancel_event, run_timeout(timeout))
+    plan = context.snapshot.root_plan
+    if not checkpoint:
+        return run_workflow_plan(plan, input_data, context, mode, on_step, trace)
+    
+    run_checkpoint = RunCheckpoint(run_id)
+    with run_checkpoint.claim():
+        run_checkpoint.start(plan, input_data, mode)
+        return run_workflow_plan(plan, input_data, context, mode, on_step, trace, run_checkpoint)
+
+def run_timeout(timeout=None):
+    """运行的时间预算，未指定时使用配置的默认值"""
+    return timeout or Config.WORKFLOW_DEFAULT_TIMEOUT
+
+def resume_workflow(run_id, on_step=None, cancel_event=None, trace_mode=None, timeout=None):
+    """从检查点恢复中断的运行
+
+    已完成的步骤不再执行，从最后一个完成的步骤之后的节点继续；中断时正在执行的
+    节点会重新执行。返回的步骤包含恢复前已完成的步骤。
+    """
+    state = load_checkpoint(run_id)
+    if state['status'] == 'succeeded':
+        raise CheckpointError("运行已完成，无需恢复")
+    if state.get('mode') != 'sequential':
+        raise CheckpointError("只有顺序执行模式的运行支持恢复")
+    
+    workflow = Workflow.query.get_or_404(state['workflow_id'])
+    trace = ExecutionTrace(trace_mode)
+    context = RunContext(build_execution_snapshot(workflow), cancel_event, run_timeout(timeout))
+    plan = context.snapshot.root_plan
+    updated_at = plan.updated_at.isoformat() if plan.updated_at else None
+    if updated_at != state.get('workflow_updated_at'):
+        raise CheckpointError("工作流在运行开始后已被修改，无法从检查点恢复")
+    
+    # 恢复前已完成的步骤，输入为上一步的输出
+    current_data = state.get('input')
+    end_outputs = []
+    for record in state['steps']:
+        step = dict(record, input=current_data)
+        if step['node_type'] == 'end':
+            end_outputs.append((step['node_id'], step['output']))
+        trace.record(step)
+        current_data = step['output']
+    
+    # 已执行到结束节点（只缺少结束记录）时无需继续执行
+    steps = ()
+    if not state['steps']:
+        steps = iter_workflow_steps(plan, current_data, context)
+    elif not end_outputs:
+        next_node = get_next_node(plan, state['steps'][-1]['node_id'], current_data)
+        if next_node:
+            steps = iter_workflow_steps(plan, current_data, context, start_node=next_node)
+    
+    run_checkpoint = RunCheckpoint(run_id)
+    with run_checkpoint.claim():
+        run_checkpoint.resume(len(state['steps']))
+        result = run_workflow_plan(
+            plan, current_data, context, 'sequential', on_step, trace, run_checkpoint,
+            steps=steps, end_outputs=end_outputs
+        )
+    result['resumed_from'] = len(state['steps'])
+    return result
+
+def run_workflow_plan(plan, input_data, context, mode='sequential', on_step=None, trace=None, checkpoint=None,
+                      steps=None, end_outputs=None):
+    """按执行计划运行工作流
+
+    checkpoint 不为空时每个步骤完成后记录检查点。从检查点恢复时由调用方传入
+    继续执行的步骤 steps 和已执行的结束节点输出 end_outputs。
+    """
+    trace = trace or ExecutionTrace()
+    end_outputs = [] if end_outputs is None else end_outputs
+    if steps is None:
+        steps = iter_workflow_steps(plan, input_data, context, mode)
+    
+    try:
+        with RunTimer(plan.workflow_id, mode), run_span(plan, mode) as span:
+            for step in steps:
+                if step['node_type'] == 'end':
+                    end_outputs.append((step['node_id'], step['output']))
+                if checkpoint:
+                    checkpoint.record_step(step)
+                step = trace.record(step)
+                if on_step:
+                    on_step(step)
+    except WorkflowDeadlineExceededError as e:
+        # 超时的运行按失败记录，可从检查点恢复
+        if checkpoint:
+            checkpoint.finish('failed', error=str(e))
+        raise
+    except WorkflowCancelledError:
+        if checkpoint:
+            checkpoint.finish('cancelled')
+        raise
+    except Exception as e:
+        if checkpoint:
+            checkpoint.finish('failed', error=str(e))
+        raise
     
     # 执行结果
     result = {
-        'workflow_id': workflow_id,
-        'workflow_name': workflow.name,
-        'steps': [],
-        'final_result': None
+        'workflow_id': plan.workflow_id,
+        'workflow_name': plan.name,
+        'steps': trace.steps,
+        'final_result': final_result_of(end_outputs, mode),
+        'trace': trace.to_dict()
     }
+    if span.trace_id:
+        result['trace_id'] = span.trace_id
+    if checkpoint:
+        checkpoint.finish('succeeded', result['final_result'])
+        result['run_id'] = checkpoint.run_id
+    return result
+
+def run_span(plan, mode, activate=True):
+    """顶层运行的span"""
+    return start_span('workflow.run', {
+        'workflow_id': plan.workflow_id,
+        'workflow_name': plan.name,
+        'mode': mode
+    }, activate)
+
+def final_result_of(end_outputs, mode='sequential'):
+    """根据已执行的结束节点输出计算运行的最终结果"""
+    if mode == 'dag':
+        return dag_final_result(end_outputs)
+    return end_outputs[-1][1] if end_outputs else None
+
+def run_nested_workflow(plan, input_data, context):
+    """运行嵌套的Agent工作流，只保留最终结果，不记录执行轨迹"""
+    end_outputs = []
+    for step in iter_workflow_steps(plan, input_data, context):
+        if step['node_type'] == 'end':
+            end_outputs.append((step['node_id'], step['output']))
+    return final_result_of(end_outputs)
+
+def iter_workflow_steps(plan, input_data, context, mode='sequential', start_node=None):
+    """执行工作流，每个节点完成后立即产出其步骤记录
+
+    顺序执行模式下 start_node 指定从哪个节点开始（从检查点恢复时），默认为开始节点。
+    """
+    if mode not in EXECUTION_MODES:
+        raise ValueError(f"不支持的执行模式: {mode}")
     
+    # 获取开始节点
+    if not plan.start_node:
+        raise ValueError("工作流没有开始节点")
+    
+    if mode == 'dag':
+        return iter_workflow_steps_dag(plan, input_data, context)
+    return _iter_sequential_steps(plan, start_node or plan.start_node, input_data, context)
+
+def _iter_sequential_steps(plan, start_node, input_data, context):
+    """沿单一路径逐个执行节点"""
     # 当前节点和数据
     current_node = start_node
     current_data = input_data
     
     # 执行工作流
     while current_node:
+        context.check()
+        
         # 执行当前节点
-        node_result = execute_node(current_node, current_data)
+        with NodeTimer(plan, current_node) as timer, node_span(plan, current_node):
+            node_result = execute_node(current_node, current_data, context)
         
-        # 记录步骤
-        step = {
+        # 产出步骤
+        yield {
             'node_id': current_node.get('id'),
             'node_name': current_node.get('data', {}).get('name', '未命名节点'),
             'node_type': current_node.get('type'),
             'input': current_data,
-            'output': node_result
+            'output': node_result,
+            'duration_ms': round(timer.elapsed * 1000, 3)
         }
-        result['steps'].append(step)
         
         # 更新当前数据
         current_data = node_result
         
         # 如果是结束节点，则结束执行
         if current_node.get('type') == 'end':
-            result['final_result'] = current_data
             break
         
         # 获取下一个节点
-        next_node = get_next_node(workflow, current_node.get('id'), current_data)
-        current_node = next_node
+        current_node = get_next_node(plan, current_node.get('id'), current_data)
+
+def iter_workflow_steps_dag(plan, input_data, context, max_workers=None):
+    """按DAG模式执行工作流，每个节点完成后立即产出其步骤记录
+
+    节点在子取消范围中执行：某个节点失败时只取消本次调度中仍在执行的节点，
+    不设置调用方的取消信号。工作流存在环时在开始执行前抛出 DagCycleError。
+    """
+    plan.get_dag_info()
+    scope = context.child()
+    
+    # 快照与数据库会话无关，工作线程无需应用上下文
+    def run_node(node, data):
+        scope.check()
+        with NodeTimer(plan, node), node_span(plan, node):
+            return execute_node(node, data, scope)
+    
+    scheduler = DagScheduler(
+        plan, run_node, max_workers or Config.WORKFLOW_DAG_MAX_WORKERS, scope.check, scope.cancel
+    )
+    return scheduler.iter_steps(input_data)
+
+def stream_workflow(workflow_id, input_data, mode='sequential', cancel_event=None, trace_mode=None, timeout=None):
+    """流式执行工作流
+
+    加载工作流和运行快照后返回事件生成器：每个步骤完成后产出 step 事件，
+    运行结束时产出携带最终结果的 end 事件。不保留已产出的步骤；trace_mode
+    为 summary 或 spill 时推送的步骤按相应方式转换载荷。客户端提前断开
+    （生成器被关闭）时取消运行。
+    """
+    workflow = Workflow.query.get_or_404(workflow_id)
+    trace = ExecutionTrace(trace_mode or 'full', retain=False)
+    context = RunContext(build_execution_snapshot(workflow), cancel_event, run_timeout(timeout))
+    plan = context.snapshot.root_plan
+    steps = iter_workflow_steps(plan, input_data, context, mode)
     
-    return result
+    def events():
+        end_outputs = []
+        try:
+            # 生成器在两次产出之间交还控制权，span 只在执行步骤时设为当前span
+            with RunTimer(plan.workflow_id, mode), run_span(plan, mode, activate=False) as span:
+                for step in iter_in_span(span, steps):
+                    if step['node_type'] == 'end':
+                        end_outputs.append((step['node_id'], step['output']))
+                    yield {'event': 'step', 'data': trace.record(step)}
+        except GeneratorExit:
+            context.cancel()
+            steps.close()
+            raise
+        
+        end = {
+            'workflow_id': plan.workflow_id,
+            'workflow_name': plan.name,
+            'step_count': trace.step_count,
+            'final_result': final_result_of(end_outputs, mode)
+        }
+        if span.trace_id:
+            end['trace_id'] = span.trace_id
+        yield {'event': 'end', 'data': end}
+    
+    return events()
 
-def execute_node(node, input_data):
+def execute_node(node, input_data, context):
     """执行节点"""
     node_type = node.get('type')
     node_data = node.get('data', {})
@@ -122,34 +412,107 @@ def execute_node(node, input_data):
     if node_type == 'end':
         return input_data
     
+    # 汇聚节点（上游输出已由调度器合并）
+    if node_type == 'join':
+        return input_data
+    
     # 执行LPI节点
     if node_type == 'lpi':
-        return execute_lpi_node(node_data, input_data)
+        return execute_lpi_node(node_data, input_data, context)
     
     # 执行Agent节点
     if node_type == 'agent':
-        return execute_agent_node(node_data, input_data)
+        return execute_agent_node(node_data, input_data, context)
     
     # 执行通用组件节点
     if node_type == 'common':
-        return execute_common_node(node_data, input_data)
+        return execute_common_node(node_data, input_data, context)
     
     # 未知节点类型
     return input_data
 
-def execute_lpi_node(node_data, input_data):
-    """执行LPI节点"""
-    component_id = node_data.get('component_id')
-    if not component_id:
-        raise ValueError("LPI节点没有指定组件ID")
+def load_python_lpi_function(lpi_details):
+    """加载Python类型LPI的入口函数（模块按文件缓存，文件变化时自动重新加载）"""
+    module_path = lpi_details.get('endpoint')
+    if not module_path:
+        raise ValueError("Python API没有指定模块路径")
     
-    # 获取LPI组件
-    component = Component.query.get_or_404(component_id)
-    if component.component_type != 'lpi':
-        raise ValueError("指定的组件不是LPI类型")
+    return load_lpi_function(module_path, lpi_details.get('method') or 'main')
+
+def warm_up_python_lpis():
+    """预加载所有Python类型LPI的模块，进程池执行的LPI在工作进程中预先导入"""
+    result = {'loaded': [], 'failed': []}
+    process_paths = []
+    for component in Component.query.filter_by(component_type='lpi').all():
+        lpi_details = component.get_lpi_details()
+        if lpi_details.get('api_type') != 'python':
+            continue
+        try:
+            load_python_lpi_function(lpi_details)
+            result['loaded'].append(component.id)
+        except Exception as e:
+            result['failed'].append({'component_id': component.id, 'error': str(e)})
+            continue
+        if lpi_details.get('execution') == 'process':
+            process_paths.append(lpi_details.get('endpoint'))
+    if process_paths:
+        lpi_process_pool.preload(process_paths)
+    return result
+
+def execute_lpi_node(node_data, input_data, context):
+    """执行LPI节点，声明可缓存的LPI优先使用缓存的结果"""
+    lpi_details = context.snapshot.get_component(node_data.get('component_id'), 'lpi')
+    
+    cache_key = lpi_result_cache.make_key(lpi_details, input_data)
+    if cache_key is not None:
+        hit, result = lpi_result_cache.get(cache_key)
+        if hit:
+            count_lpi_call(lpi_details, 'cache_hit')
+            return result
+    
+    bulkhead = lpi_bulkhead(lpi_details)
+    
+    # 每次尝试前检查运行是否已取消或超时，调用超时不超过剩余的时间预算
+    def attempt():
+        context.check()
+        try:
+            result = call_lpi(lpi_details, input_data, context.call_timeout(lpi_details.get('timeout')))
+        except Exception:
+            count_lpi_call(lpi_details, 'error')
+            # 因时间预算耗尽而失败的调用按运行超时报告，不计为下游故障
+            context.check()
+            raise
+        count_lpi_call(lpi_details, 'success')
+        return result
+    
+    def call():
+        if bulkhead is None:
+            return attempt()
+        return bulkhead.run(attempt, context.call_timeout())
+    
+    result = call_with_resilience(
+        lpi_breaker_key(lpi_details.get('id')), lpi_resilience_policy(lpi_details), call, context
+    )
     
-    lpi_details = component.get_lpi_details()
+    if cache_key is not None:
+        lpi_result_cache.put(cache_key, result, lpi_details.get('cache_ttl'))
+    return result
+
+def lpi_bulkhead(lpi_details):
+    """LPI调用使用的隔离舱，REST类型的LPI可按主机共享"""
+    url = lpi_details.get('endpoint') if lpi_details.get('api_type') == 'rest' else None
+    return resolve_bulkhead(f"lpi:{lpi_details.get('id')}", url, lpi_details.get('bulkhead'))
+
+def lpi_resilience_policy(lpi_details):
+    """LPI的容错策略，可缓存的LPI和GET请求默认视为幂等"""
+    idempotent = bool(lpi_details.get('cacheable')) or (lpi_details.get('method') or '').lower() == 'get'
+    return ResiliencePolicy.from_config(lpi_details, default_idempotent=idempotent)
+
+def call_lpi(lpi_details, input_data, timeout=None):
+    """调用LPI，timeout 为空时使用LPI配置的超时"""
     api_type = lpi_details.get('api_type')
+    if timeout is None:
+        timeout = lpi_details.get('timeout')
     
     # REST API
     if api_type == 'rest':
@@ -157,75 +520,71 @@ def execute_lpi_node(node_data, input_data):
         method = lpi_details.get('method', 'POST').lower()
         
         # 调用REST API
-        if method == 'get':
-            response = requests.get(endpoint, params=input_data)
-        else:
-            response = requests.post(endpoint, json=input_data)
+        response = lpi_transport.request(method, endpoint, input_data, timeout=timeout)
         
         if response.status_code != 200:
-            raise Exception(f"API调用失败: {response.status_code} - {response.text}")
+            raise LpiCallError(f"API调用失败: {response.status_code} - {response.text}", response.status_code)
         
         return response.json()
     
     # Python API
     elif api_type == 'python':
-        module_path = lpi_details.get('endpoint')
-        if not module_path:
-            raise ValueError("Python API没有指定模块路径")
-        
-        # 加载Python模块
-        module_name = Path(module_path).stem
-        spec = importlib.util.spec_from_file_location(module_name, module_path)
-        module = importlib.util.module_from_spec(spec)
-        sys.modules[module_name] = module
-        spec.loader.exec_module(module)
-        
-        # 调用函数
-        function_name = lpi_details.get('method', 'main')
-        if not hasattr(module, function_name):
-            raise ValueError(f"Python模块中没有找到函数: {function_name}")
+        # CPU密集型的LPI在进程池中执行，不占用Web进程的GIL
+        if lpi_details.get('execution') == 'process':
+            return call_lpi_in_process(lpi_details, input_data, timeout)
         
-        function = getattr(module, function_name)
-        return function(input_data)
+        with python_lpi_span(lpi_details):
+            function = load_python_lpi_function(lpi_details)
+            result = function(input_data)
+            
+            # 协程类型的LPI在同步引擎中单独运行事件循环
+            if inspect.isawaitable(result):
+                return asyncio.run(result)
+            return result
     
     else:
         raise ValueError(f"不支持的API类型: {api_type}")
 
-def execute_agent_node(node_data, input_data):
+def call_lpi_in_process(lpi_details, input_data, timeout=None):
+    """在进程池中调用Python LPI"""
+    module_path = lpi_details.get('endpoint')
+    if not module_path:
+        raise ValueError("Python API没有指定模块路径")
+    
+    with python_lpi_span(lpi_details):
+        return lpi_process_pool.call(
+            os.path.abspath(module_path), lpi_details.get('method') or 'main',
+            input_data, lpi_details.get('timeout') if timeout is None else timeout
+        )
+
+def python_lpi_span(lpi_details):
+    """Python LPI调用的span"""
+    return start_span('lpi.python', {
+        'component_id': lpi_details.get('id'),
+        'module': lpi_details.get('endpoint'),
+        'function': lpi_details.get('method') or 'main',
+        'execution': lpi_details.get('execution') or 'thread'
+    })
+
+def execute_agent_node(node_data, input_data, context):
     """执行Agent节点"""
-    component_id = node_data.get('component_id')
-    if not component_id:
-        raise ValueError("Agent节点没有指定组件ID")
-    
-    # 获取Agent组件
-    component = Component.query.get_or_404(component_id)
-    if component.component_type != 'agent':
-        raise ValueError("指定的组件不是Agent类型")
-    
-    # 获取Agent的工作流
-    workflows = Workflow.query.filter_by(agent_id=component_id, status='published').all()
-    if not workflows:
-        raise ValueError("Agent没有已发布的工作流")
+    plan = context.snapshot.get_agent_plan(node_data.get('component_id'))
     
-    # 使用最新版本的工作流
-    workflow = max(workflows, key=lambda w: w.version)
-    
-    # 执行工作流
-    result = execute_workflow(workflow.id, input_data)
-    return result.get('final_result')
+    # 执行工作流（与顶层运行共享上下文）
+    with agent_span(node_data, plan):
+        return run_nested_workflow(plan, input_data, context)
+
+def agent_span(node_data, plan):
+    """嵌套Agent工作流的span"""
+    return start_span('workflow.agent', {
+        'agent_id': node_data.get('component_id'),
+        'workflow_id': plan.workflow_id,
+        'workflow_name': plan.name
+    })
 
-def execute_common_node(node_data, input_data):
+def execute_common_node(node_data, input_data, context):
     """执行通用组件节点"""
-    component_id = node_data.get('component_id')
-    if not component_id:
-        raise ValueError("通用组件节点没有指定组件ID")
-    
-    # 获取通用组件
-    component = Component.query.get_or_404(component_id)
-    if component.component_type != 'common':
-        raise ValueError("指定的组件不是通用组件类型")
-    
-    common_details = component.get_common_details()
+    common_details = context.snapshot.get_component(node_data.get('component_id'), 'common')
     subtype = common_details.get('component_subtype')
     
     # 条件组件
@@ -234,7 +593,7 @@ def execute_common_node(node_data, input_data):
     
     # 执行器组件
     elif subtype == 'executor':
-        return execute_executor_component(common_details, input_data)
+        return execute_executor_component(common_details, input_data, context)
     
     else:
         raise ValueError(f"不支持的通用组件子类型: {subtype}")
@@ -271,109 +630,101 @@ def execute_condition_component(component_details, input_data):
     # 复杂条件判断
     elif condition_type == 'complex':
         expression = config.get('expression')
-        # 这里可以使用eval或者更安全的方式执行表达式
-        # 简化实现，实际应用中应该使用更安全的方式
-        locals_dict = {'input': input_data}
-        try:
-            return eval(expression, {"__builtins__": {}}, locals_dict)
-        except:
+        if not expression:
             return False
+        # 表达式经白名单校验后编译一次并缓存
+        return evaluate_expression(expression, input_data)
     
     return False
 
-def execute_executor_component(component_details, input_data):
-    """执行执行器组件"""
+def execute_executor_component(component_details, input_data, context=None):
+    """执行执行器组件，context 用于限制外部调用的超时"""
     config = component_details.get('config', {})
     executor_type = config.get('executor_type')
     
-    # 数据转换
+    # 数据转换（配置按组件版本编译一次）
     if executor_type == 'transform':
-        transform_type = config.get('transform_type')
-        
-        if transform_type == 'map':
-            mapping = config.get('mapping', {})
-            result = {}
-            for target_key, source_path in mapping.items():
-                # 简单实现，支持点号路径
-                value = input_data
-                for key in source_path.split('.'):
-                    if isinstance(value, dict) and key in value:
-                        value = value[key]
-                    else:
-                        value = None
-                        break
-                result[target_key] = value
-            return result
-        
-        elif transform_type == 'filter':
-            fields = config.get('fields', [])
-            result = {}
-            for field in fields:
-                if field in input_data:
-                    result[field] = input_data[field]
-            return result
-        
-        else:
-            return input_data
+        return get_compiled_transform(component_details)(input_data)
     
     # 外部调用
     elif executor_type == 'external':
         url = config.get('url')
-        method = config.get('method', 'POST').lower()
         
         if not url:
             return input_data
         
-        try:
-            if method == 'get':
-                response = requests.get(url, params=input_data)
-            else:
-                response = requests.post(url, json=input_data)
-            
-            if response.status_code == 200:
-                return response.json()
-        except:
-            pass
+        bulkhead = resolve_bulkhead(f"external:{url}", url, config.get('bulkhead'))
         
-        return input_data
+        def attempt():
+            if context is None:
+                return call_external(config, input_data)
+            context.check()
+            try:
+                return call_external(config, input_data, context.call_timeout(config.get('timeout')))
+            except Exception:
+                context.check()
+                raise
+        
+        def call():
+            if bulkhead is None:
+                return attempt()
+            return bulkhead.run(attempt, context.call_timeout() if context else None)
+        
+        try:
+            return call_with_resilience(external_breaker_key(url), external_resilience_policy(config), call, context)
+        except WorkflowCancelledError:
+            raise
+        except Exception:
+            # 配置为透传时调用失败返回原输入，否则向上抛出错误
+            if config.get('on_error') == 'passthrough':
+                return input_data
+            raise
     
     return input_data
 
-def get_next_node(workflow, current_node_id, current_data):
+def external_resilience_policy(config):
+    """外部调用的容错策略，GET请求默认视为幂等"""
+    return ResiliencePolicy.from_config(config, default_idempotent=(config.get('method') or '').lower() == 'get')
+
+def call_external(config, input_data, timeout=None):
+    """调用外部服务，timeout 为空时使用配置的超时"""
+    url = config.get('url')
+    method = config.get('method', 'POST').lower()
+    if timeout is None:
+        timeout = config.get('timeout')
+    response = lpi_transport.request(method, url, input_data, timeout=timeout)
+    if response.status_code != 200:
+        raise LpiCallError(f"外部调用失败: {response.status_code} - {response.text}", response.status_code)
+    return response.json()
+
+def get_next_node(plan, current_node_id, current_data):
     """获取下一个节点"""
     # 获取所有从当前节点出发的边
-    outgoing_edges = []
-    for edge in workflow.edges_obj:
-        if edge.get('source') == current_node_id:
-            outgoing_edges.append(edge)
+    outgoing_edges = plan.get_outgoing_edges(current_node_id)
     
     if not outgoing_edges:
         return None
     
     # 如果只有一条边，直接返回目标节点
     if len(outgoing_edges) == 1:
-        target_id = outgoing_edges[0].get('target')
-        return workflow.get_node_by_id(target_id)
+        return outgoing_edges[0].target
+    
+    # 等值条件的多路分支查决策表，其余条件按顺序求值
+    decision_table = plan.get_decision_table(current_node_id)
+    if decision_table is not None:
+        return decision_table.select(outgoing_edges, current_data)
     
     # 如果有多条边，需要根据条件判断
     for edge in outgoing_edges:
-        edge_data = edge.get('data', {})
-        condition = edge_data.get('condition')
+        condition = edge.condition
         
         # 如果没有条件，默认选择这条边
         if not condition:
-            target_id = edge.get('target')
-            return workflow.get_node_by_id(target_id)
+            return edge.target
         
-        # 执行条件判断
-        try:
-            locals_dict = {'input': current_data}
-            result = eval(condition, {"__builtins__": {}}, locals_dict)
-            if result:
-                target_id = edge.get('target')
-                return workflow.get_node_by_id(target_id)
-        except:
-            continue
+        # 执行条件判断（编译失败或求值异常视为不满足）
+        if edge.predicate(current_data):
+            return edge.target
     
     # 如果所有条件都不满足，返回None
     return None
@@ -0,0 +1 @@
+# 后端测试包初始化文件
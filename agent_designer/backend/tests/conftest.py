@@ -0,0 +1,52 @@
+import os
+import sys
+import pytest
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from models import db
+from controllers.component_controller import component_bp
+from controllers.workflow_controller import workflow_bp
+from controllers.settings_controller import settings_bp
+from services import agent_index, bulkhead, execution_plan, resilience
+from services.lpi_result_cache import lpi_result_cache
+
+def _reset_caches():
+    """清空进程内的缓存，每个测试使用新的内存数据库，ID会重复"""
+    execution_plan._plan_cache.clear()
+    agent_index._pointer_cache.clear()
+    resilience._breakers.clear()
+    bulkhead._bulkheads.clear()
+    lpi_result_cache.clear()
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """使用内存数据库的应用，检查点写入临时目录"""
+    # 检查点写入线程只在启动时创建目录，每个测试的目录在此创建
+    (tmp_path / 'checkpoints').mkdir()
+    monkeypatch.setattr(Config, 'CHECKPOINT_DIR', str(tmp_path / 'checkpoints'))
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(component_bp, url_prefix='/api/components')
+    app.register_blueprint(workflow_bp, url_prefix='/api/workflows')
+    app.register_blueprint(settings_bp, url_prefix='/api/settings')
+    _reset_caches()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+    _reset_caches()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def lpi_dir(tmp_path):
+    directory = tmp_path / 'lpi'
+    directory.mkdir()
+    return directory
@@ -0,0 +1,32 @@
+"""测试中构造组件和工作流的辅助函数"""
+import textwrap
+from models import db
+from models.component import Component
+from models.workflow import Workflow
+
+def node(node_id, node_type, **data):
+    return {'id': node_id, 'type': node_type, 'data': dict({'name': node_id}, **data)}
+
+def edge(source, target, condition=None):
+    item = {'id': f'{source}-{target}', 'source': source, 'target': target}
+    if condition:
+        item['data'] = {'condition': condition}
+    return item
+
+def add_lpi(directory, name, source, method='main', **content):
+    """在 directory 中写入Python LPI模块并创建对应的LPI组件"""
+    path = directory / f'{name}.py'
+    path.write_text(textwrap.dedent(source), encoding='utf-8')
+    component = Component(name=name, component_type='lpi')
+    component.content_obj = dict({'api_type': 'python', 'endpoint': str(path), 'method': method}, **content)
+    db.session.add(component)
+    db.session.commit()
+    return component
+
+def add_workflow(nodes, edges, agent_id=None, status='draft', version='1.0.0'):
+    workflow = Workflow(name='测试工作流', agent_id=agent_id, status=status, version=version)
+    workflow.nodes_obj = nodes
+    workflow.edges_obj = edges
+    db.session.add(workflow)
+    db.session.commit()
+    return workflow
@@ -0,0 +1,53 @@
+import pytest
+from models import db
+from models.component import Component
+from models.workflow import Workflow, AgentPublishedWorkflow
+from services.agent_index import get_published_workflow_pointers, rebuild_agent_pointers
+from services.execution_snapshot import build_execution_snapshot
+from tests.helpers import node, edge, add_workflow
+
+def add_agent():
+    agent = Component(name='测试Agent', component_type='agent')
+    agent.content_obj = {}
+    db.session.add(agent)
+    db.session.commit()
+    return agent
+
+def agent_caller(agent):
+    nodes = [node('start', 'start'), node('a', 'agent', component_id=agent.id), node('end', 'end')]
+    return add_workflow(nodes, [edge('start', 'a'), edge('a', 'end')])
+
+def test_pointer_to_missing_workflow_raises_value_error(app):
+    agent = add_agent()
+    caller = agent_caller(agent)
+    published = add_workflow([node('start', 'start'), node('end', 'end')], [edge('start', 'end')],
+                             agent_id=agent.id, status='published')
+    db.session.add(AgentPublishedWorkflow(agent_id=agent.id, workflow_id=published.id, version='1.0.0'))
+    # 绕过发布流程直接删除工作流，指针仍指向它
+    db.session.delete(published)
+    db.session.commit()
+
+    snapshot = build_execution_snapshot(caller)
+    with pytest.raises(ValueError, match='Agent没有已发布的工作流'):
+        snapshot.get_agent_plan(agent.id)
+
+def test_rebuild_agent_pointers(app):
+    agent = add_agent()
+    other = add_agent()
+    add_workflow([node('start', 'start')], [], agent_id=agent.id, status='published', version='1.0.9')
+    latest = add_workflow([node('start', 'start')], [], agent_id=agent.id, status='published', version='1.0.10')
+    add_workflow([node('start', 'start')], [], agent_id=other.id, status='draft')
+    # 过期的指针（例如重新初始化数据之前留下的）
+    db.session.add(AgentPublishedWorkflow(agent_id=other.id, workflow_id=latest.id + 1, version='9.9.9'))
+    db.session.commit()
+    get_published_workflow_pointers([agent.id, other.id])
+
+    assert rebuild_agent_pointers() == 1
+    db.session.commit()
+
+    pointers = {p.agent_id: (p.workflow_id, p.version) for p in AgentPublishedWorkflow.query.all()}
+    assert pointers == {agent.id: (latest.id, '1.0.10')}
+    # 进程内缓存已清空，重新从指针表读取
+    assert get_published_workflow_pointers([agent.id, other.id]) == {
+        agent.id: (latest.id, '1.0.10'), other.id: None
+    }
@@ -0,0 +1,44 @@
+from services.batch_service import execute_workflow_batch, iter_ndjson_inputs
+from tests.helpers import node, edge, add_lpi, add_workflow
+
+def dag_workflow(lpi_dir):
+    """start -> check、echo -> end，check 在输入带 fail 时失败"""
+    check = add_lpi(lpi_dir, 'check', '''
+        def main(data):
+            if data.get('fail'):
+                raise ValueError('输入无效')
+            return {'checked': True}
+    ''')
+    echo = add_lpi(lpi_dir, 'echo', '''
+        import time
+
+        def main(data):
+            time.sleep(0.05)
+            return data
+    ''')
+    nodes = [node('start', 'start'), node('check', 'lpi', component_id=check.id),
+             node('echo', 'lpi', component_id=echo.id), node('end', 'end')]
+    edges = [edge('start', 'check'), edge('start', 'echo'), edge('check', 'end'), edge('echo', 'end')]
+    return add_workflow(nodes, edges)
+
+def test_failing_dag_item_does_not_cancel_other_items(app, lpi_dir):
+    workflow = dag_workflow(lpi_dir)
+    inputs = [{'n': i, 'fail': i == 3} for i in range(7)]
+
+    results = list(execute_workflow_batch(workflow.id, inputs, mode='dag', concurrency=4))
+
+    assert [item['index'] for item in results] == list(range(7))
+    failed = [item for item in results if not item['success']]
+    assert [item['index'] for item in failed] == [3]
+    assert '输入无效' in failed[0]['error']
+    for item in results:
+        if item['success']:
+            assert item['result']['final_result']['checked'] is True
+
+def test_invalid_ndjson_line_fails_only_that_item(app, lpi_dir):
+    workflow = dag_workflow(lpi_dir)
+    inputs = iter_ndjson_inputs([b'{"n": 1}\n', b'not json\n', b'\n', b'{"n": 2}\n'])
+
+    results = list(execute_workflow_batch(workflow.id, inputs, mode='sequential', ordered=False))
+
+    assert sorted(item['success'] for item in results) == [False, True, True]
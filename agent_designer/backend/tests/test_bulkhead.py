@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+import pytest
+from config import Config
+from services.bulkhead import (
+    Bulkhead, BulkheadFullError, BulkheadTimeoutError, get_bulkhead, resolve_bulkhead
+)
+from tests.helpers import node, edge, add_lpi, add_workflow
+
+def test_queued_calls_run_in_order_and_full_queue_rejects():
+    bulkhead = Bulkhead('test', max_in_flight=1, max_queue=1, queue_timeout=5)
+    bulkhead.acquire()
+    order = []
+    queued = threading.Thread(target=lambda: bulkhead.run(lambda: order.append('queued')))
+    queued.start()
+    while not bulkhead.to_dict()['waiting']:
+        time.sleep(0.001)
+
+    with pytest.raises(BulkheadFullError):
+        bulkhead.acquire()
+    order.append('holder')
+    bulkhead.release()
+    queued.join(5)
+
+    assert order == ['holder', 'queued']
+    stats = bulkhead.to_dict()
+    assert (stats['in_flight'], stats['waiting'], stats['rejected']) == (0, 0, 1)
+
+def test_queue_wait_times_out():
+    bulkhead = Bulkhead('test', max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    bulkhead.acquire()
+    with pytest.raises(BulkheadTimeoutError):
+        bulkhead.acquire()
+    # 调用方剩余的时间比排队超时更短时按剩余时间等待
+    with pytest.raises(BulkheadTimeoutError):
+        bulkhead.acquire(timeout=0.01)
+    stats = bulkhead.to_dict()
+    assert (stats['timeouts'], stats['waiting'], stats['in_flight']) == (2, 0, 1)
+
+def test_async_queue_wait_times_out():
+    bulkhead = Bulkhead('test', max_in_flight=1, max_queue=1, queue_timeout=0.05)
+    bulkhead.acquire()
+    with pytest.raises(BulkheadTimeoutError):
+        asyncio.run(bulkhead.acquire_async())
+    bulkhead.release()
+    asyncio.run(bulkhead.acquire_async())
+    assert bulkhead.to_dict()['in_flight'] == 1
+
+def test_host_scope_merges_central_host_limits(app, monkeypatch):
+    monkeypatch.setattr(Config, 'LPI_HOST_BULKHEADS', {'api:5001': {'max_in_flight': 3, 'max_queue': 7}})
+
+    shared = resolve_bulkhead('lpi:1', 'http://api:5001/x', {'scope': 'host'})
+    assert (shared.key, shared.max_in_flight, shared.max_queue) == ('host:api:5001', 3, 7)
+
+    overridden = resolve_bulkhead('lpi:2', 'http://api:5001/y', {'scope': 'host', 'max_queue': 2})
+    assert overridden is shared
+    assert (shared.max_in_flight, shared.max_queue) == (3, 2)
+
+    assert resolve_bulkhead('lpi:3', 'http://api:5001/z', None) is shared
+    assert resolve_bulkhead('lpi:4', 'http://other:80/', {'scope': 'host'}) is None
+    own = resolve_bulkhead('lpi:5', 'http://api:5001/z', {'max_in_flight': 1})
+    assert own.key == 'lpi:5'
+
+@pytest.mark.parametrize('options, status', [
+    ({'max_in_flight': 1, 'max_queue': 0}, 429),
+    ({'max_in_flight': 1, 'max_queue': 1, 'queue_timeout': 0.05}, 503),
+])
+def test_execute_maps_bulkhead_errors_to_http_status(client, lpi_dir, options, status):
+    lpi = add_lpi(lpi_dir, 'echo', '''
+        def main(data):
+            return data
+    ''', bulkhead=options)
+    workflow = add_workflow([node('start', 'start'), node('a', 'lpi', component_id=lpi.id), node('end', 'end')],
+                            [edge('start', 'a'), edge('a', 'end')])
+    bulkhead = get_bulkhead(f'lpi:{lpi.id}', options)
+    bulkhead.acquire()
+    try:
+        response = client.post(f'/api/workflows/{workflow.id}/execute', json={'n': 1})
+    finally:
+        bulkhead.release()
+
+    assert response.status_code == status
+    assert response.get_json()['success'] is False
+    assert client.post(f'/api/workflows/{workflow.id}/execute', json={'n': 1}).status_code == 200
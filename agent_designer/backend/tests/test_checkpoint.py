@@ -0,0 +1,84 @@
+from models import db
+from models.workflow import Workflow
+from services.checkpoint_store import RunCheckpoint
+from tests.helpers import node, edge, add_lpi, add_workflow
+
+def flaky_workflow(lpi_dir):
+    """start -> count -> flaky -> end，count 记录执行次数，flaky 在标记文件存在时失败"""
+    count = add_lpi(lpi_dir, 'count', f'''
+        def main(data):
+            with open({str(lpi_dir / 'count.log')!r}, 'a') as f:
+                f.write('x')
+            return {{'n': data['n'] + 1}}
+    ''')
+    flaky = add_lpi(lpi_dir, 'flaky', f'''
+        import os
+
+        def main(data):
+            if os.path.exists({str(lpi_dir / 'fail.flag')!r}):
+                raise RuntimeError('下游暂不可用')
+            return {{'n': data['n'] * 10}}
+    ''')
+    nodes = [node('start', 'start'), node('count', 'lpi', component_id=count.id),
+             node('flaky', 'lpi', component_id=flaky.id), node('end', 'end')]
+    edges = [edge('start', 'count'), edge('count', 'flaky'), edge('flaky', 'end')]
+    return add_workflow(nodes, edges)
+
+def run_failing(client, lpi_dir, workflow):
+    (lpi_dir / 'fail.flag').touch()
+    response = client.post(f'/api/workflows/{workflow.id}/execute?checkpoint=1', json={'n': 1})
+    assert response.status_code == 500
+    (lpi_dir / 'fail.flag').unlink()
+    return response.get_json()['run_id']
+
+def test_resume_skips_completed_steps(client, lpi_dir):
+    workflow = flaky_workflow(lpi_dir)
+    run_id = run_failing(client, lpi_dir, workflow)
+
+    state = client.get(f'/api/workflows/runs/{run_id}/checkpoint').get_json()
+    assert (state['status'], state['step_count'], state['last_node_id']) == ('failed', 2, 'count')
+    assert '下游暂不可用' in state['error']
+
+    response = client.post(f'/api/workflows/runs/{run_id}/resume')
+    assert response.status_code == 200
+    result = response.get_json()['result']
+    assert result['resumed_from'] == 2
+    assert result['final_result'] == {'n': 20}
+    assert [step['node_id'] for step in result['steps']] == ['start', 'count', 'flaky', 'end']
+    # 已完成的 count 步骤没有重新执行
+    assert (lpi_dir / 'count.log').read_text() == 'x'
+
+    state = client.get(f'/api/workflows/runs/{run_id}/checkpoint').get_json()
+    assert (state['status'], state['step_count'], state['final_result']) == ('succeeded', 4, {'n': 20})
+
+def test_resume_conflicts(client, lpi_dir):
+    workflow = flaky_workflow(lpi_dir)
+    run_id = run_failing(client, lpi_dir, workflow)
+
+    # 同一运行正在执行时不能再次恢复
+    with RunCheckpoint(run_id).claim():
+        response = client.post(f'/api/workflows/runs/{run_id}/resume')
+    assert response.status_code == 409
+    assert '正在执行' in response.get_json()['error']
+
+    assert client.post(f'/api/workflows/runs/{run_id}/resume').status_code == 200
+    # 已完成的运行无需恢复
+    response = client.post(f'/api/workflows/runs/{run_id}/resume')
+    assert response.status_code == 409
+    assert '已完成' in response.get_json()['error']
+
+def test_resume_rejects_modified_workflow(client, lpi_dir):
+    workflow = flaky_workflow(lpi_dir)
+    run_id = run_failing(client, lpi_dir, workflow)
+
+    db.session.get(Workflow, workflow.id).description = '修改后的工作流'
+    db.session.commit()
+
+    response = client.post(f'/api/workflows/runs/{run_id}/resume')
+    assert response.status_code == 409
+    assert '已被修改' in response.get_json()['error']
+
+def test_resume_unknown_run(client):
+    response = client.post(f'/api/workflows/runs/{"0" * 32}/resume')
+    assert response.status_code == 409
+    assert client.get(f'/api/workflows/runs/{"0" * 32}/checkpoint').status_code == 404
@@ -0,0 +1,69 @@
+import threading
+import pytest
+from services.dag_scheduler import DagScheduler
+from services.execution_plan import ExecutionPlan
+from services.run_context import RunContext, WorkflowCancelledError
+from services.workflow_service import execute_workflow
+from tests.helpers import node, edge, add_lpi, add_workflow
+
+def fan_in_plan():
+    """start -> a、b -> join -> end"""
+    nodes = [node('start', 'start'), node('a', 'lpi'), node('b', 'lpi'), node('join', 'join', merge='collect'),
+             node('end', 'end')]
+    edges = [edge('start', 'b'), edge('start', 'a'), edge('a', 'join'), edge('b', 'join'), edge('join', 'end')]
+    return ExecutionPlan(1, 'dag', '1.0.0', nodes, edges)
+
+def test_join_inputs_follow_in_edge_order():
+    def run_node(current, data):
+        return current['id'] if current['type'] == 'lpi' else data
+
+    steps, result = DagScheduler(fan_in_plan(), run_node).run({})
+    assert list(result) == ['a', 'b']
+    assert [step['node_id'] for step in steps][-1] == 'end'
+
+def test_node_failure_calls_cancel_for_running_nodes():
+    cancelled = threading.Event()
+
+    def run_node(current, data):
+        if current['id'] == 'a':
+            raise RuntimeError('a 失败')
+        if current['id'] == 'b':
+            # 等待调度器取消，超时说明没有通知仍在执行的节点
+            assert cancelled.wait(5)
+        return data
+
+    with pytest.raises(RuntimeError, match='a 失败'):
+        DagScheduler(fan_in_plan(), run_node, max_workers=2, cancel=cancelled.set).run({})
+    assert cancelled.is_set()
+
+def test_child_scope_does_not_cancel_parent():
+    parent = RunContext(snapshot=None)
+    scope = parent.child()
+    scope.cancel()
+    assert scope.cancelled
+    assert not parent.cancelled
+    parent.check()
+
+    other = parent.child()
+    parent.cancel()
+    with pytest.raises(WorkflowCancelledError):
+        other.check()
+
+def test_failed_dag_run_leaves_caller_cancel_event_unset(app, lpi_dir):
+    failing = add_lpi(lpi_dir, 'failing', '''
+        def main(data):
+            raise ValueError('节点失败')
+    ''')
+    echo = add_lpi(lpi_dir, 'echo', '''
+        def main(data):
+            return data
+    ''')
+    nodes = [node('start', 'start'), node('bad', 'lpi', component_id=failing.id),
+             node('good', 'lpi', component_id=echo.id), node('end', 'end')]
+    edges = [edge('start', 'bad'), edge('start', 'good'), edge('bad', 'end'), edge('good', 'end')]
+    workflow = add_workflow(nodes, edges)
+
+    cancel_event = threading.Event()
+    with pytest.raises(Exception, match='节点失败'):
+        execute_workflow(workflow.id, {'n': 1}, mode='dag', cancel_event=cancel_event)
+    assert not cancel_event.is_set()
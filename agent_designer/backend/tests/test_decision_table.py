@@ -0,0 +1,56 @@
+import itertools
+import pytest
+from services.decision_table import DecisionTable
+from services.execution_plan import ExecutionPlan
+from tests.helpers import node, edge
+
+# 表中的等值条件、重复常量、其他字段和其他形式的条件、无条件边交错排列
+CONDITIONS = [
+    "input['kind'] == 'a'",
+    "input['n'] > 5",
+    "input['kind'] == 'b'",
+    "'c' == input['kind']",
+    "input['kind'] == 'b'",
+    "input['other'] == 'a'",
+    "input['kind'] == 1",
+    "input['kind'] in ('d', 'e')",
+    None,
+    "input['kind'] == 'e'",
+]
+
+KINDS = ['a', 'b', 'c', 'd', 'e', 'z', 1, 1.0, True, None, [1], {'k': 1}]
+
+def build_plan(conditions):
+    nodes = [node('s', 'start')] + [node(f't{i}', 'end') for i in range(len(conditions))]
+    edges = [edge('s', f't{i}', condition) for i, condition in enumerate(conditions)]
+    return ExecutionPlan(1, '测试', '1.0.0', nodes, edges)
+
+def inputs():
+    for kind, n, other in itertools.product(KINDS, [0, 10], ['a', 'x']):
+        yield {'kind': kind, 'n': n, 'other': other}
+    yield {}
+    yield {'n': 10}
+    yield {'kind': {'nested': 'a'}}
+
+def linear_matches(plan_edges, data):
+    return [index for index, plan_edge in enumerate(plan_edges)
+            if not plan_edge.condition or plan_edge.predicate(data)]
+
+@pytest.mark.parametrize('conditions', [CONDITIONS, CONDITIONS[:8], CONDITIONS[::-1]])
+def test_table_matches_linear_evaluation(conditions):
+    plan = build_plan(conditions)
+    plan_edges = plan.get_outgoing_edges('s')
+    table = plan.get_decision_table('s')
+    assert table is not None and table.path == ('kind',)
+    restored = DecisionTable.from_spec(table.to_spec())
+
+    for data in inputs():
+        expected = linear_matches(plan_edges, data)
+        first = plan_edges[expected[0]].target if expected else None
+        for candidate in (table, restored):
+            assert candidate.select(plan_edges, data) is first, data
+            assert candidate.matching_indexes(plan_edges, data) == set(expected), data
+
+def test_no_table_for_single_equality_branch():
+    plan = build_plan(["input['kind'] == 'a'", "input['n'] > 5", None])
+    assert plan.get_decision_table('s') is None
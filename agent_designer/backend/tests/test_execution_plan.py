@@ -0,0 +1,76 @@
+import marshal
+import pytest
+from models import db
+from models.workflow import Workflow
+from services.execution_plan import ExecutionPlan, DagCycleError
+from tests.helpers import node, edge, add_lpi, add_workflow
+
+def loop_workflow(lpi_dir):
+    """start -> a，a 在 n < 3 时回到自身，否则到 end"""
+    increment = add_lpi(lpi_dir, 'increment', '''
+        def main(data):
+            return {'n': data['n'] + 1}
+    ''')
+    nodes = [node('start', 'start'), node('a', 'lpi', component_id=increment.id), node('end', 'end')]
+    edges = [edge('start', 'a'), edge('a', 'a', "input['n'] < 3"), edge('a', 'end', "input['n'] >= 3")]
+    return add_workflow(nodes, edges)
+
+def test_loop_workflow_publishes_and_runs_sequentially(client, lpi_dir):
+    workflow = loop_workflow(lpi_dir)
+
+    response = client.post(f'/api/workflows/{workflow.id}/publish')
+    assert response.status_code == 200
+    artifact = marshal.loads(db.session.get(Workflow, workflow.id).compiled_plan)
+    assert artifact['dag_info'] == {'cycle': ['a']}
+
+    response = client.post(f'/api/workflows/{workflow.id}/execute', json={'n': 0})
+    assert response.status_code == 200
+    result = response.get_json()['result']
+    assert result['final_result'] == {'n': 3}
+    assert len(result['steps']) == 5
+
+    # 重新发布同样成功
+    assert client.post(f'/api/workflows/{workflow.id}/publish').status_code == 200
+
+def test_loop_workflow_rejects_dag_mode(client, lpi_dir):
+    workflow = loop_workflow(lpi_dir)
+    client.post(f'/api/workflows/{workflow.id}/publish')
+
+    for path in ('execute', 'execute?job=1', 'execute/stream', 'execute-batch'):
+        body = [{'n': 0}] if path == 'execute-batch' else {'n': 0}
+        separator = '&' if '?' in path else '?'
+        response = client.post(f'/api/workflows/{workflow.id}/{path}{separator}mode=dag', json=body)
+        assert response.status_code == 400, path
+        assert '存在环' in response.get_json()['error']
+
+def test_cycle_reports_only_the_cycle():
+    nodes = [node('start', 'start'), node('d', 'lpi'), node('a', 'lpi'), node('b', 'lpi'), node('end', 'end')]
+    edges = [edge('start', 'a'), edge('a', 'b'), edge('b', 'a'), edge('b', 'd'), edge('d', 'end')]
+    plan = ExecutionPlan(1, 'cycle', '1.0.0', nodes, edges)
+
+    plan.validate()
+    assert plan.get_dag_cycle() == ['b', 'a']
+    with pytest.raises(DagCycleError, match='b -> a -> b'):
+        plan.get_dag_info()
+
+def test_validate_lists_structural_problems():
+    nodes = [node('start', 'start'), node('start', 'start'), node('a', 'lpi'), node('z', 'lpi')]
+    edges = [edge('start', 'a'), edge('a', 'ghost')]
+    plan = ExecutionPlan(1, 'broken', '1.0.0', nodes, edges)
+
+    with pytest.raises(ValueError) as error:
+        plan.validate()
+    message = str(error.value)
+    assert '节点ID重复: start' in message
+    assert '连接了不存在的节点: ghost' in message
+    assert '节点从开始节点不可达: z' in message
+
+def test_compiled_plan_round_trip_keeps_routing(app, lpi_dir):
+    workflow = loop_workflow(lpi_dir)
+    plan = ExecutionPlan.from_workflow(workflow)
+    restored = ExecutionPlan.from_compiled(workflow, marshal.loads(plan.to_compiled()))
+
+    assert restored.precompiled
+    assert restored.get_dag_cycle() == ['a']
+    assert [e.target['id'] for e in restored.get_outgoing_edges('a')] == ['a', 'end']
+    assert restored.get_outgoing_edges('a')[0].predicate({'n': 1}) is True
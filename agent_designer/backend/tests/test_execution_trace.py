@@ -0,0 +1,71 @@
+import pytest
+from config import Config
+from services import execution_trace
+from services.execution_trace import ExecutionTrace, encode_payload, load_trace_blob
+
+def chain_steps(payloads):
+    """顺序执行的步骤：每一步的输入是上一步的输出"""
+    steps = []
+    for index in range(1, len(payloads)):
+        steps.append({'node_id': f'n{index}', 'input': payloads[index - 1], 'output': payloads[index]})
+    return steps
+
+def test_full_mode_without_limit_does_not_serialize(monkeypatch):
+    def fail(value):
+        raise AssertionError('不应序列化载荷')
+    monkeypatch.setattr(execution_trace, 'encode_payload', fail)
+
+    trace = ExecutionTrace('full', max_bytes=0)
+    for step in chain_steps([{'n': 0}, {'n': 1}, {'n': 2}]):
+        assert trace.record(step) is step
+    assert trace.retained_bytes == 0
+
+def test_default_full_mode_is_unbounded():
+    assert Config.WORKFLOW_TRACE_MAX_BYTES == 0
+    assert ExecutionTrace('full').max_bytes == 0
+
+def test_full_mode_counts_outputs_once():
+    payloads = [{'n': 0}, {'n': 1}, {'n': 22}, {'n': 333}]
+    trace = ExecutionTrace('full', max_bytes=1024)
+    for step in chain_steps(payloads):
+        trace.record(step)
+
+    assert trace.retained_bytes == sum(len(encode_payload(value)) for value in payloads)
+    assert [step['output'] for step in trace.steps] == payloads[1:]
+    assert not trace.degraded
+
+def test_full_mode_degrades_to_summaries_over_limit():
+    big = {'data': 'x' * 200}
+    trace = ExecutionTrace('full', max_bytes=100)
+    steps = chain_steps([{'n': 0}, {'n': 1}, big, {'n': 3}])
+    recorded = [trace.record(step) for step in steps]
+
+    assert recorded[0]['output'] == {'n': 1}
+    assert recorded[1]['output']['truncated'] is True
+    assert recorded[1]['output']['size'] == len(encode_payload(big))
+    # 降级后，之后步骤的输入（即被截断的输出）同样只保留摘要
+    assert recorded[2]['input']['truncated'] is True
+    assert trace.degraded
+
+def test_summary_mode_keeps_size_and_hash():
+    trace = ExecutionTrace('summary')
+    recorded = trace.record({'node_id': 'a', 'input': {'n': 0}, 'output': [1, 2, 3]})
+    assert recorded['output']['size'] == len(encode_payload([1, 2, 3]))
+    assert len(recorded['output']['sha256']) == 64
+
+def test_spill_mode_writes_large_payloads(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, 'WORKFLOW_TRACE_SPILL_DIR', str(tmp_path))
+    big = {'data': 'y' * 500}
+    trace = ExecutionTrace('spill', max_bytes=0, spill_threshold=100)
+    recorded = [trace.record(step) for step in chain_steps([{'n': 0}, big, {'n': 2}])]
+
+    assert recorded[0]['input'] == {'n': 0}
+    blob_id = recorded[0]['output']['blob_id']
+    assert load_trace_blob(blob_id) == big
+    # 大载荷作为下一步的输入时同样溢出，且只写入一次
+    assert recorded[1]['input']['blob_id'] == blob_id
+    assert trace.spilled_blobs == 1
+
+@pytest.mark.parametrize('blob_id', ['../etc/passwd', '', None, 'a' * 32])
+def test_load_trace_blob_rejects_invalid_ids(blob_id):
+    assert load_trace_blob(blob_id) is None
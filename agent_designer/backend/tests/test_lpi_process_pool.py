@@ -0,0 +1,39 @@
+import textwrap
+import pytest
+from services.lpi_process_pool import LpiProcessPool, LpiTimeoutError
+
+@pytest.fixture
+def pool():
+    pool = LpiProcessPool(1, default_timeout=10, start_method='spawn', boot_timeout=30)
+    yield pool
+    pool.shutdown()
+
+@pytest.fixture
+def module_path(tmp_path):
+    path = tmp_path / 'pool_lpi.py'
+    path.write_text(textwrap.dedent("""
+        import time
+
+        def main(input_data):
+            time.sleep(input_data.get('sleep', 0))
+            return {'value': input_data['value'] * 2}
+    """))
+    return str(path)
+
+def test_worker_boot_is_not_counted_in_call_timeout(pool, module_path):
+    # 冷启动的进程池（spawn 启动约需数百毫秒），短超时的调用仍然成功
+    assert pool.call(module_path, 'main', {'value': 1}, timeout=0.5) == {'value': 2}
+    stats = pool.get_stats()
+    assert (stats['timeouts'], stats['restarts']) == (0, 0)
+
+def test_timeout_replaces_worker_and_next_call_succeeds(pool, module_path):
+    pool.call(module_path, 'main', {'value': 1})
+    with pytest.raises(LpiTimeoutError):
+        pool.call(module_path, 'main', {'value': 1, 'sleep': 5}, timeout=0.2)
+    stats = pool.get_stats()
+    assert (stats['timeouts'], stats['restarts']) == (1, 1)
+
+    # 补充的进程同样先等待启动完成，短超时的调用不会再次超时
+    assert pool.call(module_path, 'main', {'value': 3}, timeout=0.5) == {'value': 6}
+    stats = pool.get_stats()
+    assert (stats['timeouts'], stats['restarts']) == (1, 1)
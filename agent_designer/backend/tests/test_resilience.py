@@ -0,0 +1,107 @@
+import threading
+import time
+import pytest
+from services.bulkhead import BulkheadFullError
+from services.lpi_process_pool import LpiFunctionError
+from services import resilience
+from services.resilience import (
+    CircuitOpenError, LpiCallError, ResiliencePolicy, call_with_resilience, get_breaker
+)
+
+KEY = 'lpi:test'
+
+@pytest.fixture(autouse=True)
+def reset_breakers():
+    resilience._breakers.clear()
+    yield
+    resilience._breakers.clear()
+
+def policy(**options):
+    return ResiliencePolicy(**dict({'failure_threshold': 2, 'reset_timeout': 0.05, 'backoff_base': 0}, **options))
+
+def fail(error):
+    def func():
+        raise error
+    return func
+
+def open_breaker(p):
+    for _ in range(p.failure_threshold):
+        with pytest.raises(ConnectionError):
+            call_with_resilience(KEY, p, fail(ConnectionError('down')))
+    assert get_breaker(KEY, p).state == 'open'
+
+def test_open_breaker_rejects_until_reset_timeout():
+    p = policy()
+    open_breaker(p)
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience(KEY, p, lambda: calls.append(1))
+    assert calls == []
+
+    time.sleep(0.06)
+    assert call_with_resilience(KEY, p, lambda: 'ok') == 'ok'
+    stats = get_breaker(KEY, p).to_dict()
+    assert (stats['state'], stats['consecutive_failures'], stats['rejected']) == ('closed', 0, 1)
+
+def test_half_open_admits_a_single_probe():
+    p = policy()
+    open_breaker(p)
+    time.sleep(0.06)
+
+    probing = threading.Event()
+    release = threading.Event()
+
+    def slow_probe():
+        probing.set()
+        release.wait(5)
+        return 'ok'
+
+    results = []
+    probe = threading.Thread(target=lambda: results.append(call_with_resilience(KEY, p, slow_probe)))
+    probe.start()
+    assert probing.wait(5)
+    # 探测调用进行中，其他调用仍被拒绝
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience(KEY, p, lambda: 'other')
+    release.set()
+    probe.join(5)
+
+    assert results == ['ok']
+    assert get_breaker(KEY, p).state == 'closed'
+
+def test_failed_probe_reopens():
+    p = policy()
+    open_breaker(p)
+    time.sleep(0.06)
+
+    with pytest.raises(ConnectionError):
+        call_with_resilience(KEY, p, fail(ConnectionError('still down')))
+    breaker = get_breaker(KEY, p)
+    assert breaker.state == 'open'
+    # 重新计时：未到 reset_timeout 前不再放行探测
+    with pytest.raises(CircuitOpenError):
+        call_with_resilience(KEY, p, lambda: 'ok')
+    assert breaker.to_dict()['opened'] == 2
+
+@pytest.mark.parametrize('error', [LpiFunctionError('bad input'), BulkheadFullError('full')])
+def test_probe_not_reaching_downstream_releases_probe(error):
+    p = policy()
+    open_breaker(p)
+    time.sleep(0.06)
+
+    with pytest.raises(type(error)):
+        call_with_resilience(KEY, p, fail(error))
+    # 探测机会被释放，下一次调用作为新的探测
+    assert get_breaker(KEY, p).state == 'half_open'
+    assert call_with_resilience(KEY, p, lambda: 'ok') == 'ok'
+    assert get_breaker(KEY, p).state == 'closed'
+
+def test_client_error_probe_closes_breaker():
+    p = policy()
+    open_breaker(p)
+    time.sleep(0.06)
+
+    # 4xx 说明下游可用
+    with pytest.raises(LpiCallError):
+        call_with_resilience(KEY, p, fail(LpiCallError('bad request', 400)))
+    assert get_breaker(KEY, p).state == 'closed'
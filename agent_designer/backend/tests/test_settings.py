@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+import pytest
+from services import lpi_transport, settings_service
+
+@pytest.fixture
+def settings_file(tmp_path, monkeypatch):
+    path = tmp_path / 'settings.json'
+    monkeypatch.setattr(settings_service, 'get_settings_file_path', lambda: str(path))
+    lpi_transport.reset_transport()
+    yield path
+    lpi_transport.reset_transport()
+
+def test_saving_settings_rebuilds_transport(client, settings_file):
+    assert lpi_transport.get_transport_settings()['pool_maxsize'] == 20
+
+    response = client.post('/api/settings/', json={'model_name': 'm', 'lpi_transport': {'pool_maxsize': 4}})
+    assert response.status_code == 200
+    assert client.get('/api/settings/').get_json()['model_name'] == 'm'
+
+    settings = lpi_transport.get_transport_settings()
+    assert settings['pool_maxsize'] == 4
+    assert settings['connect_timeout'] == lpi_transport.DEFAULT_TRANSPORT_SETTINGS['connect_timeout']
+
+def test_transport_does_not_depend_on_controllers():
+    code = (
+        'import sys, services.lpi_transport as t; t.get_transport_settings(); '
+        'print(any(name.startswith("controllers") for name in sys.modules))'
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(lpi_transport.__file__)))
+    output = subprocess.run([sys.executable, '-c', code], cwd=backend, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
@@ -0,0 +1,57 @@
+import pytest
+from services.transform_engine import CompiledTransform, PathError, compile_path, parse_path
+
+DATA = {
+    'items': [{'id': 1, 'tags': ['a']}, {'id': 2}, {'id': 3, 'tags': ['c', 'd']}],
+    'meta': {'x': 1, 'y': 2},
+    'name': 'str',
+}
+
+@pytest.mark.parametrize('path, expected', [
+    ('$.items[-1].id', 3),
+    ('$.items[-3].id', 1),
+    ('$.items[-4].id', None),
+    ('$.items[3].id', None),
+    ('$.name[0]', None),
+])
+def test_index(path, expected):
+    assert compile_path(path)(DATA) == expected
+
+@pytest.mark.parametrize('path, expected', [
+    ('$.items[1:].id', [2, 3]),
+    ('$.items[:-1].id', [1, 2]),
+    ('$.items[::-1].id', [3, 2, 1]),
+    ('$.items[::2].id', [1, 3]),
+    ('$.items[5:]', []),
+])
+def test_slice(path, expected):
+    assert compile_path(path)(DATA) == expected
+
+@pytest.mark.parametrize('path, expected', [
+    ('$.items[*].id', [1, 2, 3]),
+    # 取不到值的元素跳过，而不是投影为 None
+    ('$.items[*].tags[0]', ['a', 'c']),
+    ('$.items[*].tags[*]', ['a', 'c', 'd']),
+    ('$.meta.*', [1, 2]),
+    ('$.name.*', []),
+    ("$['items'][0][\"id\"]", 1),
+])
+def test_wildcard_projection(path, expected):
+    assert compile_path(path)(DATA) == expected
+
+def test_dot_paths_keep_original_behavior():
+    # 不以 $. 或 $[ 开头的路径按点号分隔为键，数字也是键
+    assert compile_path('meta.x')(DATA) == 1
+    assert compile_path('items.0')(DATA) is None
+    assert compile_path('$items')({'$items': 5}) == 5
+
+@pytest.mark.parametrize('path', ['$.items[::0]', '$.items[x]', '$.items[0', '$.items..id'])
+def test_invalid_paths(path):
+    with pytest.raises(PathError):
+        parse_path(path)
+
+def test_map_transform():
+    transform = CompiledTransform({'transform_type': 'map', 'mapping': {
+        'last': '$.items[-1].id', 'ids': '$.items[*].id', 'x': 'meta.x', 'missing': '$.nope[0]'
+    }})
+    assert transform(DATA) == {'last': 3, 'ids': [1, 2, 3], 'x': 1, 'missing': None}